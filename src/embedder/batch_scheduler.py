@@ -0,0 +1,160 @@
+"""Modulo de micro-batching de chunks de varios documentos para o encoder."""
+import bisect
+import logging
+import time
+from collections.abc import Callable, Hashable, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchScheduler:
+    """Fila compartilhada que agrupa chunks de varios documentos em lotes cheios.
+
+    Os chunks sao separados em faixas de tamanho em tokens (`bucket_edges`) para
+    reduzir o padding dentro de cada lote. Uma faixa e codificada quando atinge
+    `batch_size` chunks ou quando seu chunk mais antigo espera mais que
+    `max_wait_s`. Quando todos os chunks de um documento foram codificados,
+    `on_document_done` e chamado com os embeddings na ordem original.
+
+    Args:
+        encode_fn (Callable): Recebe uma lista de chunks e retorna seus embeddings.
+        on_document_done (Callable): Chamado como
+            `on_document_done(doc_key, payload, embeddings)`.
+        batch_size (int): Quantidade de chunks por lote.
+        max_wait_s (float): Espera maxima de um chunk na fila antes do lote ser
+            enviado incompleto.
+        bucket_edges (tuple): Limites superiores (inclusivos) das faixas de tokens.
+        token_lengths_fn (Callable, optional): Recebe uma lista de chunks e retorna
+            a quantidade de tokens de cada um; usado quando `submit` nao recebe
+            `token_lengths`.
+        on_batch_encoded (Callable, optional): Chamado apos cada lote como
+            `on_batch_encoded(doc_keys, seconds)`, com o documento de cada chunk
+            do lote e a duracao de `encode_fn`.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list], list],
+        on_document_done: Callable[[Hashable, object, list[np.ndarray]], None],
+        batch_size: int = 64,
+        max_wait_s: float = 2.0,
+        bucket_edges: tuple = (32, 64, 96, 128),
+        token_lengths_fn: Callable[[list], list[int]] | None = None,
+        on_batch_encoded: Callable[[list[Hashable], float], None] | None = None,
+    ) -> None:
+        """Inicializa a fila vazia."""
+        self.encode_fn = encode_fn
+        self.token_lengths_fn = token_lengths_fn
+        self.on_document_done = on_document_done
+        self.batch_size = batch_size
+        self.max_wait_s = max_wait_s
+        self.bucket_edges = sorted(bucket_edges)
+        self.on_batch_encoded = on_batch_encoded
+        self._buckets = [[] for _ in range(len(self.bucket_edges) + 1)]
+        self._bucket_since = [None] * len(self._buckets)
+        self._documents: dict[Hashable, dict] = {}
+        self._batches = 0
+        self._encoded_chunks = 0
+        self._fill_sum = 0.0
+
+    def submit(
+        self,
+        doc_key: Hashable,
+        chunks: Sequence,
+        payload: object = None,
+        known: dict[int, np.ndarray] | None = None,
+        token_lengths: Sequence[int] | None = None,
+    ) -> None:
+        """Enfileira os chunks de um documento.
+
+        Args:
+            doc_key (Hashable): Identificador do documento.
+            chunks (Sequence): Chunks do documento, na ordem original. Cada item e
+                repassado como esta para `encode_fn` (ex.: texto ou (texto, token ids)).
+            payload (object, optional): Dados repassados a `on_document_done`.
+            known (dict, optional): Embeddings ja conhecidos (ex.: do cache),
+                indexados pela posicao do chunk; esses chunks nao sao enfileirados.
+            token_lengths (Sequence[int], optional): Quantidade de tokens de cada
+                chunk, quando ja conhecida; senao e calculada com `token_lengths_fn`.
+        """
+        if doc_key in self._documents:
+            msg = f"Documento {doc_key} ja esta na fila"
+            raise ValueError(msg)
+        known = known or {}
+        embeddings = [known.get(idx) for idx in range(len(chunks))]
+        pending = [idx for idx in range(len(chunks)) if idx not in known]
+        if pending and token_lengths is None and self.token_lengths_fn is None:
+            msg = f"Documento {doc_key} sem token_lengths e a fila nao tem token_lengths_fn"
+            raise ValueError(msg)
+        self._documents[doc_key] = {"payload": payload, "embeddings": embeddings, "pending": len(pending)}
+        if not pending:
+            self._finish(doc_key)
+            return
+
+        now = time.monotonic()
+        if token_lengths is None:
+            lengths = self.token_lengths_fn([chunks[idx] for idx in pending])
+        else:
+            lengths = [int(token_lengths[idx]) for idx in pending]
+        for idx, n_tokens in zip(pending, lengths, strict=True):
+            bucket = bisect.bisect_left(self.bucket_edges, n_tokens)
+            if not self._buckets[bucket]:
+                self._bucket_since[bucket] = now
+            self._buckets[bucket].append((doc_key, idx, chunks[idx]))
+            if len(self._buckets[bucket]) >= self.batch_size:
+                self._encode_bucket(bucket)
+        self.flush()
+
+    def flush(self, *, force: bool = False) -> None:
+        """Codifica as faixas que expiraram, ou todas quando `force` e True."""
+        now = time.monotonic()
+        for bucket, items in enumerate(self._buckets):
+            if items and (force or now - self._bucket_since[bucket] >= self.max_wait_s):
+                self._encode_bucket(bucket)
+
+    def close(self) -> None:
+        """Codifica tudo o que resta na fila."""
+        self.flush(force=True)
+
+    def _encode_bucket(self, bucket: int) -> None:
+        items = self._buckets[bucket]
+        self._buckets[bucket] = []
+        self._bucket_since[bucket] = None
+        while items:
+            batch, items = items[:self.batch_size], items[self.batch_size:]
+            start = time.perf_counter()
+            vectors = self.encode_fn([chunk for _, _, chunk in batch])
+            if self.on_batch_encoded is not None:
+                self.on_batch_encoded([doc_key for doc_key, _, _ in batch], time.perf_counter() - start)
+            self._batches += 1
+            self._encoded_chunks += len(batch)
+            self._fill_sum += len(batch) / self.batch_size
+            finished = []
+            for (doc_key, idx, _), vector in zip(batch, vectors, strict=True):
+                document = self._documents[doc_key]
+                document["embeddings"][idx] = vector
+                document["pending"] -= 1
+                if document["pending"] == 0:
+                    finished.append(doc_key)
+            for doc_key in finished:
+                self._finish(doc_key)
+
+    def _finish(self, doc_key: Hashable) -> None:
+        document = self._documents.pop(doc_key)
+        self.on_document_done(doc_key, document["payload"], document["embeddings"])
+
+    def stats(self) -> dict:
+        """Retorna a quantidade de lotes da fila, chunks codificados e o preenchimento medio dos lotes.
+
+        Os lotes sao os grupos de chunks entregues a `encode_fn`, nao os forward
+        passes do modelo: `encode_fn` pode dividir um lote (ex.: chunks longos em
+        janelas, ou `chunks_per_call` menor que `batch_size`).
+        """
+        return {
+            "queue_batches": self._batches,
+            "chunks": self._encoded_chunks,
+            "avg_queue_batch_fill": self._fill_sum / self._batches if self._batches else 0.0,
+            "pending_documents": len(self._documents),
+        }
@@ -0,0 +1 @@
+"""Modulo de benchmarks do pipeline de embeddings, executados sem acesso aos bancos."""
@@ -0,0 +1,126 @@
+"""Modulo de benchmark da divisao dos textos em chunks."""
+import random
+import time
+
+import numpy as np
+
+from embedder.benchmarks.common import CHUNK_OVERLAP, measure_stage
+from embedder.benchmarks.corpus import internal_html_document
+from embedder.chunk_records import ChunkRecords
+from embedder.embeddings import split_chunk_records
+from embedder.envs import MAX_LENGTH_CHUNK_SIZE
+from embedder.section_chunking import split_section_chunk_records
+from embedder.text_preprocess import encoded_length, html_to_markdown, split_by_sections, split_chunks_old
+
+SECTION_SUMMARY_SECTIONS = (250, 1000)
+
+
+def measure_split(texts: list[str], model_path: str) -> dict:
+    """Mede `split_chunk_records` nos textos convertidos do corpus.
+
+    Args:
+        texts (list[str]): Textos convertidos do corpus.
+        model_path (str): Nome ou caminho do modelo (tokenizer).
+
+    Returns:
+        dict: Metricas da etapa split (ver `stage_metrics`).
+    """
+    metrics, _ = measure_stage(
+        texts,
+        lambda text: (
+            (chunks := split_chunk_records(text, model_path, MAX_LENGTH_CHUNK_SIZE, CHUNK_OVERLAP)),
+            len(chunks),
+            int(chunks.token_lengths().sum()),
+        ),
+    )
+    return {"split": metrics}
+
+
+def chunk_distribution(records: list[ChunkRecords], elapsed: float, chunk_size: int) -> dict:
+    """Quantidade e distribuicao de tamanho (em tokens) dos chunks de um divisor.
+
+    Args:
+        records (list[ChunkRecords]): Chunks de cada documento.
+        elapsed (float): Duracao da divisao, em segundos.
+        chunk_size (int): Limite de tokens usado.
+
+    Returns:
+        dict: chunks, chunks_per_doc, tokens, percentis e media de tokens por
+            chunk, ocupacao media do limite e chunks que atravessam o inicio de uma secao.
+    """
+    lengths = np.concatenate([chunks.token_lengths() for chunks in records]) if records else np.zeros(0)
+    docs = len(records)
+    return {
+        "docs": docs,
+        "chunks": int(len(lengths)),
+        "chunks_per_doc": len(lengths) / docs if docs else 0.0,
+        "tokens": int(lengths.sum()),
+        "elapsed_s": elapsed,
+        "docs_per_s": docs / elapsed if elapsed else 0.0,
+        "tokens_per_chunk_p10": float(np.percentile(lengths, 10)) if len(lengths) else 0.0,
+        "tokens_per_chunk_p50": float(np.percentile(lengths, 50)) if len(lengths) else 0.0,
+        "tokens_per_chunk_p90": float(np.percentile(lengths, 90)) if len(lengths) else 0.0,
+        "tokens_per_chunk_mean": float(lengths.mean()) if len(lengths) else 0.0,
+        "fill_ratio": float(lengths.mean()) / chunk_size if len(lengths) else 0.0,
+        "cross_section_chunks": sum("\n# **" in text for chunks in records for text in chunks.texts()),
+    }
+
+
+def measure_chunking(texts: list[str], model_path: str, chunk_size: int = MAX_LENGTH_CHUNK_SIZE) -> dict:
+    """Compara a divisao por tokens (`split_chunk_records`) com a divisao por secoes (`split_section_chunk_records`).
+
+    Args:
+        texts (list[str]): Textos convertidos do corpus.
+        model_path (str): Nome ou caminho do modelo (tokenizer).
+        chunk_size (int): Limite de tokens por chunk.
+
+    Returns:
+        dict: Distribuicao dos chunks de cada divisor (ver `chunk_distribution`).
+    """
+    stages = {}
+    for name, split in (("split_tokens", split_chunk_records), ("split_sections", split_section_chunk_records)):
+        start = time.perf_counter()
+        records = [split(text, model_path, chunk_size, CHUNK_OVERLAP) for text in texts]
+        stages[name] = chunk_distribution(records, time.perf_counter() - start, chunk_size)
+    return stages
+
+
+def measure_section_summary(sections: tuple = SECTION_SUMMARY_SECTIONS, seed: int = 0, max_tokens: int = 256) -> dict:
+    """Mede `split_chunks_old` (resumo por secoes) em documentos de milhares de linhas.
+
+    Cada documento e dividido duas vezes: com o cache de `encoded_length`
+    vazio (cold) e ja preenchido pela primeira divisao (warm). O primeiro
+    paragrafo do markdown e descartado para que `split_by_sections` comece
+    pela secao INICIO, como nos documentos que nao abrem com negrito.
+
+    Args:
+        sections (tuple): Quantidade de secoes (Item_Nivel1) de cada documento.
+        seed (int): Semente dos documentos.
+        max_tokens (int): Limite de tokens por chunk (menor que a maioria das
+            secoes, para exercitar a divisao por linhas).
+
+    Returns:
+        dict: Linhas, chunks, duracao e linhas/s de cada divisao, por tamanho.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    stages = {}
+    for n_sections in sections:
+        markdown = html_to_markdown(internal_html_document(rng, n_sections), use_cache=False)
+        splited = split_by_sections(markdown.split("\n\n", 1)[1])
+        lines = sum(len(value) for value in splited.values())
+        for name in ("cold", "warm"):
+            if name == "cold":
+                encoded_length.cache_clear()
+            start = time.perf_counter()
+            result = split_chunks_old(splited, max_tokens)
+            elapsed = time.perf_counter() - start
+            cache = encoded_length.cache_info()
+            stages[f"split_chunks_old_{name}_{n_sections}_sections"] = {
+                "lines": lines,
+                "chunks": len(result["chunks"]),
+                "elapsed_s": elapsed,
+                "lines_per_s": lines / elapsed if elapsed else 0.0,
+                "cache_hits": cache.hits,
+                "cache_misses": cache.misses,
+            }
+    return stages
@@ -0,0 +1,92 @@
+"""Modulo com as medicoes comuns as etapas do benchmark."""
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+
+from embedder.extract_docs.document import ContentKind, ExtractedDocument
+from embedder.resource_usage import RssSampler
+
+CHUNK_OVERLAP = 50
+
+
+def extract_text(document: dict) -> str:
+    """Converte o documento como `extract_document_chunks`: markdown para HTML interno, pre-processamento para PDF."""
+    kind = ContentKind.HTML if document["kind"] == "html" else ContentKind.PDF_TEXT
+    extracted = ExtractedDocument(id_documento=str(document["id_documento"]), content=document["content"], kind=kind)
+    return extracted.normalize(use_cache=False).content
+
+
+def stage_metrics(latencies: list[float], chunks: int, tokens: int, elapsed: float, rss: RssSampler) -> dict:
+    """Agrega as medicoes de uma etapa.
+
+    Args:
+        latencies (list[float]): Latencia de cada documento, em segundos.
+        chunks (int): Chunks produzidos ou codificados na etapa.
+        tokens (int): Tokens processados na etapa.
+        elapsed (float): Duracao total da etapa, em segundos.
+        rss (RssSampler): Amostrador de memoria usado durante a etapa.
+
+    Returns:
+        dict: Vazao (docs/s, chunks/s, tokens/s), latencias p50/p95 em ms e pico de memoria.
+    """
+    docs = len(latencies)
+    return {
+        "docs": docs,
+        "chunks": chunks,
+        "tokens": tokens,
+        "elapsed_s": elapsed,
+        "docs_per_s": docs / elapsed if elapsed else 0.0,
+        "chunks_per_s": chunks / elapsed if elapsed else 0.0,
+        "tokens_per_s": tokens / elapsed if elapsed else 0.0,
+        "latency_p50_ms": float(np.percentile(latencies, 50)) * 1000 if latencies else 0.0,
+        "latency_p95_ms": float(np.percentile(latencies, 95)) * 1000 if latencies else 0.0,
+        "peak_rss_mb": rss.peak_mb,
+        "rss_growth_mb": rss.peak_mb - rss.start_mb,
+    }
+
+
+def measure_stage(items: list, fn: Callable[[object], tuple]) -> tuple[dict, list]:
+    """Executa `fn` em cada item, medindo a latencia por documento e a memoria.
+
+    Args:
+        items (list): Entradas da etapa, um item por documento.
+        fn (Callable): Recebe um item e retorna (saida, chunks, tokens).
+
+    Returns:
+        tuple: Metricas da etapa (ver `stage_metrics`) e as saidas de cada item.
+    """
+    latencies, outputs = [], []
+    chunks = tokens = 0
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        for item in items:
+            item_start = time.perf_counter()
+            output, n_chunks, n_tokens = fn(item)
+            latencies.append(time.perf_counter() - item_start)
+            outputs.append(output)
+            chunks += n_chunks
+            tokens += n_tokens
+        elapsed = time.perf_counter() - start
+    return stage_metrics(latencies, chunks, tokens, elapsed, rss), outputs
+
+
+def traced_run(fn: Callable[[], int]) -> dict:
+    """Executa `fn` medindo a duracao e o pico de memoria alocada pelo Python (tracemalloc).
+
+    Args:
+        fn (Callable): Retorna a quantidade de chunks produzidos.
+
+    Returns:
+        dict: chunks, elapsed_s e peak_traced_mb.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        chunks = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"chunks": chunks, "elapsed_s": elapsed, "peak_traced_mb": peak / 2**20}
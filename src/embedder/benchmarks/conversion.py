@@ -0,0 +1,232 @@
+"""Modulo de benchmark da conversao de documentos em texto (HTML para markdown e texto de PDF)."""
+import importlib.util
+import os
+import random
+import time
+
+import pandas as pd
+
+from embedder.benchmarks.common import CHUNK_OVERLAP, extract_text, measure_stage, traced_run
+from embedder.benchmarks.corpus import internal_html_document, internal_html_parts, pdf_like_text
+from embedder.conversion_cache import conversion_cache
+from embedder.embeddings import iter_token_chunks, split_chunk_records
+from embedder.envs import HTML_TO_MARKDOWN_WORKERS, MAX_LENGTH_CHUNK_SIZE
+from embedder.html_stream import iter_markdown_blocks
+from embedder.instrumentation import active, start_document
+from embedder.model_registry import model_registry
+from embedder.text_preprocess import (
+    clean_pdf_text,
+    html_to_markdown,
+    process_html_to_markdown,
+    process_html_to_markdown_parallel,
+)
+
+HTML_SCALING_SECTIONS = (100, 400, 1600)
+HTML_STREAMING_SECTIONS = (250, 1000)
+PDF_NORMALIZATION_PAGES = (400, 2400)
+
+
+def measure_html_conversion(html_docs: list[dict], **options: object) -> dict:
+    """Mede `html_to_markdown` e quantas vezes cada documento foi analisado como HTML.
+
+    Args:
+        html_docs (list[dict]): Documentos internos do corpus.
+        **options: Opcoes repassadas a `html_to_markdown` (single_parse, parser, use_cache, que
+            por padrao e False para medir a conversao).
+
+    Returns:
+        dict: Metricas da etapa (ver `stage_metrics`), com parses_per_doc e parse_ms_per_doc.
+    """
+    parses = {"count": 0, "seconds": 0.0}
+
+    def convert(document: dict) -> tuple:
+        record = start_document(document["id_documento"], enabled=True)
+        with active(record):
+            markdown = html_to_markdown(document["content"], **{"use_cache": False, **options})
+        parses["count"] += record.calls.get("html_parse", 0)
+        parses["seconds"] += record.stages.get("html_parse", 0.0)
+        return markdown, 0, 0
+
+    metrics, _ = measure_stage(html_docs, convert)
+    metrics["parses_per_doc"] = parses["count"] / len(html_docs) if html_docs else 0.0
+    metrics["parse_ms_per_doc"] = parses["seconds"] * 1000 / len(html_docs) if html_docs else 0.0
+    return metrics
+
+
+def measure_html_modes(html_docs: list[dict]) -> dict:
+    """Mede `html_to_markdown` em duas passadas e com analise unica (html.parser e, se instalado, lxml).
+
+    Args:
+        html_docs (list[dict]): Documentos internos do corpus.
+
+    Returns:
+        dict: Metricas de cada modo (ver `measure_html_conversion`).
+    """
+    stages = {
+        "html_to_markdown": measure_html_conversion(html_docs, single_parse=False),
+        "html_to_markdown_single_parse": measure_html_conversion(html_docs, single_parse=True, parser="html.parser"),
+    }
+    if importlib.util.find_spec("lxml") is not None:
+        stages["html_to_markdown_single_parse_lxml"] = measure_html_conversion(
+            html_docs, single_parse=True, parser="lxml"
+        )
+    return stages
+
+
+def measure_conversion_cache(html_docs: list[dict]) -> dict:
+    """Mede `html_to_markdown` com o cache de conversao ja preenchido (documentos reindexados sem mudanca).
+
+    Args:
+        html_docs (list[dict]): Documentos internos do corpus.
+
+    Returns:
+        dict: Metricas da etapa html_to_markdown_cached (ver `stage_metrics`) e os contadores do cache.
+    """
+    conversion_cache.memory.clear()
+    for document in html_docs:
+        html_to_markdown(document["content"], use_cache=True)
+    conversion_cache.reset_stats()
+    metrics, _ = measure_stage(
+        html_docs, lambda document: (html_to_markdown(document["content"], use_cache=True), 0, 0)
+    )
+    metrics["cache"] = conversion_cache.stats()
+    conversion_cache.memory.clear()
+    return {"html_to_markdown_cached": metrics}
+
+
+def measure_markdown_parallel(html_docs: list[dict], workers: int = HTML_TO_MARKDOWN_WORKERS) -> dict:
+    """Compara `process_html_to_markdown_parallel` com a conversao serial do mesmo DataFrame.
+
+    Args:
+        html_docs (list[dict]): Documentos internos do corpus.
+        workers (int): Processos do pool (0 usa todos os nucleos).
+
+    Returns:
+        dict: Duracao e docs/s de cada modo, speedup e se os resultados sao iguais.
+    """
+    frame = pd.DataFrame({"HTML": [document["content"] for document in html_docs]})
+    conversion_cache.memory.clear()
+    start = time.perf_counter()
+    serial = process_html_to_markdown(frame.copy())
+    serial_s = time.perf_counter() - start
+    conversion_cache.memory.clear()
+    start = time.perf_counter()
+    parallel = process_html_to_markdown_parallel(frame.copy(), workers=workers, min_rows=0)
+    elapsed = time.perf_counter() - start
+    return {
+        "process_html_to_markdown_parallel": {
+            "docs": len(frame),
+            "workers": workers or os.cpu_count(),
+            "serial_s": serial_s,
+            "elapsed_s": elapsed,
+            "docs_per_s": len(frame) / elapsed if elapsed else 0.0,
+            "serial_docs_per_s": len(frame) / serial_s if serial_s else 0.0,
+            "speedup": serial_s / elapsed if elapsed else 0.0,
+            "identical": serial.equals(parallel),
+        }
+    }
+
+
+def measure_pdf_extraction(pdf_docs: list[dict]) -> dict:
+    """Mede o pre-processamento dos documentos externos do corpus.
+
+    Args:
+        pdf_docs (list[dict]): Documentos externos do corpus.
+
+    Returns:
+        dict: Metricas da etapa pre_processamento_pdf (ver `stage_metrics`).
+    """
+    metrics, _ = measure_stage(pdf_docs, lambda document: (extract_text(document), 0, 0))
+    return {"pre_processamento_pdf": metrics}
+
+
+def measure_html_scaling(sections: tuple = HTML_SCALING_SECTIONS, seed: int = 0, repeat: int = 3) -> dict:
+    """Mede `html_to_markdown` em documentos internos de tamanho crescente.
+
+    Cada documento tem o corpo envolvido por um <div>, como nas exportacoes do
+    editor, e e convertido `repeat` vezes. Com a conversao linear, `chars_per_s`
+    fica estavel entre os tamanhos.
+
+    Args:
+        sections (tuple): Quantidade de secoes (Item_Nivel1) de cada documento.
+        seed (int): Semente dos documentos.
+        repeat (int): Conversoes de cada documento.
+
+    Returns:
+        dict: Metricas por tamanho (ver `stage_metrics`), com chars e chars_per_s.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    stages = {}
+    for n_sections in sections:
+        html = internal_html_document(rng, n_sections)
+        html = html.replace("<body>", "<body><div>").replace("</body>", "</div></body>")
+        metrics, _ = measure_stage(
+            [html] * repeat, lambda document: (html_to_markdown(document, use_cache=False), 0, 0)
+        )
+        metrics["chars"] = len(html)
+        metrics["chars_per_s"] = len(html) * repeat / metrics["elapsed_s"] if metrics["elapsed_s"] else 0.0
+        stages[f"html_to_markdown_{n_sections}_sections"] = metrics
+    return stages
+
+
+def measure_html_streaming(model_path: str, sections: tuple = HTML_STREAMING_SECTIONS, seed: int = 0) -> dict:
+    """Compara o pico de memoria da conversao e divisao em chunks de um documento grande, inteiro e por streaming.
+
+    No caminho inteiro o HTML e montado como string, convertido por
+    `html_to_markdown` (analise unica) e dividido por `split_chunk_records`. No
+    streaming as linhas do HTML vem de um gerador e passam por
+    `iter_markdown_blocks` e `iter_token_chunks`. Com a memoria limitada pelos
+    blocos, `peak_traced_mb` do streaming fica estavel entre os tamanhos. A
+    memoria do tokenizer (Rust) nao entra no tracemalloc.
+
+    Args:
+        model_path (str): Nome ou caminho do modelo (tokenizer).
+        sections (tuple): Quantidade de secoes (Item_Nivel1) de cada documento.
+        seed (int): Semente dos documentos.
+
+    Returns:
+        dict: Metricas por tamanho e caminho (chars, chunks, elapsed_s, chars_per_s e peak_traced_mb).
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    stages = {}
+    for n_sections in sections:
+        chars = sum(len(line) + 1 for line in internal_html_parts(random.Random(seed), n_sections))  # noqa: S311
+
+        def full(n_sections: int = n_sections) -> int:
+            html = internal_html_document(random.Random(seed), n_sections)  # noqa: S311
+            markdown = html_to_markdown(html, single_parse=True, parser="html.parser", use_cache=False)
+            return len(split_chunk_records(markdown, model_path, MAX_LENGTH_CHUNK_SIZE, CHUNK_OVERLAP))
+
+        def streaming(n_sections: int = n_sections) -> int:
+            lines = (line + "\n" for line in internal_html_parts(random.Random(seed), n_sections))  # noqa: S311
+            blocks = iter_markdown_blocks(lines)
+            return sum(1 for _ in iter_token_chunks(blocks, tokenizer, MAX_LENGTH_CHUNK_SIZE, CHUNK_OVERLAP))
+
+        for name, fn in (("full", full), ("streaming", streaming)):
+            metrics = traced_run(fn)
+            metrics["chars"] = chars
+            metrics["chars_per_s"] = chars / metrics["elapsed_s"] if metrics["elapsed_s"] else 0.0
+            stages[f"html_{name}_{n_sections}_sections"] = metrics
+    return stages
+
+
+def measure_pdf_normalization(pages: tuple = PDF_NORMALIZATION_PAGES, seed: int = 0, repeat: int = 3) -> dict:
+    """Mede `clean_pdf_text` (pre_processamento_pdf sem o cache) em textos de PDF de varios MB.
+
+    Args:
+        pages (tuple): Quantidade de paginas de cada texto (2400 paginas sao cerca de 7 MB).
+        seed (int): Semente dos textos.
+        repeat (int): Normalizacoes de cada texto.
+
+    Returns:
+        dict: Metricas por tamanho (ver `stage_metrics`), com chars e chars_per_s.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    stages = {}
+    for n_pages in pages:
+        text = pdf_like_text(rng, n_pages)
+        metrics, _ = measure_stage([text] * repeat, lambda document: (clean_pdf_text(document), 0, 0))
+        metrics["chars"] = len(text)
+        metrics["chars_per_s"] = len(text) * repeat / metrics["elapsed_s"] if metrics["elapsed_s"] else 0.0
+        stages[f"pre_processamento_pdf_{n_pages}_pages"] = metrics
+    return stages
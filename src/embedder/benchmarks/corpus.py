@@ -0,0 +1,179 @@
+"""Modulo de geracao de um corpus sintetico e reprodutivel de documentos do SEI."""
+import random
+from collections.abc import Iterator
+
+WORDS = (
+    "processo administrativo anatel agencia nacional telecomunicacoes servico prestadora outorga "
+    "licitacao edital contrato aditivo fiscalizacao regulamento resolucao portaria despacho decisao "
+    "conselho diretor superintendencia gerencia analise tecnica juridica procuradoria parecer "
+    "interessado requerente recurso administrativo prazo vigencia espectro radiofrequencia faixa "
+    "autorizacao consulta publica contribuicao sancao multa obrigacao universalizacao qualidade "
+    "indicadores metas cobertura municipio estacao transmissao frequencia canal potencia "
+    "homologacao certificacao produto equipamento conformidade competicao mercado relevante "
+    "consumidor usuario reclamacao atendimento ouvidoria informe nota memorando oficio "
+    "deliberacao acordao plenario relator voto fundamentacao dispositivo considerando "
+    "procedimento instrucao diligencia manifestacao alegacoes finais notificacao intimacao "
+    "cumprimento exigencia descumprimento infracao gravidade reincidencia dosimetria"
+).split()
+
+TITLE_WORDS = ("Objeto", "Referencias", "Analise", "Fundamentacao", "Conclusao", "Proposta de Encaminhamento")
+
+PARAGRAPH_CLASSES = (
+    "Item_Nivel2",
+    "Item_Nivel3",
+    "Item_Nivel4",
+    "Paragrafo_Numerado_Nivel1",
+    "Paragrafo_Numerado_Nivel2",
+    "Paragrafo_Numerado_Nivel3",
+    "Item_Inciso_Romano",
+    "Item_Alinea_Letra",
+    "Citacao",
+    "Texto_Justificado",
+    "Texto_Justificado_Recuo_Primeira_Linha",
+    "Texto_Fundo_Cinza_Negrito",
+    "Texto_Justificado_Maiusculas",
+)
+
+
+def chance(rng: random.Random, probability: float) -> bool:
+    """Sorteia um evento com a probabilidade informada."""
+    return rng.random() < probability
+
+
+def process_number(rng: random.Random) -> str:
+    """Numero de processo no formato do SEI."""
+    return f"{rng.randint(53500, 53599)}.{rng.randint(0, 999999):06d}/2023-{rng.randint(10, 99)}"
+
+
+def sentence(rng: random.Random, min_words: int = 8, max_words: int = 30) -> str:
+    """Frase com vocabulario do dominio, com numero de processo ou artigo de vez em quando."""
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    if chance(rng, 0.2):
+        words.insert(rng.randrange(len(words)), process_number(rng))
+    if chance(rng, 0.2):
+        words.insert(rng.randrange(len(words)), f"art. {rng.randint(1, 300)}")
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random, min_sentences: int = 1, max_sentences: int = 5) -> str:
+    """Paragrafo com algumas frases."""
+    return " ".join(sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences)))
+
+
+def html_table(rng: random.Random, *, merged: bool = False) -> str:
+    """Tabela HTML com cabecalho; com `merged` uma celula usa colspan e outra rowspan."""
+    n_cols = rng.randint(2, 5)
+    header = [f"<th>{rng.choice(WORDS).capitalize()}</th>" for _ in range(n_cols)]
+    body = [
+        [f"<td>{' '.join(rng.choices(WORDS, k=rng.randint(1, 4)))}</td>" for _ in range(n_cols)]
+        for _ in range(rng.randint(3, 8))
+    ]
+    if merged:
+        first, second, third = body[:3]
+        first[0:2] = [f'<td colspan="2">{rng.choice(WORDS)}</td>']
+        second[-1] = f'<td rowspan="2">{rng.choice(WORDS)}</td>'
+        third.pop()
+    rows = "".join(f"<tr>{''.join(cells)}</tr>" for cells in [header, *body])
+    return f'<table border="1">{rows}</table>'
+
+
+def internal_html_document(rng: random.Random, n_sections: int) -> str:
+    """Documento interno do SEI no formato HTML gerado pelo editor, com as classes CSS usadas em `process_paragraph`.
+
+    Args:
+        rng (random.Random): Gerador de numeros aleatorios.
+        n_sections (int): Quantidade de secoes (Item_Nivel1).
+
+    Returns:
+        str: HTML do documento.
+    """
+    return "\n".join(internal_html_parts(rng, n_sections))
+
+
+def internal_html_parts(rng: random.Random, n_sections: int) -> Iterator[str]:
+    """Linhas do HTML de `internal_html_document`, geradas uma a uma (documentos grandes sem montar a string).
+
+    Args:
+        rng (random.Random): Gerador de numeros aleatorios.
+        n_sections (int): Quantidade de secoes (Item_Nivel1).
+
+    Yields:
+        str: Cada linha do HTML, sem a quebra de linha.
+    """
+    yield '<html><head><meta charset="utf-8"><title>SEI</title></head><body>'
+    yield f'<p class="Texto_Centralizado_Maiusculas_Negrito">Informe n&ordm; {rng.randint(1, 999)}/2023/ORLE/SOR</p>'
+    yield "<!-- cabecalho gerado pelo editor -->"
+    yield (
+        '<p class="Texto_Alinhado_Esquerda_Espacamento_Simples_Maiusc">'
+        f"Processo n&ordm;&nbsp;{process_number(rng)}</p>"
+    )
+    for section in range(n_sections):
+        yield f'<p class="Item_Nivel1">{TITLE_WORDS[section % len(TITLE_WORDS)]}</p>'
+        for _ in range(rng.randint(2, 10)):
+            css_class = rng.choice(PARAGRAPH_CLASSES)
+            text = paragraph(rng)
+            if chance(rng, 0.3):
+                text = text.replace(" ", " <strong>", 1) + "</strong>"
+            if chance(rng, 0.2):
+                text = f'<span style="font-size:12pt">{text}</span>&#8203;'
+            yield f'<p class="{css_class}">{text}</p>'
+        extra = rng.choices(("table", "list", None), weights=(15, 10, 75))[0]
+        if extra == "table":
+            yield html_table(rng, merged=chance(rng, 0.3))
+        elif extra == "list":
+            items = "".join(f"<li>{sentence(rng, 3, 10)}</li>" for _ in range(rng.randint(2, 5)))
+            yield f"<ul>{items}</ul>"
+        if chance(rng, 0.1):
+            yield f'<div style="display: none">{sentence(rng)}</div>'
+    yield '<p class="Texto_Justificado">Atenciosamente,</p><hr></body></html>'
+
+
+def pdf_like_text(rng: random.Random, n_pages: int) -> str:
+    """Texto extraido de PDF: quebras de linha no meio das frases, espacos duplos e cabecalhos de pagina.
+
+    Args:
+        rng (random.Random): Gerador de numeros aleatorios.
+        n_pages (int): Quantidade de paginas.
+
+    Returns:
+        str: Texto bruto, como retornado pela extracao do PDF.
+    """
+    lines = []
+    for page in range(1, n_pages + 1):
+        lines.append(f"AGENCIA NACIONAL DE TELECOMUNICACOES    Pagina {page} de {n_pages}")
+        lines.append("")
+        for _ in range(rng.randint(15, 40)):
+            line = " ".join(rng.choices(WORDS, k=rng.randint(6, 14)))
+            if chance(rng, 0.2):
+                line = line.replace(" ", "  ", rng.randint(1, 3))
+            lines.append(line + (" " if chance(rng, 0.3) else ""))
+            if chance(rng, 0.1):
+                lines.extend(["", " ", ""])
+        lines.append("\f")
+    return "\n".join(lines)
+
+
+def generate_corpus(n_docs: int = 200, seed: int = 0, pdf_ratio: float = 0.3) -> list[dict]:
+    """Gera o corpus sintetico; a mesma semente produz sempre o mesmo corpus.
+
+    Os tamanhos seguem uma distribuicao com muitos documentos curtos e poucos longos.
+
+    Args:
+        n_docs (int): Quantidade de documentos.
+        seed (int): Semente do gerador.
+        pdf_ratio (float): Fracao de documentos externos (texto de PDF).
+
+    Returns:
+        list[dict]: Documentos com id_documento, kind ("html" ou "pdf") e content.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    corpus = []
+    for id_documento in range(1, n_docs + 1):
+        size = min(int(rng.paretovariate(1.5)), 30)
+        if rng.random() < pdf_ratio:
+            corpus.append({"id_documento": id_documento, "kind": "pdf", "content": pdf_like_text(rng, size)})
+        else:
+            corpus.append(
+                {"id_documento": id_documento, "kind": "html", "content": internal_html_document(rng, size + 1)}
+            )
+    return corpus
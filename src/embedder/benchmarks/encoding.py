@@ -0,0 +1,97 @@
+"""Modulo de benchmark do encoder e do caminho completo de `indexing_embeddings`."""
+import time
+
+from embedder.batch_scheduler import MicroBatchScheduler
+from embedder.benchmarks.common import CHUNK_OVERLAP, extract_text, measure_stage, stage_metrics
+from embedder.embeddings import encode_chunks, split_chunk_records
+from embedder.envs import MAX_LENGTH_CHUNK_SIZE, MICRO_BATCH_BUCKET_EDGES, MICRO_BATCH_MAX_WAIT_S, MICRO_BATCH_SIZE
+from embedder.instrumentation import active, start_document
+from embedder.resource_usage import RssSampler
+
+
+def measure_encode(texts: list[str], model_path: str) -> dict:
+    """Mede `encode_chunks` documento a documento, com os token ids da divisao (feita antes, fora da medicao).
+
+    Args:
+        texts (list[str]): Textos convertidos do corpus.
+        model_path (str): Nome ou caminho do modelo.
+
+    Returns:
+        dict: Metricas da etapa encode (ver `stage_metrics`).
+    """
+    records = [split_chunk_records(text, model_path, MAX_LENGTH_CHUNK_SIZE, CHUNK_OVERLAP) for text in texts]
+    metrics, _ = measure_stage(
+        records,
+        lambda chunks: (
+            encode_chunks(
+                chunks.texts(),
+                model_path=model_path,
+                max_length=MAX_LENGTH_CHUNK_SIZE,
+                token_ids=[chunks.ids(idx) for idx in range(len(chunks))],
+            ),
+            len(chunks),
+            int(chunks.token_lengths().sum()),
+        ),
+    )
+    return {"encode": metrics}
+
+
+def measure_pipeline(corpus: list[dict], model_path: str) -> dict:
+    """Mede o caminho de `indexing_embeddings`, sem a gravacao.
+
+    Cada documento e convertido uma vez, como em `extract_document_chunks`,
+    dividido e enviado ao MicroBatchScheduler. A latencia vai do inicio da
+    conversao ate o documento ter todos os chunks codificados. As conversoes e
+    analises de HTML por documento vem da instrumentacao (conversions_per_doc e
+    parses_per_doc).
+
+    Args:
+        corpus (list[dict]): Saida de `generate_corpus`.
+        model_path (str): Nome ou caminho do modelo.
+
+    Returns:
+        dict: Metricas da etapa pipeline (ver `stage_metrics`).
+    """
+    started, latencies = {}, []
+    totals = {"chunks": 0, "tokens": 0, "conversions": 0, "parses": 0}
+
+    def encode(chunks: list[tuple]) -> list:
+        totals["chunks"] += len(chunks)
+        totals["tokens"] += sum(len(ids) for _, ids in chunks)
+        return encode_chunks(
+            [text for text, _ in chunks],
+            model_path=model_path,
+            max_length=MAX_LENGTH_CHUNK_SIZE,
+            batch_size=MICRO_BATCH_SIZE,
+            token_ids=[ids for _, ids in chunks],
+        )
+
+    def on_document_done(doc_key: int, *_: object) -> None:
+        latencies.append(time.perf_counter() - started.pop(doc_key))
+
+    scheduler = MicroBatchScheduler(
+        encode_fn=encode,
+        on_document_done=on_document_done,
+        batch_size=MICRO_BATCH_SIZE,
+        max_wait_s=MICRO_BATCH_MAX_WAIT_S,
+        bucket_edges=MICRO_BATCH_BUCKET_EDGES,
+    )
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        for document in corpus:
+            started[document["id_documento"]] = time.perf_counter()
+            record = start_document(document["id_documento"], enabled=True)
+            with active(record):
+                markdown = extract_text(document)
+            totals["conversions"] += record.calls.get("html_to_markdown", 0) + record.calls.get(
+                "pre_processamento_pdf", 0
+            )
+            totals["parses"] += record.calls.get("html_parse", 0)
+            records = split_chunk_records(markdown, model_path, MAX_LENGTH_CHUNK_SIZE, CHUNK_OVERLAP)
+            scheduler.submit(document["id_documento"], records, token_lengths=records.token_lengths())
+        scheduler.close()
+        elapsed = time.perf_counter() - start
+    metrics = stage_metrics(latencies, totals["chunks"], totals["tokens"], elapsed, rss)
+    metrics["conversions_per_doc"] = totals["conversions"] / len(corpus) if corpus else 0.0
+    metrics["parses_per_doc"] = totals["parses"] / len(corpus) if corpus else 0.0
+    return {"pipeline": metrics}
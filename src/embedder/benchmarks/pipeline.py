@@ -0,0 +1,209 @@
+"""Modulo de benchmark das etapas do pipeline de embeddings sobre o corpus sintetico.
+
+Executa sem acesso aos bancos: os documentos vem de `corpus.generate_corpus` e
+a gravacao no pgvector nao e medida. As medicoes ficam nos modulos de cada
+etapa (`conversion`, `chunking` e `encoding`) e `--stages` escolhe quais
+executar; as etapas com documentos de varios MB so rodam quando pedidas. Exemplo::
+
+    python -m embedder.benchmarks.pipeline --docs 200 --output atual.json --baseline anterior.json
+    python -m embedder.benchmarks.pipeline --stages html_scaling,pdf_normalization
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from embedder.benchmarks.chunking import measure_chunking, measure_section_summary, measure_split
+from embedder.benchmarks.common import extract_text
+from embedder.benchmarks.conversion import (
+    measure_conversion_cache,
+    measure_html_modes,
+    measure_html_scaling,
+    measure_html_streaming,
+    measure_markdown_parallel,
+    measure_pdf_extraction,
+    measure_pdf_normalization,
+)
+from embedder.benchmarks.corpus import generate_corpus
+from embedder.benchmarks.encoding import measure_encode, measure_pipeline
+from embedder.embeddings import encode_chunks
+from embedder.envs import EMBEDDING_BACKEND, EMBEDDING_MODEL, MAX_LENGTH_CHUNK_SIZE
+from embedder.model_registry import model_registry
+from embedder.resource_usage import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_METRICS = ("docs_per_s", "chunks_per_s", "tokens_per_s", "chars_per_s")
+LATENCY_METRICS = ("latency_p50_ms", "latency_p95_ms")
+
+# etapa -> (medicao, entradas); cada medicao retorna {nome da metrica: metricas}
+STAGES: dict[str, tuple[Callable[..., dict], tuple[str, ...]]] = {
+    "html": (measure_html_modes, ("html_docs",)),
+    "conversion_cache": (measure_conversion_cache, ("html_docs",)),
+    "markdown_parallel": (measure_markdown_parallel, ("html_docs",)),
+    "pdf": (measure_pdf_extraction, ("pdf_docs",)),
+    "chunking": (measure_chunking, ("texts", "model_path")),
+    "split": (measure_split, ("texts", "model_path")),
+    "encode": (measure_encode, ("texts", "model_path")),
+    "pipeline": (measure_pipeline, ("corpus", "model_path")),
+    "html_scaling": (measure_html_scaling, ()),
+    "html_streaming": (measure_html_streaming, ("model_path",)),
+    "pdf_normalization": (measure_pdf_normalization, ()),
+    "section_summary": (measure_section_summary, ()),
+}
+# etapas com documentos sinteticos de varios MB, executadas apenas quando pedidas em --stages
+LARGE_STAGES = ("html_scaling", "html_streaming", "pdf_normalization", "section_summary")
+DEFAULT_STAGES = tuple(stage for stage in STAGES if stage not in LARGE_STAGES)
+
+
+def stage_inputs(corpus: list[dict], model_path: str, stages: tuple) -> dict:
+    """Monta as entradas das etapas escolhidas; os textos convertidos so sao gerados se alguma etapa os usa.
+
+    Args:
+        corpus (list[dict]): Saida de `generate_corpus`.
+        model_path (str): Nome ou caminho do modelo.
+        stages (tuple): Etapas de `STAGES` que serao executadas.
+
+    Returns:
+        dict: Entradas por nome (corpus, model_path, html_docs, pdf_docs e texts).
+    """
+    inputs = {
+        "corpus": corpus,
+        "model_path": model_path,
+        "html_docs": [document for document in corpus if document["kind"] == "html"],
+        "pdf_docs": [document for document in corpus if document["kind"] == "pdf"],
+    }
+    if any("texts" in STAGES[stage][1] for stage in stages):
+        inputs["texts"] = [extract_text(document) for document in corpus]
+    return inputs
+
+
+def run_benchmark(corpus: list[dict], model_path: str = EMBEDDING_MODEL, stages: tuple = DEFAULT_STAGES) -> dict:
+    """Mede as etapas escolhidas do pipeline sobre o corpus.
+
+    Etapas (ver `STAGES`): html (html_to_markdown em duas passadas e com analise
+    unica), conversion_cache, markdown_parallel, pdf (pre_processamento_pdf),
+    chunking (divisao por tokens contra divisao por secoes), split, encode e
+    pipeline (caminho completo com micro-batching entre documentos). As etapas
+    de `LARGE_STAGES` (html_scaling, html_streaming, pdf_normalization e
+    section_summary) geram documentos proprios de varios MB e ficam fora do padrao.
+
+    Args:
+        corpus (list[dict]): Saida de `generate_corpus`.
+        model_path (str): Nome ou caminho do modelo.
+        stages (tuple): Etapas a executar, na ordem de `STAGES`.
+
+    Returns:
+        dict: Metricas de cada etapa.
+
+    Raises:
+        ValueError: Se alguma etapa nao existir em `STAGES`.
+    """
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        msg = f"Etapas desconhecidas: {', '.join(unknown)} (disponiveis: {', '.join(STAGES)})"
+        raise ValueError(msg)
+    if {"encode", "pipeline"} & set(stages):
+        model_registry.warm_up(model_path)
+        encode_chunks(["aquecimento do modelo"], model_path=model_path, max_length=MAX_LENGTH_CHUNK_SIZE)
+
+    inputs = stage_inputs(corpus, model_path, stages)
+    results = {}
+    for stage in (stage for stage in STAGES if stage in stages):
+        measure, names = STAGES[stage]
+        logger.info(f"Etapa {stage}")
+        results.update(measure(*(inputs[name] for name in names)))
+    return results
+
+
+def compare_results(baseline: dict, current: dict, max_slowdown: float = 0.10) -> list[dict]:
+    """Compara duas execucoes e lista as metricas que pioraram mais que `max_slowdown`.
+
+    Vazao pior e queda relativa (1 - atual/anterior); latencia pior e aumento
+    relativo (atual/anterior - 1).
+
+    Args:
+        baseline (dict): Resultado de referencia (saida de `main`).
+        current (dict): Resultado a comparar.
+        max_slowdown (float): Piora relativa tolerada (0.10 = 10%).
+
+    Returns:
+        list[dict]: Regressoes com etapa, metrica, valores e piora relativa.
+    """
+    regressions = []
+    for stage, metrics in current["stages"].items():
+        reference = baseline["stages"].get(stage)
+        if reference is None:
+            continue
+        for metric in THROUGHPUT_METRICS + LATENCY_METRICS:
+            before, after = reference.get(metric, 0.0), metrics.get(metric, 0.0)
+            if not before or not after:
+                continue
+            slowdown = 1 - after / before if metric in THROUGHPUT_METRICS else after / before - 1
+            if slowdown > max_slowdown:
+                regressions.append(
+                    {"stage": stage, "metric": metric, "baseline": before, "current": after, "slowdown": slowdown}
+                )
+    return regressions
+
+
+def main() -> None:
+    """Executa o benchmark, grava o JSON e compara com uma execucao anterior."""
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de embeddings com corpus sintetico do SEI")
+    parser.add_argument("--docs", type=int, default=200, help="quantidade de documentos do corpus")
+    parser.add_argument("--seed", type=int, default=0, help="semente do corpus")
+    parser.add_argument("--model", type=str, default=EMBEDDING_MODEL, help="modelo de embedding")
+    parser.add_argument(
+        "--stages",
+        type=str,
+        default=",".join(DEFAULT_STAGES),
+        help=f"etapas separadas por virgula, ou 'all' (disponiveis: {', '.join(STAGES)})",
+    )
+    parser.add_argument("--output", type=str, help="arquivo JSON de saida")
+    parser.add_argument("--baseline", type=str, help="JSON de uma execucao anterior para comparar")
+    parser.add_argument("--current", type=str, help="JSON ja gerado para comparar com --baseline, sem executar")
+    parser.add_argument("--max_slowdown", type=float, default=0.10, help="piora relativa tolerada (0.10 = 10%%)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.current:
+        result = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        stages = tuple(STAGES) if args.stages == "all" else tuple(args.stages.split(","))
+        corpus = generate_corpus(args.docs, args.seed)
+        result = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "docs": args.docs,
+                "seed": args.seed,
+                "model": args.model,
+                "selected_stages": list(stages),
+                "backend": EMBEDDING_BACKEND,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "stages": run_benchmark(corpus, args.model, stages),
+        }
+        result["meta"]["peak_rss_mb"] = peak_rss_mb()
+        if args.output:
+            Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(json.dumps(result["stages"], indent=2))  # noqa: T201
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_results(baseline, result, args.max_slowdown)
+        for regression in regressions:
+            logger.warning(
+                f"Regressao em {regression['stage']}.{regression['metric']}: {regression['baseline']:.2f} -> "
+                f"{regression['current']:.2f} ({regression['slowdown']:.0%} pior)"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Modulo do registro compacto de chunks de um documento (texto, posicoes e token ids)."""
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class ChunkRecords:
+    """Chunks de um documento guardados em arrays, sem um objeto por chunk.
+
+    O texto de cada chunk e a fatia `doc[starts[i]:ends[i]]` e seus token ids
+    (sem tokens especiais) sao a fatia `token_ids[token_offsets[i]:token_offsets[i + 1]]`
+    de um unico array.
+
+    Args:
+        doc (str): Texto completo do documento.
+        starts (np.ndarray): Posicao inicial de cada chunk em `doc`.
+        ends (np.ndarray): Posicao final (exclusiva) de cada chunk em `doc`.
+        token_ids (np.ndarray): Token ids de todos os chunks, concatenados.
+        token_offsets (np.ndarray): Inicio dos token ids de cada chunk, com `len + 1` posicoes.
+        sections (list | None): Caminho de secao de cada chunk (ver `section_chunking`), se conhecido.
+    """
+
+    __slots__ = ("doc", "ends", "sections", "starts", "token_ids", "token_offsets")
+
+    def __init__(
+        self,
+        doc: str,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        token_ids: np.ndarray,
+        token_offsets: np.ndarray,
+        sections: list[tuple[str, ...]] | None = None,
+    ) -> None:
+        """Guarda os arrays do registro."""
+        self.doc = doc
+        self.starts = starts
+        self.ends = ends
+        self.token_ids = token_ids
+        self.token_offsets = token_offsets
+        self.sections = sections
+
+    @classmethod
+    def from_lists(
+        cls: type["ChunkRecords"],
+        doc: str,
+        positions: list[tuple[int, int]],
+        token_ids: list[Sequence[int]],
+        sections: list[tuple[str, ...]] | None = None,
+    ) -> "ChunkRecords":
+        """Monta o registro a partir das posicoes e dos token ids de cada chunk."""
+        bounds = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        lengths = np.fromiter((len(ids) for ids in token_ids), dtype=np.int64, count=len(token_ids))
+        token_offsets = np.zeros(len(token_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=token_offsets[1:])
+        flat = np.fromiter(
+            (token for ids in token_ids for token in ids), dtype=np.int32, count=int(token_offsets[-1])
+        )
+        return cls(doc, bounds[:, 0].copy(), bounds[:, 1].copy(), flat, token_offsets, sections)
+
+    def __len__(self) -> int:
+        """Quantidade de chunks."""
+        return len(self.starts)
+
+    def __getitem__(self, idx: int) -> tuple[str, np.ndarray]:
+        """Texto e token ids do chunk `idx`."""
+        return self.text(idx), self.ids(idx)
+
+    def text(self, idx: int) -> str:
+        """Texto do chunk `idx`."""
+        return self.doc[self.starts[idx]:self.ends[idx]]
+
+    def ids(self, idx: int) -> np.ndarray:
+        """Token ids do chunk `idx` (uma visao do array compartilhado)."""
+        return self.token_ids[self.token_offsets[idx]:self.token_offsets[idx + 1]]
+
+    def texts(self) -> list[str]:
+        """Textos de todos os chunks."""
+        return [self.text(idx) for idx in range(len(self))]
+
+    def positions(self) -> list[tuple[int, int]]:
+        """Posicoes (inicio, fim) de todos os chunks."""
+        return list(zip(self.starts.tolist(), self.ends.tolist(), strict=True))
+
+    def token_lengths(self) -> np.ndarray:
+        """Quantidade de tokens de cada chunk."""
+        return np.diff(self.token_offsets)
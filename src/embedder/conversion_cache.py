@@ -0,0 +1,110 @@
+"""Modulo de cache da conversao de documentos em texto (markdown do HTML, texto do PDF) enderecado pelo conteudo."""
+import hashlib
+import logging
+from collections.abc import Callable
+
+from embedder.envs import (
+    CONVERSION_CACHE_MAX_CHARS,
+    CONVERSION_CACHE_MAX_ENTRIES,
+    CONVERSION_CACHE_MAX_TOTAL_CHARS,
+    CONVERSION_CACHE_PERSISTENT,
+)
+from embedder.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def conversion_hash(raw: str, converter: str) -> str:
+    """SHA-1 do conteudo original combinado com a identidade do conversor."""
+    return hashlib.sha1(f"{converter}\0{raw}".encode(errors="surrogatepass")).hexdigest()
+
+
+class ConversionCache:
+    """Cache de conversoes com uma camada LRU em memoria e outra opcional no pgvector.
+
+    A chave inclui a identidade do conversor (nome, versao e opcoes, ex.:
+    `text_preprocess.CONVERTER_VERSION`), entao ao mudar a versao as entradas
+    antigas deixam de ser encontradas sem precisar apaga-las.
+
+    Args:
+        max_entries (int): Quantidade maxima de textos na camada em memoria.
+        persistent (bool): Se deve consultar e gravar a tabela `conversion_cache`.
+        max_chars (int): Tamanho maximo do conteudo original guardado (maiores sao so convertidos).
+        max_total_chars (int): Soma maxima dos caracteres dos textos na camada em memoria.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CONVERSION_CACHE_MAX_ENTRIES,
+        *,
+        persistent: bool = False,
+        max_chars: int = CONVERSION_CACHE_MAX_CHARS,
+        max_total_chars: int = CONVERSION_CACHE_MAX_TOTAL_CHARS,
+    ) -> None:
+        """Inicializa o cache e seus contadores."""
+        self.memory = LRUCache(max_entries, max_size=max_total_chars)
+        self.persistent = persistent
+        self.max_chars = max_chars
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zera os contadores de acertos e falhas."""
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "skipped": 0}
+
+    def _load(self, key: str) -> str | None:
+        # importado aqui para que a conversao possa ser usada sem conexao com os bancos
+        from embedder.db_connection.instances import app_db_instance
+        from embedder.db_models import ConversionCacheTable
+
+        rows = app_db_instance.get_many(ConversionCacheTable, "conversion_hash", [key])
+        return rows[0].text if rows else None
+
+    def _save(self, key: str, converter: str, text: str) -> None:
+        from embedder.db_connection.instances import app_db_instance
+        from embedder.db_models import ConversionCacheTable
+
+        app_db_instance.insert_ignore(
+            [{"conversion_hash": key, "converter": converter, "text": text}], ConversionCacheTable
+        )
+
+    def get_or_convert(self, raw: str, converter: str, convert: Callable[[str], str]) -> str:
+        """Retorna a conversao de `raw` guardada no cache ou executa `convert` e guarda o resultado.
+
+        Args:
+            raw (str): Conteudo original.
+            converter (str): Identidade do conversor.
+            convert (Callable): Conversor, chamado com `raw` quando nao ha entrada no cache.
+
+        Returns:
+            str: Texto convertido.
+        """
+        if len(raw) > self.max_chars:
+            self._counters["skipped"] += 1
+            return convert(raw)
+        key = conversion_hash(raw, converter)
+        text = self.memory.get(key)
+        if text is not None:
+            self._counters["memory_hits"] += 1
+            return text
+        if self.persistent:
+            text = self._load(key)
+            if text is not None:
+                self._counters["persistent_hits"] += 1
+                self.memory.put(key, text)
+                return text
+        self._counters["misses"] += 1
+        text = convert(raw)
+        self.memory.put(key, text)
+        if self.persistent:
+            self._save(key, converter, text)
+        return text
+
+    def stats(self) -> dict:
+        """Retorna os contadores e a taxa de acerto desde o ultimo `reset_stats`."""
+        counters = dict(self._counters)
+        total = counters["memory_hits"] + counters["persistent_hits"] + counters["misses"]
+        counters["hit_rate"] = (total - counters["misses"]) / total if total else 0.0
+        return counters
+
+
+conversion_cache = ConversionCache(persistent=CONVERSION_CACHE_PERSISTENT)
@@ -0,0 +1,224 @@
+"""Modulo do indexador em modo daemon, que consome a fila de documentos continuamente."""
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable
+
+from embedder.dags.index_embedding import filter_with_content, indexing_embeddings, query_need_index
+from embedder.dags.worker_pool import run_worker_pool
+from embedder.db_connection import instances
+from embedder.envs import (
+    EMBEDDING_MODEL,
+    INDEXING_DAEMON_BATCH_SIZE,
+    INDEXING_DAEMON_MAX_DOCUMENTS,
+    INDEXING_DAEMON_MAX_RSS_MB,
+    INDEXING_DAEMON_POLL_INTERVAL_S,
+    INDEXING_WORKERS,
+)
+from embedder.model_registry import model_registry
+from embedder.resource_usage import current_rss_mb
+
+logger = logging.getLogger(__name__)
+
+STOPPED = "stopped"
+RECYCLE = "recycle"
+EXHAUSTED = "exhausted"
+
+
+class PollingQueueSource:
+    """Fila de documentos lida da comparacao entre metadata e indexed_versions.
+
+    A consulta `query_need_index` so e refeita quando os itens da ultima leitura
+    acabam. Cada versao de documento e entregue no maximo uma vez por processo,
+    para que um documento que falhe na extracao nao seja tentado em todo ciclo.
+
+    Args:
+        check_content (bool): Se deve descartar (e marcar como sem conteudo) os
+            documentos sem conteudo antes de entrega-los.
+    """
+
+    def __init__(self, *, check_content: bool = True) -> None:
+        """Inicializa a fila vazia."""
+        self.check_content = check_content
+        self._backlog: deque = deque()
+        self._dispatched: set[tuple] = set()
+
+    @staticmethod
+    def _key(item: dict) -> tuple:
+        return (item["id_documento"], item["hash_versao"])
+
+    def fetch(self, limit: int) -> list[dict]:
+        """Retorna ate `limit` documentos a indexar (lista vazia se nao houver nenhum)."""
+        if not self._backlog:
+            self._backlog.extend(
+                dict(item) for item in query_need_index() if self._key(item) not in self._dispatched
+            )
+        batch = []
+        while self._backlog and len(batch) < limit:
+            items = [self._backlog.popleft() for _ in range(min(limit - len(batch), len(self._backlog)))]
+            self._dispatched.update(self._key(item) for item in items)
+            batch.extend(filter_with_content(items) if self.check_content else items)
+        return batch
+
+
+class IterableQueueSource:
+    """Fila de documentos a partir de um iteravel (ex.: linhas JSON da entrada padrao).
+
+    Args:
+        items (Iterable[dict]): Itens com id_documento e hash_versao.
+    """
+
+    def __init__(self, items: Iterable[dict]) -> None:
+        """Guarda o iterador dos itens."""
+        self._items = iter(items)
+        self.exhausted = False
+
+    def fetch(self, limit: int) -> list[dict]:
+        """Retorna ate `limit` itens do iteravel."""
+        batch = []
+        for item in self._items:
+            batch.append(item)
+            if len(batch) >= limit:
+                return batch
+        self.exhausted = True
+        return batch
+
+
+class IndexingDaemon:
+    """Indexador de longa duracao que mantem modelos e conexoes aquecidos.
+
+    O processo carrega o modelo uma unica vez e processa a fila em lotes de
+    `batch_size` documentos, dormindo `poll_interval_s` quando a fila esta vazia.
+    Ao receber SIGTERM ou SIGINT termina o lote em andamento e encerra sem buscar
+    novos documentos. Depois de `max_documents` documentos ou quando a memoria
+    residente passa de `max_rss_mb`, `run` retorna RECYCLE para que o processo
+    seja substituido por um novo (ver `recycle_process`).
+
+    Args:
+        source: Fila de documentos com o metodo `fetch(limit)`.
+        batch_size (int): Documentos por lote.
+        poll_interval_s (float): Espera entre consultas quando a fila esta vazia.
+        max_documents (int): Documentos processados antes de reciclar (0 desativa).
+        max_rss_mb (int): Memoria residente maxima antes de reciclar (0 desativa).
+        workers (int): Processos do pool de indexacao (1 indexa no proprio processo).
+    """
+
+    def __init__(
+        self,
+        source: PollingQueueSource | IterableQueueSource,
+        *,
+        batch_size: int = INDEXING_DAEMON_BATCH_SIZE,
+        poll_interval_s: float = INDEXING_DAEMON_POLL_INTERVAL_S,
+        max_documents: int = INDEXING_DAEMON_MAX_DOCUMENTS,
+        max_rss_mb: int = INDEXING_DAEMON_MAX_RSS_MB,
+        workers: int = INDEXING_WORKERS,
+    ) -> None:
+        """Inicializa o daemon parado."""
+        self.source = source
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.max_documents = max_documents
+        self.max_rss_mb = max_rss_mb
+        self.workers = workers
+        self.documents = 0
+        self.batches = 0
+        self._stop = threading.Event()
+
+    def request_stop(self, signum: int | None = None, _frame: object = None) -> None:
+        """Pede o encerramento apos o lote em andamento."""
+        logger.info(f"Sinal {signum} recebido, encerrando apos o lote atual")
+        self._stop.set()
+
+    def install_signal_handlers(self) -> None:
+        """Associa SIGTERM e SIGINT a `request_stop`."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+    def should_recycle(self) -> bool:
+        """Indica se o limite de documentos ou de memoria foi atingido."""
+        if self.max_documents and self.documents >= self.max_documents:
+            logger.info(f"Limite de {self.max_documents} documentos atingido")
+            return True
+        rss_mb = current_rss_mb()
+        if self.max_rss_mb and rss_mb >= self.max_rss_mb:
+            logger.info(f"Memoria residente {rss_mb:.0f}MB acima do limite de {self.max_rss_mb}MB")
+            return True
+        return False
+
+    def process_batch(self, batch: list[dict]) -> int:
+        """Indexa um lote e retorna a quantidade de documentos gravados."""
+        if self.workers > 1:
+            reports = run_worker_pool(batch, workers=self.workers)
+            return sum(report.get("documents", 0) for report in reports)
+        return indexing_embeddings(batch)["documents"]
+
+    def run(self) -> str:
+        """Consome a fila ate receber um sinal, esgotar a fonte ou atingir um limite de reciclagem.
+
+        Returns:
+            str: Motivo do encerramento (STOPPED, EXHAUSTED ou RECYCLE).
+        """
+        start = time.perf_counter()
+        model_registry.warm_up(EMBEDDING_MODEL)
+        logger.info(f"Daemon de indexacao pronto em {time.perf_counter() - start:.2f}s (pid {os.getpid()})")
+        while not self._stop.is_set():
+            batch = self.source.fetch(self.batch_size)
+            if not batch:
+                if getattr(self.source, "exhausted", False):
+                    return EXHAUSTED
+                self._stop.wait(self.poll_interval_s)
+                continue
+            batch_start = time.perf_counter()
+            indexed = self.process_batch(batch)
+            self.documents += indexed
+            self.batches += 1
+            logger.info(
+                f"Lote {self.batches}: {indexed} de {len(batch)} documentos em "
+                f"{time.perf_counter() - batch_start:.2f}s (total {self.documents})"
+            )
+            if self.should_recycle():
+                return RECYCLE
+        return STOPPED
+
+
+def recycle_process() -> None:
+    """Substitui o processo atual por uma nova instancia do daemon (mesmo pid e argumentos)."""
+    for name in ("app_db_instance", "sei_db_instance"):
+        db_instance = getattr(instances, name, None)
+        if db_instance is not None and db_instance.engine is not None:
+            db_instance.engine.dispose()
+    logging.shutdown()
+    os.execv(sys.executable, [sys.executable, "-m", "embedder.dags.index_daemon", *sys.argv[1:]])  # noqa: S606
+
+
+def main() -> None:
+    """Inicia o daemon de indexacao."""
+    parser = argparse.ArgumentParser(description="Indexador de embeddings em modo daemon")
+    parser.add_argument("--stdin", action="store_true", help="le os documentos (JSON por linha) da entrada padrao")
+    parser.add_argument("--batch_size", type=int, default=INDEXING_DAEMON_BATCH_SIZE, help="documentos por lote")
+    parser.add_argument("--workers", type=int, default=INDEXING_WORKERS, help="processos do pool de indexacao")
+    args = parser.parse_args()
+
+    source = (
+        IterableQueueSource(json.loads(line) for line in sys.stdin if line.strip())
+        if args.stdin
+        else PollingQueueSource()
+    )
+    # linhas ja lidas da entrada padrao se perderiam no exec, entao esse modo nao recicla
+    recycle_limits = {"max_documents": 0, "max_rss_mb": 0} if args.stdin else {}
+    daemon = IndexingDaemon(source, batch_size=args.batch_size, workers=args.workers, **recycle_limits)
+    daemon.install_signal_handlers()
+    reason = daemon.run()
+    logger.info(f"Daemon encerrado ({reason}) apos {daemon.documents} documentos em {daemon.batches} lotes")
+    if reason == RECYCLE:
+        recycle_process()
+
+
+if __name__ == "__main__":
+    main()
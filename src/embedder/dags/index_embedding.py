@@ -3,16 +3,40 @@
 import logging
 import argparse
 import json
+from collections.abc import Iterable
 
+from embedder.batch_scheduler import MicroBatchScheduler
+from embedder.chunk_records import ChunkRecords
 from embedder.dags.load_dag_queue import load_queue_dag_run_from_db
 from embedder.dags.trigger_dag_api_rest import trigger_dag_via_api
 from embedder.db_connection.instances import app_db_instance
-from embedder.db_models import EmbeddingsTableV2, IndexedVersionsTable, MetadataEmbeddingsTable
-from embedder.embeddings import create_embeddings, embed_long_text, split_chunks
-from embedder.envs import EMBEDDING_MODEL, MAX_LENGTH_CHUNK_SIZE
-from embedder.extract_docs.extract_content import check_exist_content, get_doc_from_id
+from embedder.db_models import EmbeddingsTableV2, IndexedVersionsTable, IndexingStatsTable, MetadataEmbeddingsTable
+from embedder.conversion_cache import conversion_cache
+from embedder.embedding_cache import embedding_cache, model_identity
+from embedder.embeddings import encode_chunks, split_chunk_records
+from embedder.envs import (
+    CONVERSION_CACHE_ENABLED,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_MODEL,
+    HTML_STREAMING,
+    INDEXING_INCREMENTAL,
+    INDEXING_WORKERS,
+    INSTRUMENTATION_PERSIST,
+    LONG_TEXT_MODE,
+    LONG_TEXT_ROUTING,
+    MAX_LENGTH_CHUNK_SIZE,
+    MICRO_BATCH_BUCKET_EDGES,
+    MICRO_BATCH_MAX_WAIT_S,
+    MICRO_BATCH_SIZE,
+    REINDEX_ON_MODEL_CHANGE,
+    SEI_ID_BATCH_SIZE,
+)
+from embedder.extract_docs.extract_content import check_exist_content_batch, get_document_from_id
 from embedder.http_exceptions import HTTPException204, HTTPException404, HTTPException409
-from embedder.text_preprocess import html_to_markdown
+from embedder.instrumentation import BatchSummary, active, attribute_time, start_document, timed
+from embedder.model_registry import model_registry
+from sqlalchemy.exc import SQLAlchemyError
 from tqdm import tqdm
 
 
@@ -35,93 +59,373 @@ def remove_obsolete_embeddings() -> int:
     return result.rowcount
 
 
-def query_need_index() -> list:
-    """Comparando a tabela de metadata e indexed_version para listar documentos a serem indexados"""
+def current_model_identity() -> str:
+    """Identidade (`model_identity`) do encoder configurado, gravada em IndexedVersionsTable.model."""
+    return model_identity(EMBEDDING_MODEL, EMBEDDING_BACKEND, LONG_TEXT_MODE, MAX_LENGTH_CHUNK_SIZE, LONG_TEXT_ROUTING)
+
+
+def query_need_index(*, reindex_model_change: bool = REINDEX_ON_MODEL_CHANGE) -> list:
+    """Comparando a tabela de metadata e indexed_version para listar documentos a serem indexados.
+
+    Com `reindex_model_change`, entram tambem os documentos com conteudo
+    gravados com outra identidade de modelo (`current_model_identity`),
+    inclusive os gravados antes da coluna `model` existir (nula).
+    """
+    model_changed = ""
+    if reindex_model_change:
+        identity = current_model_identity().replace("'", "''")
+        model_changed = f"OR (i.tem_conteudo AND (i.model IS NULL OR i.model != '{identity}'))"
     sql = f"""
             SELECT m.id_documento, m.hash_versao
             FROM {MetadataEmbeddingsTable.__tablename__} m
             LEFT JOIN {IndexedVersionsTable.__tablename__} i ON m.id_documento = i.id_documento
-            WHERE i.id_documento IS NULL OR m.hash_versao != i.hash_versao
+            WHERE i.id_documento IS NULL OR m.hash_versao != i.hash_versao {model_changed}
             """
     return app_db_instance.select(sql=sql, return_dataframe=False)
 
 
 # ruff: noqa: S608
 def send_ids_to_index(
-    trigger_batch_size: int, dag_index, use_progress_bar: bool = False, progress_update: int = 5000
+    trigger_batch_size: int,
+    dag_index,
+    use_progress_bar: bool = False,
+    progress_update: int = 5000,
+    check_batch_size: int = SEI_ID_BATCH_SIZE,
 ) -> None:
     """
     Insere os ids que precisam ser indexados ou reindexados na fila do airflow.
 
+    O conteudo e checado em lote (`check_exist_content_batch`), `check_batch_size`
+    ids por vez, e os ids com conteudo sao enviados em grupos de
+    `trigger_batch_size` conforme sao checados.
+
     Args:
         trigger_batch_size (int): Tamanho do lote de ids para trigger do indexing_embeddings.
         dag_index (str): Nome da DAG para trigger.
         use_progress_bar (bool): Habilitar ou desabilitar a barra de progresso.
         progress_update (int): Intervalo de atualização da barra de progresso.
+        check_batch_size (int): Ids checados por vez (uma consulta IN (...) ao SEI por lote).
     """
 
     index_list = query_need_index()
-    if len(index_list) > 0:
-        queued = load_queue_dag_run_from_db(dag_id=dag_index)
+    logger.info(f"Found {len(index_list)} documents to index")
+    if len(index_list) == 0:
+        return
+    queued = load_queue_dag_run_from_db(dag_id=dag_index)
+    pending = [res for res in index_list if res["id_documento"] not in queued]
 
     send_to_index = []
-    progress_bar = tqdm(index_list, disable=not use_progress_bar) if use_progress_bar else index_list
-    logger.info(f"Found {len(index_list)} documents to index")
-    for i, res in enumerate(progress_bar, start=1):
-        if res["id_documento"] in queued:
-            continue
-        try:
-            if check_exist_content(res["id_documento"]):
-                send_to_index.append(res)
-                if len(send_to_index) >= trigger_batch_size or i == len(index_list):
-                    trigger_dag_via_api(dag_id=dag_index, conf={"list_to_trigger": send_to_index})
-                    logger.info(f"Triggering indexing_embeddings with {len(send_to_index)} documents")
-                    send_to_index = []
-            else:
-                app_db_instance.add(IndexedVersionsTable(tem_conteudo=False, **res), primary_key_field="id_documento")
-        except (HTTPException204, HTTPException404, HTTPException409) as e:
-            # logger.warning(f"Documento {res['id_documento']} \n Exception: {e}")
-            app_db_instance.add(IndexedVersionsTable(tem_conteudo=False, **res), primary_key_field="id_documento")
-
-        if use_progress_bar and i % 5000 == 0:
-            progress_bar.update(5000)
-
-
-def indexing_embeddings(list_to_trigger: list) -> None:
+    progress_bar = tqdm(total=len(pending), disable=not use_progress_bar, miniters=progress_update)
+    for start in range(0, len(pending), check_batch_size):
+        batch = pending[start:start + check_batch_size]
+        send_to_index.extend(filter_with_content(batch))
+        while len(send_to_index) >= trigger_batch_size:
+            trigger_dag_via_api(dag_id=dag_index, conf={"list_to_trigger": send_to_index[:trigger_batch_size]})
+            logger.info(f"Triggering indexing_embeddings with {trigger_batch_size} documents")
+            send_to_index = send_to_index[trigger_batch_size:]
+        progress_bar.update(len(batch))
+    if send_to_index:
+        trigger_dag_via_api(dag_id=dag_index, conf={"list_to_trigger": send_to_index})
+        logger.info(f"Triggering indexing_embeddings with {len(send_to_index)} documents")
+    progress_bar.close()
+
+
+def filter_with_content(items: list[dict]) -> list[dict]:
+    """Mantem os documentos com conteudo e grava as versoes dos demais como indexadas sem conteudo.
+
+    Args:
+        items (list[dict]): Itens com id_documento e hash_versao.
+
+    Returns:
+        list[dict]: Itens com conteudo a indexar, na ordem original.
+    """
+    with_content = check_exist_content_batch([item["id_documento"] for item in items])
+    kept = []
+    for item in items:
+        if str(item["id_documento"]) in with_content:
+            kept.append(item)
+        else:
+            app_db_instance.add(IndexedVersionsTable(tem_conteudo=False, **item), primary_key_field="id_documento")
+    return kept
+
+
+def extract_document_chunks(id_documento: int) -> ChunkRecords:
+    """Extrai o documento, converte para markdown e divide em chunks.
+
+    O conteudo e normalizado uma unica vez (`ExtractedDocument.normalize`): o
+    HTML de documentos internos passa por html_to_markdown e o texto de
+    documentos externos segue como veio do pre-processamento. Com HTML_STREAMING
+    o HTML e convertido por `html_stream`, que analisa cada bloco sozinho em vez
+    de montar a arvore do documento inteiro. O HTML chega do SEI como string e
+    o markdown e montado inteiro para a divisao em chunks, entao a memoria
+    continua proporcional ao documento. O markdown e o da conversao com analise
+    unica (HTML_SINGLE_PARSE com html.parser), que difere da conversao padrao em
+    entidades como `&lt;b&gt;` no texto.
+
+    Args:
+        id_documento (int): ID do documento.
+
+    Returns:
+        ChunkRecords: Textos, posicoes (inicio, fim) e token ids de cada chunk.
+    """
+    document = get_document_from_id(id_documento).normalize(streaming=HTML_STREAMING)
+    return split_chunk_records(
+        document.content,
+        model_path=EMBEDDING_MODEL,
+        chunk_size=MAX_LENGTH_CHUNK_SIZE,
+        chunk_overlap=50,
+    )
+
+
+def stored_chunk_embeddings(id_documento: int, identity: str) -> dict:
+    """Retorna os embeddings ja gravados de um documento, indexados pelo texto do chunk.
+
+    Os embeddings so sao retornados se a versao gravada foi gerada pelo mesmo
+    modelo (`IndexedVersionsTable.model`); versoes de outro modelo, ou gravadas
+    antes da identidade ser registrada, nao sao reaproveitadas.
+
+    Args:
+        id_documento (int): ID do documento.
+        identity (str): Identidade do modelo atual.
+
+    Returns:
+        dict: Mapa emb_text -> embedding das linhas de EmbeddingsTableV2 do documento.
+    """
+    versions = app_db_instance.get_many(IndexedVersionsTable, "id_documento", [int(id_documento)])
+    if not versions or versions[0].model != identity:
+        return {}
+    rows = app_db_instance.get_many(EmbeddingsTableV2, "id_documento", [int(id_documento)])
+    return {row.emb_text: row.embedding for row in rows}
+
+
+def reusable_embeddings(doc_chunks: list[str], stored: dict) -> dict:
+    """Seleciona os chunks cujo texto nao mudou em relacao a versao gravada.
+
+    Args:
+        doc_chunks (list[str]): Chunks da nova versao do documento.
+        stored (dict): Mapa emb_text -> embedding da versao gravada.
+
+    Returns:
+        dict: Embeddings reaproveitaveis, indexados pela posicao do chunk.
+    """
+    return {idx: stored[chunk] for idx, chunk in enumerate(doc_chunks) if chunk in stored}
+
+
+@timed("cache_lookup")
+def known_embeddings(id_documento: int, doc_chunks: list[str], identity: str) -> dict:
+    """Reune os embeddings que nao precisam ser recalculados.
+
+    Primeiro os da versao gravada do documento (modo incremental), depois os do
+    cache de embeddings.
+
+    Args:
+        id_documento (int): ID do documento.
+        doc_chunks (list[str]): Chunks da nova versao do documento.
+        identity (str): Identidade do modelo, comparada com a da versao gravada e usada no cache.
+
+    Returns:
+        dict: Embeddings conhecidos, indexados pela posicao do chunk.
+    """
+    if INDEXING_INCREMENTAL:
+        known = reusable_embeddings(doc_chunks, stored_chunk_embeddings(id_documento, identity))
+    else:
+        known = {}
+    if EMBEDDING_CACHE_ENABLED and len(known) < len(doc_chunks):
+        missing = [idx for idx in range(len(doc_chunks)) if idx not in known]
+        cached = embedding_cache.lookup([doc_chunks[idx] for idx in missing], identity)
+        known.update({missing[pos]: vector for pos, vector in cached.items()})
+    return known
+
+
+@timed("persist")
+def persist_document_embeddings(
+    item: dict,
+    doc_chunks: list[str],
+    positions: list[tuple],
+    embeddings: list,
+    identity: str,
+    *,
+    incremental: bool = INDEXING_INCREMENTAL,
+) -> None:
+    """Grava os embeddings de um documento e marca a versao como indexada.
+
+    No modo incremental todas as linhas do documento sao substituidas em uma
+    unica transacao: os chunks sao renumerados, as posicoes atualizadas e os
+    chunks orfaos da versao anterior removidos.
+
+    Args:
+        item (dict): Item do list_to_trigger, com id_documento e hash_versao.
+        doc_chunks (list[str]): Chunks do documento.
+        positions (list[tuple]): Posicoes (inicio, fim) de cada chunk.
+        embeddings (list): Embeddings de cada chunk, na mesma ordem.
+        identity (str): Identidade do modelo que gerou os embeddings.
+        incremental (bool): Se deve substituir as linhas do documento em uma transacao.
+    """
+    objs = [
+        EmbeddingsTableV2(
+            chunk_id=idx,
+            id_documento=int(item["id_documento"]),
+            embedding=embedding,
+            emb_text=chunk,
+            start_position=positions[idx][0],
+            finished_position=positions[idx][1],
+        )
+        for idx, (chunk, embedding) in enumerate(zip(doc_chunks, embeddings, strict=True))
+    ]
+    version = IndexedVersionsTable(tem_conteudo=True, model=identity, **item)
+    if incremental:
+        app_db_instance.replace_all(
+            EmbeddingsTableV2,
+            {"id_documento": int(item["id_documento"])},
+            objs,
+            merge_objs=[version],
+        )
+        return
+    for obj_embedding in objs:
+        app_db_instance.add(obj_embedding, primary_key_field=False)
+    app_db_instance.add(version, primary_key_field="id_documento")
+
+
+def persist_indexing_stats(records: list[dict]) -> None:
+    """Grava os registros de instrumentacao dos documentos na tabela indexing_stats.
+
+    Args:
+        records (list[dict]): Registros retornados por `DocumentTimings.finish`.
+    """
+    app_db_instance.add_all(
+        [
+            IndexingStatsTable(
+                id_documento=int(record["id_documento"]),
+                total_s=record["total_s"],
+                chars=record.get("chars", 0),
+                chunks=record.get("chunks", 0),
+                tokens=record.get("tokens", 0),
+                stages={
+                    stage: {"seconds": seconds, "calls": record["calls"].get(stage, 0)}
+                    for stage, seconds in record["stages"].items()
+                },
+            )
+            for record in records
+        ]
+    )
+
+
+def indexing_embeddings(list_to_trigger: Iterable[dict]) -> dict:  # noqa: C901, PLR0915
     """Executa de fato a indexação dos embeddings V2.
 
+    Os chunks de todos os documentos passam por uma fila compartilhada
+    (MicroBatchScheduler) e cada documento so e gravado quando todos os seus
+    chunks foram codificados. Chunks ja presentes no cache de embeddings nao
+    sao enfileirados. No modo incremental (INDEXING_INCREMENTAL), os chunks
+    cujo texto nao mudou desde a versao gravada reaproveitam o embedding
+    existente e apenas os chunks novos ou alterados sao codificados. Os token
+    ids produzidos na divisao em chunks seguem ate o encoder, sem nova tokenizacao.
+
+    Com INSTRUMENTATION_ENABLED, cada documento tem um registro com a duracao
+    das etapas (extracao, conversao, divisao, cache, encoder e gravacao) e os
+    contadores de caracteres, chunks e tokens. O tempo de cada lote do encoder
+    e dividido entre os documentos pelos chunks de cada um no lote. O resumo do
+    lote vai para o log e, com INSTRUMENTATION_PERSIST, os registros sao gravados
+    na tabela indexing_stats.
+
     Args:
-        list_to_trigger (list): Lista de ids para trigger do indexing_embeddings, cada item tem o id_documento e hash_versao.
+        list_to_trigger (Iterable[dict]): Lista de ids para trigger do indexing_embeddings, cada item tem o
+            id_documento e hash_versao. Pode ser um gerador consumido sob demanda.
+
+    Uma falha ao gravar um documento e registrada no log e contada em "failed",
+    sem interromper os demais documentos da fila.
+
+    Returns:
+        dict: Quantidade de documentos gravados, ignorados e com falha na gravacao
+            e de chunks (e o resumo da instrumentacao, quando ligada).
     """
+    # as leituras incrementais (get_many) e o replace_all usam colunas novas das tabelas
+    app_db_instance.create_tables()
+    identity = current_model_identity()
+
+    def encode(chunks: list[tuple]) -> list:
+        texts = [text for text, _ in chunks]
+        vectors = encode_chunks(
+            texts,
+            model_path=EMBEDDING_MODEL,
+            max_length=MAX_LENGTH_CHUNK_SIZE,
+            batch_size=MICRO_BATCH_SIZE,
+            token_ids=[ids for _, ids in chunks],
+        )
+        if EMBEDDING_CACHE_ENABLED:
+            embedding_cache.store(texts, vectors, identity)
+        return vectors
+
+    summary = {"documents": 0, "skipped": 0, "failed": 0, "chunks": 0}
+    timings = {}
+    batch_stats = BatchSummary()
+
+    def on_batch_encoded(doc_keys: list, seconds: float) -> None:
+        if timings:
+            attribute_time([timings.get(doc_key) for doc_key in doc_keys], "encode", seconds)
+
+    def on_document_done(doc_key: int, payload: tuple, embeddings: list) -> None:
+        item, doc_chunks, positions = payload
+        record = timings.pop(doc_key, None)
+        with active(record):
+            try:
+                persist_document_embeddings(item, doc_chunks, positions, embeddings, identity)
+            except SQLAlchemyError:
+                logger.exception(f"Falha ao gravar os embeddings do documento {doc_key}")
+                summary["failed"] += 1
+                return
+        if record is not None:
+            batch_stats.add(record.finish())
+        summary["documents"] += 1
+        summary["chunks"] += len(doc_chunks)
+
+    embedding_cache.reset_stats()
+    conversion_cache.reset_stats()
+    scheduler = MicroBatchScheduler(
+        encode_fn=encode,
+        on_document_done=on_document_done,
+        batch_size=MICRO_BATCH_SIZE,
+        max_wait_s=MICRO_BATCH_MAX_WAIT_S,
+        bucket_edges=MICRO_BATCH_BUCKET_EDGES,
+        on_batch_encoded=on_batch_encoded,
+    )
     for item in list_to_trigger:
         id_documento = item["id_documento"]
-        try:
-            doc, _ = get_doc_from_id(id_documento)
-            conteudo_markdown = html_to_markdown(doc)
-            doc_chunks, positions = split_chunks(
-                conteudo_markdown,
-                model_path=EMBEDDING_MODEL,
-                chunk_size=MAX_LENGTH_CHUNK_SIZE,
-                chunk_overlap=50,
-                return_positions=True,
-            )
-            for idx, chunk in enumerate(doc_chunks):
-                if len(chunk) > MAX_LENGTH_CHUNK_SIZE:
-                    embedding = embed_long_text(chunk, model_path=EMBEDDING_MODEL, max_length=MAX_LENGTH_CHUNK_SIZE)
-                else:
-                    embedding = create_embeddings(text=chunk, model=EMBEDDING_MODEL)
-                obj_embedding = EmbeddingsTableV2(
-                    chunk_id=idx,
-                    id_documento=int(id_documento),
-                    embedding=embedding,
-                    emb_text=chunk,
-                    start_position=positions[idx][0],
-                    finished_position=positions[idx][1],
-                )
-                app_db_instance.add(obj_embedding, primary_key_field=False)
-            app_db_instance.add(IndexedVersionsTable(tem_conteudo=True, **item), primary_key_field="id_documento")
-        except (HTTPException204, HTTPException404, HTTPException409) as e:
-            logger.warning(f"Documento {id_documento} \n Exception: {e}")
+        record = start_document(id_documento)
+        with active(record):
+            try:
+                records = extract_document_chunks(id_documento)
+            except (HTTPException204, HTTPException404, HTTPException409) as e:
+                logger.warning(f"Documento {id_documento} \n Exception: {e}")
+                summary["skipped"] += 1
+                continue
+            doc_chunks = records.texts()
+            token_lengths = records.token_lengths()
+            known = known_embeddings(id_documento, doc_chunks, identity)
+        logger.debug(f"Documento {id_documento}: {len(known)} de {len(doc_chunks)} chunks reaproveitados")
+        if record is not None:
+            record.count(chars=len(records.doc), chunks=len(records), tokens=token_lengths.sum())
+            timings[id_documento] = record
+        scheduler.submit(
+            id_documento,
+            records,
+            payload=(item, doc_chunks, records.positions()),
+            known=known,
+            token_lengths=token_lengths,
+        )
+    scheduler.close()
+    logger.info(f"Micro-batching: {scheduler.stats()}")
+    if batch_stats.records:
+        summary["instrumentation"] = batch_stats.summary()
+        logger.info(f"Instrumentacao: {summary['instrumentation']}")
+        if INSTRUMENTATION_PERSIST:
+            persist_indexing_stats(batch_stats.records)
+    if EMBEDDING_CACHE_ENABLED:
+        logger.info(f"Cache de embeddings: {embedding_cache.stats()}")
+    if CONVERSION_CACHE_ENABLED:
+        logger.info(f"Cache de conversao: {conversion_cache.stats()}")
+    logger.info(f"Registro de modelos: {model_registry.stats()}")
+    return summary
 
 
 def main():
@@ -132,6 +436,12 @@ def main():
     list_to_trigger_str = args.list_to_trigger.replace("'", '"')
     list_to_trigger = json.loads(list_to_trigger_str)
 
+    if INDEXING_WORKERS > 1:
+        from embedder.dags.worker_pool import run_worker_pool  # evita import circular
+
+        run_worker_pool(list_to_trigger, workers=INDEXING_WORKERS)
+        return
+    model_registry.warm_up(EMBEDDING_MODEL)
     indexing_embeddings(list_to_trigger=list_to_trigger)
 
 
@@ -0,0 +1,182 @@
+"""Modulo do pool de processos de indexacao que compartilham os pesos do modelo."""
+import gc
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from collections.abc import Iterator
+
+import torch
+
+from embedder.dags.index_embedding import indexing_embeddings
+from embedder.db_connection import instances
+from embedder.envs import EMBEDDING_BACKEND, EMBEDDING_MODEL, INDEXING_THREADS_PER_WORKER
+from embedder.inference_backends import ONNX_INT8, TORCH, export_onnx, quantize_onnx
+from embedder.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+
+class WorkStealingRanges:
+    """Distribui os indices [0, n_items) entre os workers com roubo de trabalho.
+
+    Cada worker recebe uma faixa contigua de indices e a consome pela frente.
+    Quando a sua faixa acaba, ele rouba um indice do fim da faixa com mais itens
+    restantes. As faixas ficam em memoria compartilhada, entao o roubo funciona
+    entre processos.
+
+    Args:
+        ctx: Contexto do multiprocessing usado para criar a memoria compartilhada.
+        n_items (int): Quantidade de itens.
+        n_workers (int): Quantidade de workers.
+    """
+
+    def __init__(self, ctx: multiprocessing.context.BaseContext, n_items: int, n_workers: int) -> None:
+        """Divide os itens em faixas de tamanhos iguais."""
+        bounds = [n_items * worker // n_workers for worker in range(n_workers + 1)]
+        self.n_workers = n_workers
+        self._lock = ctx.Lock()
+        self._next = ctx.RawArray("q", bounds[:-1])
+        self._end = ctx.RawArray("q", bounds[1:])
+
+    def claim(self, worker: int) -> tuple[int, bool] | None:
+        """Reserva o proximo indice para `worker`.
+
+        Returns:
+            tuple | None: (indice, roubado) ou None quando nao ha mais itens.
+        """
+        with self._lock:
+            if self._next[worker] < self._end[worker]:
+                idx = self._next[worker]
+                self._next[worker] += 1
+                return idx, False
+            victim = max(range(self.n_workers), key=lambda w: self._end[w] - self._next[w])
+            if self._end[victim] > self._next[victim]:
+                self._end[victim] -= 1
+                return self._end[victim], True
+        return None
+
+
+def threads_per_worker(workers: int, threads: int = INDEXING_THREADS_PER_WORKER) -> int:
+    """Orcamento de threads intra-op do torch de cada worker (0 divide os nucleos igualmente)."""
+    return threads if threads > 0 else max(1, (os.cpu_count() or 1) // workers)
+
+
+def prepare_parent(model_path: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> None:
+    """Carrega o modelo no processo pai antes do fork.
+
+    Os pesos do torch sao carregados uma unica vez e compartilhados pelos filhos
+    em copy-on-write. Sessoes do ONNX Runtime nao sobrevivem ao fork, entao para
+    esses backends o pai apenas garante que os arquivos exportados existem e cada
+    worker abre a sua sessao. O pai nao executa inferencia, para que o pool de
+    threads do torch seja criado ja nos filhos.
+    """
+    model_registry.warm_up(model_path)
+    if backend != TORCH:
+        onnx_path = export_onnx(model_path)
+        if backend == ONNX_INT8:
+            quantize_onnx(onnx_path)
+    # tira os objetos carregados do alcance do coletor de lixo, que tocaria as paginas e forcaria a copia
+    gc.freeze()
+
+
+def _reset_connections_after_fork() -> None:
+    for name in ("app_db_instance", "sei_db_instance"):
+        db_instance = getattr(instances, name, None)
+        if db_instance is not None:
+            db_instance.dispose_after_fork()
+
+
+def _claimed_items(ranges: WorkStealingRanges, worker: int, items: list, counters: dict) -> Iterator[dict]:
+    while (claim := ranges.claim(worker)) is not None:
+        idx, stolen = claim
+        counters["claimed"] += 1
+        counters["stolen"] += stolen
+        yield items[idx]
+
+
+def _worker_main(
+    worker: int, items: list, ranges: WorkStealingRanges, threads: int, results: multiprocessing.Queue
+) -> None:
+    torch.set_num_threads(threads)
+    _reset_connections_after_fork()
+    counters = {"claimed": 0, "stolen": 0}
+    report = {"worker": worker, "pid": os.getpid(), "threads": threads, "error": None}
+    start = time.perf_counter()
+    try:
+        report.update(indexing_embeddings(_claimed_items(ranges, worker, items, counters)))
+    except Exception as e:
+        logger.exception(f"Worker {worker} falhou")
+        report["error"] = repr(e)
+    elapsed = time.perf_counter() - start
+    report.update(counters)
+    report["elapsed_s"] = elapsed
+    report["docs_per_s"] = report.get("documents", 0) / elapsed if elapsed else 0.0
+    report["chunks_per_s"] = report.get("chunks", 0) / elapsed if elapsed else 0.0
+    results.put(report)
+
+
+def run_worker_pool(list_to_trigger: list, workers: int, threads: int = INDEXING_THREADS_PER_WORKER) -> list[dict]:
+    """Indexa os documentos com `workers` processos filhos que compartilham o modelo.
+
+    O modelo e carregado no processo pai e os workers sao criados com fork, de
+    modo que os pesos sao compartilhados em copy-on-write. Cada worker recebe um
+    orcamento fixo de threads intra-op do torch, para que a soma nao ultrapasse
+    os nucleos da maquina, e executa `indexing_embeddings` sobre os documentos
+    que reserva em `WorkStealingRanges`. Os documentos passam pelas mesmas
+    funcoes do modo de processo unico, portanto os embeddings gravados sao os
+    mesmos.
+
+    Args:
+        list_to_trigger (list): Itens com id_documento e hash_versao.
+        workers (int): Quantidade de processos.
+        threads (int): Threads do torch por worker (0 divide os nucleos igualmente).
+
+    Returns:
+        list[dict]: Relatorio de cada worker (documentos, chunks, itens roubados,
+            tempo, documentos/s e chunks/s).
+    """
+    ctx = multiprocessing.get_context("fork")
+    budget = threads_per_worker(workers, threads)
+    prepare_parent()
+    ranges = WorkStealingRanges(ctx, len(list_to_trigger), workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_worker_main,
+            args=(worker, list_to_trigger, ranges, budget, results),
+            name=f"embedder-worker-{worker}",
+        )
+        for worker in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    reports = []
+    # le os resultados antes do join, senao um worker pode travar com a fila cheia
+    while len(reports) < workers:
+        try:
+            reports.append(results.get(timeout=1.0))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes) and results.empty():
+                break
+    for process in processes:
+        process.join()
+    gc.unfreeze()
+    elapsed = time.perf_counter() - start
+
+    reported = {report["worker"] for report in reports}
+    for worker, process in enumerate(processes):
+        if worker not in reported:
+            reports.append({"worker": worker, "pid": process.pid, "error": f"exitcode {process.exitcode}"})
+    reports.sort(key=lambda report: report["worker"])
+    for report in reports:
+        logger.info(f"Worker {report['worker']}: {report}")
+    documents = sum(report.get("documents", 0) for report in reports)
+    logger.info(
+        f"Pool de {workers} workers ({budget} threads cada): {documents} documentos em {elapsed:.2f}s "
+        f"({documents / elapsed if elapsed else 0.0:.2f} docs/s)"
+    )
+    return reports
@@ -4,7 +4,8 @@ import logging
 import re
 
 import pandas as pd
-from sqlalchemy import Table, create_engine, text
+from sqlalchemy import Table, create_engine, inspect, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.engine.mock import MockConnection
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import DeclarativeBase, declarative_base, sessionmaker
@@ -44,6 +45,7 @@ class DBConnector:
         self.airflow_conn = airflow_conn
         self.pool_size = pool_size
         self.max_overflow = max_overflow
+        self._checked_tables: set[str] = set()
         self.engine = self.connect()
 
     def connect(self) -> MockConnection | object | None:
@@ -83,6 +85,15 @@ class DBConnector:
             return engine
 
 
+    def dispose_after_fork(self) -> None:
+        """Descarta as conexoes herdadas do processo pai sem fecha-las.
+
+        Deve ser chamado no processo filho logo apos o fork, para que ele abra
+        suas proprias conexoes em vez de compartilhar os sockets do pai.
+        """
+        if self.engine is not None and not self.airflow_conn:
+            self.engine.dispose(close=False)
+
     def hide_pwd(self, connection_string: str) -> str:
         """Usando uma expressão regular para substituir a senha."""
         return re.sub(r"(:)([^:@]+)(@)", r"\1****\3", connection_string)
@@ -220,7 +231,7 @@ class DBConnector:
             SQLAlchemyError: Se houver um erro ao adicionar o objeto.
         """
         session = self.get_session()
-        self.base.metadata.create_all(self.engine)
+        self.create_tables()
         try:
             if overwrite:
                 primary_keys = obj.__table__.primary_key.columns.keys()
@@ -273,6 +284,77 @@ class DBConnector:
         finally:
             session.close()
 
+    def create_tables(self) -> None:
+        """Cria as tabelas da base e acrescenta as colunas novas as tabelas que ja existiam.
+
+        O create_all nao altera tabelas existentes. As colunas anulaveis de um
+        modelo que faltam na tabela sao criadas com ALTER TABLE ... ADD COLUMN IF
+        NOT EXISTS (PostgreSQL), entao bancos criados por versoes anteriores
+        recebem, por exemplo, `indexed_versions.model`. Cada tabela e verificada
+        uma vez por processo.
+
+        Raises:
+            SQLAlchemyError: Se houver um erro ao criar as tabelas ou colunas.
+        """
+        self.base.metadata.create_all(self.engine)
+        tables = [table for table in self.base.metadata.sorted_tables if table.name not in self._checked_tables]
+        if not tables:
+            return
+        inspector = inspect(self.engine)
+        preparer = self.engine.dialect.identifier_preparer
+        with self.engine.begin() as conn:
+            for table in tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name, schema=table.schema)}
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    logger.info(f"Acrescentando a coluna {column.name} a tabela {table.name}")
+                    conn.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN IF NOT EXISTS {preparer.format_column(column)} {column_type}"
+                    ))
+        self._checked_tables.update(table.name for table in tables)
+
+    def replace_all(
+        self,
+        model: Table,
+        filters: dict,
+        objs: list[Table],
+        merge_objs: list[Table] | tuple = (),
+    ) -> bool:
+        """Substitui, em uma unica transacao, as linhas de `model` que atendem `filters`.
+
+        Args:
+            model (Table): Modelo da tabela cujas linhas serao substituidas.
+            filters (dict): Filtros das linhas removidas (ex.: {"id_documento": 1}).
+            objs (List[Table]): Novos objetos de `model`.
+            merge_objs (List[Table], optional): Objetos de outras tabelas gravados
+                (insert ou update pela chave primaria) na mesma transacao.
+
+        Returns:
+            bool: True se a transacao foi confirmada.
+
+        Raises:
+            SQLAlchemyError: Se houver um erro; nada e alterado nesse caso.
+        """
+        session = self.get_session()
+        try:
+            session.query(model).filter_by(**filters).delete(synchronize_session=False)
+            session.add_all(objs)
+            for obj in merge_objs:
+                session.merge(obj)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception("Failed to replace objects in the database.")
+            msg = "Failed to replace objects in the database."
+            raise SQLAlchemyError(msg) from e
+        else:
+            return True
+        finally:
+            session.close()
+
     def get(
         self,
         model: Table,
@@ -301,6 +383,59 @@ class DBConnector:
         finally:
             session.close()
 
+    def get_many(self, model: Table, column: str, values: list) -> list:
+        """Recupera os objetos cuja coluna `column` esta em `values`.
+
+        Args:
+            model (Table): Modelo da tabela dos objetos.
+            column (str): Nome da coluna filtrada.
+            values (list): Valores aceitos (uma unica consulta IN).
+
+        Returns:
+            list: Objetos encontrados.
+
+        Raises:
+            SQLAlchemyError: Se houver um erro ao recuperar os objetos.
+        """
+        if not values:
+            return []
+        session = self.get_session()
+        try:
+            return session.query(model).filter(getattr(model, column).in_(values)).all()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception("Failed to retrieve the records.")
+            msg = "Failed to retrieve the records."
+            raise SQLAlchemyError(msg) from e
+        finally:
+            session.close()
+
+    def insert_ignore(self, rows: list[dict], table_model: DeclarativeBase) -> None:
+        """Insere varias linhas ignorando as que ja existem (ON CONFLICT DO NOTHING).
+
+        Disponivel apenas para PostgreSQL (banco pgvector).
+
+        Args:
+            rows (list[dict]): Linhas a serem inseridas.
+            table_model (DeclarativeBase): Modelo da tabela.
+
+        Raises:
+            SQLAlchemyError: Se houver um erro ao inserir as linhas.
+        """
+        if not rows:
+            return
+        session = self.get_session()
+        try:
+            session.execute(pg_insert(table_model.__table__).values(rows).on_conflict_do_nothing())
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.exception("Failed to insert rows.")
+            msg = "Failed to insert rows."
+            raise SQLAlchemyError(msg) from e
+        finally:
+            session.close()
+
     def select(self, sql: str, * , return_dataframe: bool = True) -> pd.DataFrame:
         """Executa uma consulta SQL e retorna os resultados como um DataFrame.
 
@@ -311,7 +446,7 @@ class DBConnector:
         Returns:
             pd.DataFrame: Resultados da consulta em um DataFrame.
         """
-        self.base.metadata.create_all(self.engine)
+        self.create_tables()
         res = self.execute_query(sql)
         res = [r._asdict() for r in res]
         if return_dataframe:
@@ -3,7 +3,7 @@
 from datetime import datetime
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Boolean, DateTime, Integer, String, func
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -64,6 +64,42 @@ class EmbeddingsTableV2(BasePgvector):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
 
+class ChunkEmbeddingCacheTable(BasePgvector):
+    """Modelo de dados do cache persistente de embeddings de chunks.
+
+    Attributes:
+    - chunk_hash (str): SHA-1 do texto normalizado do chunk e da identidade do modelo.
+    - model (str): Identidade do modelo que gerou o embedding.
+    - embedding (Vector): Vetor de embedding do chunk.
+    - created_at (DateTime): Data e hora de criação do registro (padrão é a data e hora atual UTC).
+    """
+
+    __tablename__ = "chunk_embedding_cache"
+
+    chunk_hash: Mapped[str] = mapped_column(String(40), primary_key=True)
+    model: Mapped[str] = mapped_column(String)
+    embedding: Mapped[Vector] = mapped_column(Vector)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+class ConversionCacheTable(BasePgvector):
+    """Modelo de dados do cache persistente de conversao de documentos em texto.
+
+    Attributes:
+    - conversion_hash (str): SHA-1 do conteudo original e da identidade do conversor.
+    - converter (str): Identidade do conversor (nome, versao e opcoes).
+    - text (str): Texto convertido.
+    - created_at (DateTime): Data e hora de criação do registro (padrão é a data e hora atual UTC).
+    """
+
+    __tablename__ = "conversion_cache"
+
+    conversion_hash: Mapped[str] = mapped_column(String(40), primary_key=True)
+    converter: Mapped[str] = mapped_column(String)
+    text: Mapped[str] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
 class MetadataEmbeddingsTable(BasePgvector):
     """Modelo de dados para metadados de embeddings de dimensão 400x50.
 
@@ -97,13 +133,46 @@ class MetadataEmbeddingsTable(BasePgvector):
 
 
 class IndexedVersionsTable(BasePgvector):
-    """Modelo de dados para as Hash Version referente a indexacao do embedding do documento."""
+    """Modelo de dados para as Hash Version referente a indexacao do embedding do documento.
+
+    O campo `model` guarda a identidade do modelo (`embedding_cache.model_identity`)
+    que gerou os embeddings gravados; e nulo para documentos sem conteudo.
+    """
 
     __tablename__ = "indexed_versions"
 
     id_documento: Mapped[int] = mapped_column(Integer, primary_key=True)
     hash_versao: Mapped[str] = mapped_column(String)
     tem_conteudo: Mapped[bool] = mapped_column(Boolean)
+    model: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.current_timestamp(), server_default=func.current_timestamp()
+    )
+
+
+class IndexingStatsTable(BasePgvector):
+    """Modelo de dados da instrumentacao da indexacao, um registro por documento indexado.
+
+    Atributos:
+        id (int): Identificador do registro.
+        id_documento (int): ID do documento indexado.
+        total_s (float): Duracao da indexacao do documento, da extracao ate a gravacao.
+        chars (int): Caracteres do texto convertido.
+        chunks (int): Quantidade de chunks.
+        tokens (int): Quantidade de tokens dos chunks.
+        stages (dict): Duracao (s) e quantidade de chamadas de cada etapa.
+        created_at (datetime): Data e hora de criação do registro.
+    """
+
+    __tablename__ = "indexing_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    id_documento: Mapped[int] = mapped_column(Integer)
+    total_s: Mapped[float] = mapped_column(Float)
+    chars: Mapped[int] = mapped_column(Integer)
+    chunks: Mapped[int] = mapped_column(Integer)
+    tokens: Mapped[int] = mapped_column(Integer)
+    stages: Mapped[JSONB] = mapped_column(JSONB)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=func.current_timestamp(), server_default=func.current_timestamp()
     )
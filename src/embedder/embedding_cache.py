@@ -0,0 +1,115 @@
+"""Modulo de cache de embeddings de chunks enderecado pelo conteudo."""
+import hashlib
+import logging
+import re
+
+import numpy as np
+
+from embedder.db_connection.instances import app_db_instance
+from embedder.db_models import ChunkEmbeddingCacheTable
+from embedder.envs import EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_PERSISTENT
+from embedder.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Normaliza o texto do chunk para a chave do cache (espacos colapsados e bordas removidas)."""
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def model_identity(model_path: str, backend: str, long_text_mode: str, max_length: int, routing: str) -> str:
+    """Identidade do encoder que compoe a chave do cache.
+
+    Inclui tudo o que altera o vetor gerado para um mesmo texto.
+    """
+    return f"{model_path}|{backend}|{long_text_mode}|{max_length}|{routing}"
+
+
+def chunk_hash(text: str, identity: str) -> str:
+    """SHA-1 do texto normalizado do chunk combinado com a identidade do modelo."""
+    return hashlib.sha1(f"{identity}\0{normalize_chunk_text(text)}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """Cache de embeddings de chunks com uma camada LRU em memoria e outra no pgvector.
+
+    Args:
+        max_entries (int): Quantidade maxima de embeddings na camada em memoria.
+        persistent (bool): Se deve consultar e gravar a tabela `chunk_embedding_cache`.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, *, persistent: bool = True) -> None:
+        """Inicializa o cache e seus contadores."""
+        self.memory = LRUCache(max_entries)
+        self.persistent = persistent
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Zera os contadores de acertos e falhas."""
+        self._counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def lookup(self, texts: list[str], identity: str) -> dict[int, np.ndarray]:
+        """Busca os embeddings ja calculados para `texts`.
+
+        Args:
+            texts (list[str]): Textos dos chunks.
+            identity (str): Identidade do modelo (ver `model_identity`).
+
+        Returns:
+            dict[int, np.ndarray]: Embeddings encontrados, indexados pela posicao em `texts`.
+        """
+        found = {}
+        missing: dict[str, list[int]] = {}
+        for idx, text in enumerate(texts):
+            key = chunk_hash(text, identity)
+            vector = self.memory.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(idx)
+            else:
+                found[idx] = vector
+        memory_hits = len(found)
+
+        if missing and self.persistent:
+            for row in app_db_instance.get_many(ChunkEmbeddingCacheTable, "chunk_hash", list(missing)):
+                vector = np.asarray(row.embedding, dtype=np.float32)
+                self.memory.put(row.chunk_hash, vector)
+                for idx in missing.pop(row.chunk_hash):
+                    found[idx] = vector
+
+        self._counters["memory_hits"] += memory_hits
+        self._counters["persistent_hits"] += len(found) - memory_hits
+        self._counters["misses"] += len(texts) - len(found)
+        return found
+
+    def store(self, texts: list[str], vectors: list[np.ndarray], identity: str) -> list[np.ndarray]:
+        """Grava os embeddings de `texts` nas duas camadas.
+
+        Args:
+            texts (list[str]): Textos dos chunks.
+            vectors (list[np.ndarray]): Embeddings na mesma ordem de `texts`.
+            identity (str): Identidade do modelo (ver `model_identity`).
+
+        Returns:
+            list[np.ndarray]: Os proprios `vectors`, para encadear com o encoder.
+        """
+        rows = {}
+        for text, vector in zip(texts, vectors, strict=True):
+            key = chunk_hash(text, identity)
+            self.memory.put(key, vector)
+            rows[key] = {"chunk_hash": key, "model": identity, "embedding": vector}
+        if self.persistent:
+            app_db_instance.insert_ignore(list(rows.values()), ChunkEmbeddingCacheTable)
+        return vectors
+
+    def stats(self) -> dict:
+        """Retorna os contadores e a taxa de acerto desde o ultimo `reset_stats`."""
+        counters = dict(self._counters)
+        total = counters["memory_hits"] + counters["persistent_hits"] + counters["misses"]
+        counters["hit_rate"] = (total - counters["misses"]) / total if total else 0.0
+        return counters
+
+
+embedding_cache = EmbeddingCache(persistent=EMBEDDING_CACHE_PERSISTENT)
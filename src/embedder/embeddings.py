@@ -1,49 +1,224 @@
 """Modulo de Embedding para RAG."""
 import logging
+from collections.abc import Iterable, Iterator, Sequence
 
 import numpy as np
 import torch
-from langchain.text_splitter import RecursiveCharacterTextSplitter as RecursiveSplitter
-from sentence_transformers import SentenceTransformer
-from transformers import AutoModel, AutoTokenizer
 
-from embedder.extract_docs.extract_content import get_doc_from_id
-from embedder.extract_docs.metadata_sei import get_doc_metadata_from_id
+from embedder.chunk_records import ChunkRecords
+from embedder.envs import (
+    CHUNK_STREAM_SEGMENT_CHARS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CHUNKS_PER_CALL,
+    LONG_TEXT_MODE,
+    LONG_TEXT_ROUTING,
+    LONG_TEXT_WINDOW_OVERLAP,
+)
 from embedder.http_exceptions import HTTPException422
-from embedder.persist_table_embeddings import persist_embeddings
+from embedder.instrumentation import timed
+from embedder.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
 SEPARATORS = ["\n\n", "\n", ".", ",", "\u200B", "\uff0c", "\u3001", "\uff0e", "\u3002", ""]
 
-def embed_long_text(text: str, model_path: str, max_length: int) -> list:
+def embed_long_text(
+        text: str,
+        model_path: str,
+        max_length: int,
+        mode: str = LONG_TEXT_MODE,
+        backend: str = EMBEDDING_BACKEND,
+        ) -> list:
     """Embebe um texto longo dividindo-o em blocos, codificando cada bloco usando modelo fornecido e calculando a media.
 
     Parâmetros:
         text (str): O texto de entrada a ser embebido.
         model_path (str): O caminho para o modelo usado para codificação.
         max_length (int): O comprimento máximo de cada bloco.
+        mode (str): "windows" (ver `embed_long_text_windows`) ou "padded" (blocos
+            de palavras completados ate max_length).
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
 
     Retorna:
         np.ndarray: A embelezamento final do texto inteiro.
     """
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModel.from_pretrained(model_path)
-    chunks = split_into_chunks(text, max_length)
+    if mode == "windows":
+        doc_embedding, _ = embed_long_text_windows(text, model_path=model_path, max_length=max_length, backend=backend)
+        return doc_embedding
+
+    return embed_padded_texts([text], model_path=model_path, max_length=max_length, backend=backend)[0]
+
+
+def embed_padded_texts(
+        texts: list[str],
+        model_path: str,
+        max_length: int,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        ) -> np.ndarray:
+    """Embebe textos longos no modo "padded", executando os blocos de todos os textos juntos.
+
+    Cada texto e dividido em blocos de `max_length` palavras (`split_into_chunks`)
+    e o seu embedding e a media dos blocos. Como cada bloco tem ao menos
+    `max_length` palavras, ele nunca recebe padding do tokenizer; no lote o padding
+    ate o maior bloco e ignorado pelo pooling mascarado, entao o resultado e o
+    mesmo de executar um bloco por vez.
+
+    Args:
+        texts (list[str]): Textos de entrada.
+        model_path (str): Nome ou caminho do modelo.
+        max_length (int): Quantidade de palavras de cada bloco.
+        batch_size (int): Quantidade de blocos por forward pass.
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
+
+    Returns:
+        np.ndarray: Matriz (len(texts), dim) na mesma ordem de `texts`.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    model = model_registry.get_backend(model_path, backend)
+    blocks, counts = [], []
+    for text in texts:
+        text_blocks = split_into_chunks(text, max_length)
+        blocks.extend(text_blocks)
+        counts.append(len(text_blocks))
+
+    block_embeddings = []
+    for start in range(0, len(blocks), batch_size):
+        inputs = tokenizer(blocks[start:start + batch_size], padding="longest", return_tensors="np")
+        last_hidden_state = model.forward(inputs["input_ids"], inputs["attention_mask"])
+        block_embeddings.append(mean_pooling(last_hidden_state, inputs["attention_mask"]))
+    block_embeddings = np.split(np.concatenate(block_embeddings), np.cumsum(counts)[:-1])
+    return np.stack([embeddings.mean(axis=0) for embeddings in block_embeddings])
+
+
+def mean_pooling(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Media dos estados ocultos considerando apenas os tokens validos da mascara de atencao.
+
+    Args:
+        last_hidden_state (np.ndarray): Matriz (batch, seq, dim).
+        attention_mask (np.ndarray): Matriz (batch, seq) com 1 nos tokens validos.
+
+    Returns:
+        np.ndarray: Matriz (batch, dim).
+    """
+    mask = np.expand_dims(attention_mask, -1).astype(last_hidden_state.dtype)
+    return (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
 
-    chunk_embeddings = []
-    for chunk in chunks:
-        inputs = tokenizer(chunk, return_tensors="pt", padding="max_length", max_length=max_length)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        chunk_embeddings.append(outputs.last_hidden_state.mean(dim=1).squeeze().numpy())
 
-    return np.mean(chunk_embeddings, axis=0)
+def add_special_tokens(tokenizer: object, input_ids: list[int]) -> list[int]:
+    """Envolve os token ids com os tokens especiais do modelo ([CLS] ... [SEP] ou <s> ... </s>).
+
+    Args:
+        tokenizer (object): Tokenizer do modelo.
+        input_ids (list[int]): Token ids sem tokens especiais.
+
+    Returns:
+        list[int]: Token ids com os tokens especiais.
+    """
+    if tokenizer.cls_token_id is not None and tokenizer.sep_token_id is not None:
+        return [tokenizer.cls_token_id, *input_ids, tokenizer.sep_token_id]
+    return tokenizer.build_inputs_with_special_tokens(input_ids)
+
+
+def token_windows(input_ids: list[int], window_size: int, overlap: int) -> list[list[int]]:
+    """Divide uma sequencia de token ids em janelas sobrepostas.
+
+    Args:
+        input_ids (list[int]): Token ids do texto, sem tokens especiais.
+        window_size (int): Quantidade maxima de tokens por janela.
+        overlap (int): Quantidade de tokens repetidos entre janelas consecutivas.
+
+    Returns:
+        list[list[int]]: Janelas de token ids (ao menos uma, mesmo para texto vazio).
+    """
+    step = max(window_size - overlap, 1)
+    windows = [input_ids[start:start + window_size] for start in range(0, max(len(input_ids) - overlap, 1), step)]
+    return windows or [[]]
+
+
+def embed_long_text_windows(
+        text: str,
+        model_path: str,
+        max_length: int,
+        overlap: int = LONG_TEXT_WINDOW_OVERLAP,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        *,
+        return_windows: bool = False,
+        ) -> tuple[np.ndarray, np.ndarray | None]:
+    """Embebe um texto longo com janelas de tokens sobrepostas e pooling mascarado.
+
+    O texto e tokenizado uma unica vez e as janelas sao montadas a partir dos
+    token ids (ver `embed_token_windows`).
+
+    Args:
+        text (str): Texto de entrada.
+        model_path (str): Nome ou caminho do modelo.
+        max_length (int): Tamanho maximo de cada janela, incluindo tokens especiais.
+        overlap (int): Tokens repetidos entre janelas consecutivas.
+        batch_size (int): Quantidade de janelas por forward pass.
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
+        return_windows (bool): Se deve retornar tambem o embedding de cada janela.
+
+    Returns:
+        tuple: Embedding do documento e, se `return_windows`, matriz (janelas, dim).
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    input_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    doc_embeddings, window_embeddings = embed_token_windows(
+        [input_ids], model_path, max_length, overlap=overlap, batch_size=batch_size, backend=backend,
+    )
+    return doc_embeddings[0], window_embeddings[0] if return_windows else None
+
+
+def embed_token_windows(
+        sequences: list[Sequence[int]],
+        model_path: str,
+        max_length: int,
+        overlap: int = LONG_TEXT_WINDOW_OVERLAP,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        ) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Embebe sequencias de token ids ja tokenizadas com janelas sobrepostas.
+
+    As janelas de todas as sequencias sao executadas juntas, com padding ate a
+    maior janela do lote, e o pooling ignora os tokens de padding. O embedding
+    de cada sequencia e a media das suas janelas.
+
+    Args:
+        sequences (list[Sequence[int]]): Token ids de cada texto, sem tokens especiais.
+        model_path (str): Nome ou caminho do modelo.
+        max_length (int): Tamanho maximo de cada janela, incluindo tokens especiais.
+        overlap (int): Tokens repetidos entre janelas consecutivas.
+        batch_size (int): Quantidade de janelas por forward pass.
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
+
+    Returns:
+        tuple: Matriz (len(sequences), dim) e a matriz (janelas, dim) de cada sequencia.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    model = model_registry.get_backend(model_path, backend)
+    window_size = max_length - tokenizer.num_special_tokens_to_add()
+    windows, counts = [], []
+    for input_ids in sequences:
+        seq_windows = token_windows(np.asarray(input_ids).tolist(), window_size, min(overlap, window_size - 1))
+        windows.extend(add_special_tokens(tokenizer, window) for window in seq_windows)
+        counts.append(len(seq_windows))
+
+    window_embeddings = []
+    for start in range(0, len(windows), batch_size):
+        inputs = tokenizer.pad({"input_ids": windows[start:start + batch_size]}, padding="longest", return_tensors="np")
+        last_hidden_state = model.forward(inputs["input_ids"], inputs["attention_mask"])
+        window_embeddings.append(mean_pooling(last_hidden_state, inputs["attention_mask"]))
+    window_embeddings = np.split(np.concatenate(window_embeddings), np.cumsum(counts)[:-1])
+    return np.stack([embeddings.mean(axis=0) for embeddings in window_embeddings]), window_embeddings
 
 
 def create_embeddings(
         text: str,
         model: str ,
+        backend: str = EMBEDDING_BACKEND,
         ) -> np.ndarray:
     """Funcao de embedding para RAG.
 
@@ -51,19 +226,216 @@ def create_embeddings(
         text (str): Texto de entrada.
         model (str): Nome do modelo usado para embeddings
             (padrão é o modelo especificado).
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
 
     Returns:
         numpy.ndarray: Embeddings gerado para o texto de entrada.
     """
     logger.debug("entrou no create_embeddings")
-    model = SentenceTransformer(model)
     if isinstance(text, str):
-        embeddings = model.encode([text])
+        embeddings = create_embeddings_batch([text], model=model, backend=backend)
         return embeddings[0]
     if isinstance(text, list):
-        return model.encode(text)
+        return create_embeddings_batch(text, model=model, backend=backend)
     raise HTTPException422
 
+
+def max_sequence_length(model: str) -> int:
+    """Retorna o tamanho maximo de sequencia do SentenceTransformer do modelo.
+
+    E o limite de truncamento de todos os backends, para que torch e ONNX
+    codifiquem os mesmos tokens.
+
+    Args:
+        model (str): Nome ou caminho do modelo.
+
+    Returns:
+        int: Quantidade maxima de tokens por sequencia, incluindo os especiais.
+    """
+    return model_registry.get_sentence_transformer(model).max_seq_length
+
+
+def create_embeddings_batch(
+        texts: list[str],
+        model: str,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        ) -> np.ndarray:
+    """Gera os embeddings de varios textos em lotes de `batch_size`.
+
+    Com o backend "torch" o SentenceTransformer e usado diretamente. Nos demais
+    backends os textos sao tokenizados com padding ate o maior texto do lote,
+    truncados em `max_sequence_length` e agregados por mean pooling
+    mascarado, como no SentenceTransformer.
+
+    Args:
+        texts (list[str]): Textos de entrada.
+        model (str): Nome do modelo usado para embeddings.
+        batch_size (int): Quantidade de textos por forward pass.
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
+
+    Returns:
+        numpy.ndarray: Matriz (len(texts), dim) na mesma ordem de `texts`.
+    """
+    logger.debug("entrou no create_embeddings_batch")
+    if backend == "torch":
+        sentence_model = model_registry.get_sentence_transformer(model)
+        return sentence_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    tokenizer = model_registry.get_tokenizer(model)
+    inference = model_registry.get_backend(model, backend)
+    max_length = max_sequence_length(model)
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[start:start + batch_size], padding="longest", truncation=True, max_length=max_length,
+            return_tensors="np",
+        )
+        last_hidden_state = inference.forward(inputs["input_ids"], inputs["attention_mask"])
+        embeddings.append(mean_pooling(last_hidden_state, inputs["attention_mask"]))
+    return np.concatenate(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+
+def encode_token_ids(
+        token_ids: list[Sequence[int]],
+        model: str,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        ) -> np.ndarray:
+    """Gera os embeddings de textos ja tokenizados, sem tokenizar de novo.
+
+    Equivale a `create_embeddings_batch` com os mesmos token ids: os tokens
+    especiais sao acrescentados, as sequencias sao truncadas no tamanho maximo
+    do modelo, ordenadas por tamanho para reduzir o padding e completadas ate a
+    maior do lote. Com o backend "torch" o SentenceTransformer recebe os tensores
+    diretamente, passando por todos os seus modulos (pooling, normalizacao).
+
+    Args:
+        token_ids (list[Sequence[int]]): Token ids de cada texto, sem tokens especiais.
+        model (str): Nome do modelo usado para embeddings.
+        batch_size (int): Quantidade de textos por forward pass.
+        backend (str): Backend de inferencia ("torch", "onnx" ou "onnx-int8").
+
+    Returns:
+        numpy.ndarray: Matriz (len(token_ids), dim) na mesma ordem de `token_ids`.
+    """
+    tokenizer = model_registry.get_tokenizer(model)
+    if backend == "torch":
+        sentence_model = model_registry.get_sentence_transformer(model)
+    else:
+        inference = model_registry.get_backend(model, backend)
+    max_tokens = max_sequence_length(model) - tokenizer.num_special_tokens_to_add()
+
+    order = np.argsort([len(ids) for ids in token_ids], kind="stable")
+    embeddings = None
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        windows = [add_special_tokens(tokenizer, np.asarray(token_ids[idx][:max_tokens]).tolist()) for idx in batch]
+        inputs = tokenizer.pad({"input_ids": windows}, padding="longest", return_tensors="np")
+        if backend == "torch":
+            features = {
+                key: torch.from_numpy(inputs[key].astype(np.int64)).to(sentence_model.device)
+                for key in ("input_ids", "attention_mask")
+            }
+            with torch.no_grad():
+                vectors = sentence_model(features)["sentence_embedding"].cpu().numpy()
+        else:
+            last_hidden_state = inference.forward(inputs["input_ids"], inputs["attention_mask"])
+            vectors = mean_pooling(last_hidden_state, inputs["attention_mask"])
+        if embeddings is None:
+            embeddings = np.empty((len(token_ids), vectors.shape[1]), dtype=vectors.dtype)
+        embeddings[batch] = vectors
+    return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+
+@timed("encode")
+def encode_chunks(
+        chunks: list[str],
+        model_path: str,
+        max_length: int,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        chunks_per_call: int = EMBEDDING_CHUNKS_PER_CALL,
+        token_ids: list[Sequence[int]] | None = None,
+        mode: str = LONG_TEXT_MODE,
+        routing: str = LONG_TEXT_ROUTING,
+        ) -> list[np.ndarray]:
+    """Gera os embeddings dos chunks de um documento em lotes.
+
+    Os chunks curtos sao codificados em lotes com `encode_token_ids`, com o
+    mesmo vetor do SentenceTransformer; os longos sao tratados como textos
+    longos, tambem em lotes, com as janelas de todos eles juntas
+    (`embed_token_windows` no modo "windows", `embed_padded_texts` no modo
+    "padded"). No roteamento "chars" um chunk e longo quando tem mais de
+    `max_length` caracteres, como na versao original chunk a chunk, entao os
+    vetores sao os mesmos ja gravados; no "tokens" apenas quando nao cabe em
+    `max_length` tokens (com os tokens especiais). Com `token_ids` (ex.: de
+    `split_chunk_records`) os chunks nao sao tokenizados de novo, exceto os longos
+    no modo "padded", que divide o texto em palavras; sem eles os chunks sao
+    tokenizados uma unica vez aqui.
+
+    Args:
+        chunks (list[str]): Chunks do documento.
+        model_path (str): Nome ou caminho do modelo.
+        max_length (int): Quantidade maxima de tokens, incluindo os especiais, de
+            um chunk codificado de uma vez.
+        batch_size (int): Quantidade de chunks (ou janelas) por forward pass.
+        chunks_per_call (int): Quantidade de chunks enviados por chamada ao modelo
+            (0 envia todos os chunks do documento de uma vez).
+        token_ids (list, optional): Token ids de cada chunk, sem tokens especiais.
+        mode (str): Tratamento dos textos longos, "windows" ou "padded".
+        routing (str): Criterio dos textos longos, "chars" ou "tokens".
+
+    Returns:
+        list[np.ndarray]: Embeddings na ordem original dos chunks.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    if token_ids is None:
+        token_ids = tokenizer(chunks, add_special_tokens=False)["input_ids"] if chunks else []
+    if routing == "tokens":
+        max_tokens = max_length - tokenizer.num_special_tokens_to_add()
+        is_long = [len(ids) > max_tokens for ids in token_ids]
+    else:
+        is_long = [len(chunk) > max_length for chunk in chunks]
+    embeddings = [None] * len(chunks)
+    short_idx = [idx for idx, long in enumerate(is_long) if not long]
+    long_idx = [idx for idx, long in enumerate(is_long) if long]
+
+    if long_idx:
+        if mode == "windows":
+            vectors, _ = embed_token_windows(
+                [token_ids[i] for i in long_idx], model_path=model_path, max_length=max_length, batch_size=batch_size
+            )
+        else:
+            vectors = embed_padded_texts(
+                [chunks[i] for i in long_idx], model_path=model_path, max_length=max_length, batch_size=batch_size
+            )
+        for idx, vector in zip(long_idx, vectors, strict=True):
+            embeddings[idx] = vector
+
+    step = chunks_per_call or len(short_idx) or 1
+    for start in range(0, len(short_idx), step):
+        group = short_idx[start:start + step]
+        vectors = encode_token_ids([token_ids[i] for i in group], model=model_path, batch_size=batch_size)
+        for idx, vector in zip(group, vectors, strict=True):
+            embeddings[idx] = vector
+    return embeddings
+
+
+def count_tokens(texts: list[str], model_path: str) -> list[int]:
+    """Conta os tokens (sem tokens especiais) de cada texto com o tokenizer do modelo.
+
+    Args:
+        texts (list[str]): Textos de entrada.
+        model_path (str): Nome ou caminho do modelo.
+
+    Returns:
+        list[int]: Quantidade de tokens de cada texto.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    encoded = tokenizer(texts, add_special_tokens=False)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
 def split_into_chunks(text: str, max_length: int) -> list:
     """Divide o texto de entrada em pedaços de um comprimento máximo especificado.
 
@@ -87,6 +459,129 @@ def split_into_chunks(text: str, max_length: int) -> list:
     return chunks
 
 
+def boundary_ranks(doc: str, offsets: list[tuple], separators: list = SEPARATORS) -> np.ndarray:
+    """Classifica cada fronteira entre tokens pelo separador que ela representa.
+
+    A fronteira `i` fica antes do token `i`. O rank e o indice do primeiro
+    separador de `separators` presente no token anterior ou no espaco entre os
+    dois tokens (menor e melhor). Fronteiras sem separador recebem
+    `len(separators)` se houver espaco entre as palavras e `len(separators) + 1`
+    se cortarem uma palavra.
+
+    Args:
+        doc (str): Texto tokenizado.
+        offsets (list[tuple]): Offsets (inicio, fim) de cada token em `doc`.
+        separators (list): Separadores em ordem de preferencia ("" e ignorado).
+
+    Returns:
+        np.ndarray: Rank de cada fronteira, com `len(offsets) + 1` posicoes.
+    """
+    separators = [sep for sep in separators if sep]
+    word_rank = len(separators)
+    ranks = np.full(len(offsets) + 1, word_rank + 1, dtype=np.int32)
+    for i in range(1, len(offsets)):
+        segment = doc[offsets[i - 1][0]:offsets[i][0]]
+        rank = next((rank for rank, sep in enumerate(separators) if sep in segment), None)
+        if rank is None:
+            rank = word_rank if offsets[i - 1][1] < offsets[i][0] else word_rank + 1
+        ranks[i] = rank
+    return ranks
+
+
+def token_chunk_bounds(ranks: np.ndarray, chunk_size: int, chunk_overlap: int) -> list[tuple[int, int]]:  # noqa: C901
+    """Divide a sequencia de tokens em faixas de ate `chunk_size` tokens.
+
+    Cada faixa termina na fronteira de melhor rank dentro do limite (a mais
+    distante, em caso de empate). A faixa seguinte comeca na fronteira de melhor
+    rank entre os ultimos `chunk_overlap` tokens (a mais proxima do inicio, em caso
+    de empate), desde que esse rank nao seja pior que o do corte: um corte entre
+    paragrafos so repete paragrafos inteiros, como no RecursiveCharacterTextSplitter.
+    Cada busca e uma busca binaria, entao o custo e linear no numero de tokens.
+
+    Args:
+        ranks (np.ndarray): Saida de `boundary_ranks`.
+        chunk_size (int): Maximo de tokens por faixa.
+        chunk_overlap (int): Maximo de tokens repetidos entre faixas seguidas.
+
+    Returns:
+        list[tuple[int, int]]: Faixas (inicio, fim) de indices de tokens.
+    """
+    if chunk_overlap >= chunk_size:
+        msg = f"chunk_overlap ({chunk_overlap}) deve ser menor que chunk_size ({chunk_size})"
+        raise ValueError(msg)
+    n_tokens = len(ranks) - 1
+    inner = ranks[1:n_tokens]
+    # fronteiras com rank <= r, para cada rank presente, em ordem crescente de rank
+    present = np.unique(inner)
+    by_rank = [np.flatnonzero(inner <= rank) + 1 for rank in present]
+
+    def best_cut(low: int, high: int) -> int:
+        for boundaries in by_rank:
+            idx = np.searchsorted(boundaries, high, side="right") - 1
+            if idx >= 0 and boundaries[idx] > low:
+                return int(boundaries[idx])
+        return high
+
+    def best_start(low: int, high: int) -> int:
+        for rank, boundaries in zip(present, by_rank, strict=True):
+            if rank > ranks[high]:
+                break
+            idx = np.searchsorted(boundaries, low, side="left")
+            if idx < len(boundaries) and boundaries[idx] < high:
+                return int(boundaries[idx])
+        return high
+
+    bounds = []
+    start, previous_end = 0, 0
+    while start < n_tokens:
+        end = n_tokens if start + chunk_size >= n_tokens else best_cut(max(start, previous_end), start + chunk_size)
+        bounds.append((start, end))
+        if end >= n_tokens:
+            break
+        previous_end = end
+        start = best_start(max(start + 1, end - chunk_overlap), end) if chunk_overlap else end
+    return bounds
+
+
+@timed("split_chunks")
+def split_token_chunks(
+            doc: str,
+            tokenizer: object,
+            chunk_size: int = 400,
+            chunk_overlap: int = 50,
+            separators: list = SEPARATORS,
+            ) -> tuple[list[tuple[int, int]], list[list[int]]]:
+    """Divide o texto em chunks tokenizando-o uma unica vez.
+
+    Usa o offset mapping do tokenizer rapido para escolher os cortes (ver
+    `boundary_ranks` e `token_chunk_bounds`) e recuperar a posicao exata de cada
+    chunk no texto, inclusive quando o mesmo trecho se repete.
+
+    Args:
+        doc (str): Texto a ser dividido.
+        tokenizer (object): Tokenizer rapido (PreTrainedTokenizerFast).
+        chunk_size (int): Maximo de tokens (sem tokens especiais) por chunk.
+        chunk_overlap (int): Maximo de tokens de sobreposicao entre chunks.
+        separators (list): Separadores em ordem de preferencia.
+
+    Returns:
+        tuple: Posicoes (inicio, fim) de cada chunk em `doc` e os token ids de
+            cada chunk (sem tokens especiais).
+    """
+    encoded = tokenizer(doc, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    input_ids, offsets = encoded["input_ids"], encoded["offset_mapping"]
+    positions, token_ids = [], []
+    for start, end in token_chunk_bounds(boundary_ranks(doc, offsets, separators), chunk_size, chunk_overlap):
+        char_start, char_end = offsets[start][0], offsets[end - 1][1]
+        text = doc[char_start:char_end]
+        char_start += len(text) - len(text.lstrip())
+        char_end -= len(text) - len(text.rstrip())
+        if char_start < char_end:
+            positions.append((char_start, char_end))
+            token_ids.append(input_ids[start:end])
+    return positions, token_ids
+
+
 def split_chunks(
             doc: str,
             model_path: str ,
@@ -95,41 +590,104 @@ def split_chunks(
             separators: list = SEPARATORS,
             *,
             return_positions: bool = False,
-            ) -> list:
+            return_token_ids: bool = False,
+            ) -> tuple:
     """Funcao para dividir o texto em chunks.
 
     Args:
         doc: Texto a ser dividido.
         model_path (str): Caminho do modelo (padrão é o modelo especificado).
-        chunk_size (int): Tamanho do chunk (padrão é 400).
-        chunk_overlap (int): Sobreposição entre chunks (padrão é 50).
+        chunk_size (int): Tamanho do chunk em tokens (padrão é 400).
+        chunk_overlap (int): Sobreposição entre chunks em tokens (padrão é 50).
         separators (list): Lista de separadores (padrão é a lista especificada)
         return_positions (bool): Se deve retornar as posicoes dos chunks (padrão é False).
+        return_token_ids (bool): Se deve retornar tambem os token ids de cada chunk.
 
     Returns:
-        list: Lista de chunks do texto.
+        tuple: Lista de chunks do texto, lista de posicoes (vazia se
+            `return_positions` for False) e, com `return_token_ids`, os token ids
+            de cada chunk.
     """
     logger.debug("entrou no split_chunks")
-    tokenizer = AutoTokenizer.from_pretrained(model_path, add_special_tokens=False)
-    text_splitter = RecursiveSplitter.from_huggingface_tokenizer(
-        tokenizer=tokenizer,
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=separators,
-    )
+    tokenizer = model_registry.get_tokenizer(model_path)
+    positions, token_ids = split_token_chunks(doc, tokenizer, chunk_size, chunk_overlap, separators)
+    chunks = [doc[start:end] for start, end in positions]
+    if not return_positions:
+        positions = []
+    if return_token_ids:
+        return chunks, positions, token_ids
+    return chunks, positions
+
+
+def split_chunk_records(
+            doc: str,
+            model_path: str,
+            chunk_size: int = 400,
+            chunk_overlap: int = 50,
+            separators: list = SEPARATORS,
+            ) -> ChunkRecords:
+    """Divide o texto em chunks e devolve o registro compacto com textos, posicoes e token ids.
 
-    chunks = text_splitter.split_text(doc)
-    positions = []
+    Args:
+        doc (str): Texto a ser dividido.
+        model_path (str): Nome ou caminho do modelo.
+        chunk_size (int): Maximo de tokens por chunk.
+        chunk_overlap (int): Maximo de tokens de sobreposicao entre chunks.
+        separators (list): Separadores em ordem de preferencia.
 
-    if return_positions:
-        for chunk in chunks:
-            start = doc.find(chunk)
-            if start != -1:
-                end = start + len(chunk)
-                positions.append((start, end))
-        return chunks, positions
+    Returns:
+        ChunkRecords: Chunks do documento.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    positions, token_ids = split_token_chunks(doc, tokenizer, chunk_size, chunk_overlap, separators)
+    return ChunkRecords.from_lists(doc, positions, token_ids)
 
-    return chunks, positions
+
+def iter_token_chunks(
+            blocks: Iterable[str],
+            tokenizer: object,
+            chunk_size: int = 400,
+            chunk_overlap: int = 50,
+            separators: list = SEPARATORS,
+            segment_chars: int = CHUNK_STREAM_SEGMENT_CHARS,
+            ) -> Iterator[tuple[tuple[int, int], str, list[int]]]:
+    """Divide em chunks um texto recebido em blocos (ex.: `html_stream.iter_markdown_blocks`).
+
+    Os blocos sao acumulados ate `segment_chars` caracteres e cada segmento e
+    dividido por `split_token_chunks`, entao so um segmento fica na memoria.
+    Os chunks nao atravessam o fim de um segmento nem se sobrepoem a ele; como
+    os segmentos terminam entre blocos, o corte coincide com uma quebra de
+    paragrafo, a fronteira preferida de `boundary_ranks`.
+
+    Args:
+        blocks (Iterable[str]): Partes do texto, em ordem.
+        tokenizer (object): Tokenizer rapido (PreTrainedTokenizerFast).
+        chunk_size (int): Maximo de tokens (sem tokens especiais) por chunk.
+        chunk_overlap (int): Maximo de tokens de sobreposicao entre chunks.
+        separators (list): Separadores em ordem de preferencia.
+        segment_chars (int): Caracteres acumulados antes de cada divisao.
+
+    Yields:
+        tuple: Posicao (inicio, fim) do chunk no texto completo, texto e token ids.
+    """
+    offset = 0
+    segment, size = [], 0
+    blocks = iter(blocks)
+    while True:
+        block = next(blocks, None)
+        if block is not None:
+            segment.append(block)
+            size += len(block)
+            if size < segment_chars:
+                continue
+        text = "".join(segment)
+        positions, token_ids = split_token_chunks(text, tokenizer, chunk_size, chunk_overlap, separators)
+        for (start, end), ids in zip(positions, token_ids, strict=True):
+            yield (offset + start, offset + end), text[start:end], ids
+        offset += len(text)
+        segment, size = [], 0
+        if block is None:
+            return
 
 
 def create_embeddings_for_docs(
@@ -151,18 +709,19 @@ def create_embeddings_for_docs(
     Returns:
         list: Lista de IDs dos embeddings criados.
     """
+    # importados aqui para que o modulo possa ser usado sem conexao com os bancos (ex.: benchmarks)
+    from embedder.extract_docs.extract_content import get_doc_from_id
+    from embedder.extract_docs.metadata_sei import get_doc_metadata_from_id
+    from embedder.persist_table_embeddings import persist_embeddings
+
     logger.debug("entrou no create_embeddings_for_docs")
     doc, _ = get_doc_from_id(id_documento)
     doc_chunks, positions = split_chunks(doc,
+                                         model_path=model,
                                          chunk_size=max_length,
                                          chunk_overlap=50,
                                          return_positions=True)
-    doc_chunks_emb = []
-    for chunk in doc_chunks:
-        if len(chunk) > max_length:
-            doc_chunks_emb.append(embed_long_text(chunk, model_path=model, max_length=max_length))
-        else:
-            doc_chunks_emb.append(create_embeddings(text=chunk, model=model))
+    doc_chunks_emb = encode_chunks(doc_chunks, model_path=model, max_length=max_length)
     doc_metadata = get_doc_metadata_from_id(id_documento=id_documento)
     ids = []
     for i, (emb_text, embedding, pos) in enumerate(
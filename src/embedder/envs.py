@@ -18,10 +18,14 @@ DB_SEI_PWD = os.getenv("DB_SEI_PWD")
 DB_SEI_DATABASE = os.getenv("DB_SEI_DATABASE")
 DATABASE_TYPE = os.getenv("DATABASE_TYPE")
 DB_SEI_SCHEMA = os.getenv("DB_SEI_SCHEMA")
+# ids por consulta IN (...) das buscas em lote no SEI; o Oracle aceita no maximo 1000 itens na lista
+SEI_ID_BATCH_SIZE = int(os.getenv("SEI_ID_BATCH_SIZE", "1000"))
+# ids por consulta id_prot:(...) ao Solr; lotes menores mantem a URL do GET abaixo do limite do servidor
+SOLR_ID_BATCH_SIZE = int(os.getenv("SOLR_ID_BATCH_SIZE", "200"))
 
 ASSISTENTE_PGVECTOR_HOST = os.getenv("ASSISTENTE_PGVECTOR_HOST")
 ASSISTENTE_PGVECTOR_USER = os.getenv("ASSISTENTE_PGVECTOR_USER")
-ASSISTENTE_PGVECTOR_PWD = quote(os.getenv("ASSISTENTE_PGVECTOR_PWD"))
+ASSISTENTE_PGVECTOR_PWD = quote(os.getenv("ASSISTENTE_PGVECTOR_PWD", ""))
 ASSISTENTE_PGVECTOR_DB = os.getenv("ASSISTENTE_PGVECTOR_DB")
 ASSISTENTE_PGVECTOR_PORT = os.getenv("ASSISTENTE_PGVECTOR_PORT","5432")
 
@@ -36,6 +40,10 @@ ANATEL_IAWS_KEY = os.getenv("ANATEL_IAWS_KEY")
 EMBEDDINGS_TABLE_NAME = os.getenv("EMBEDDINGS_TABLE_NAME", "embeddings_400_50")
 HF_HOME = os.getenv("HF_HOME", "./models")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL","sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+# torch | onnx | onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", f"{HF_HOME}/onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
 #model_path = Path(os.getenv("EMBEDDING_MODEL_PATH", "~/local_model"))
 # if not model_path.exists():
 #     from sentence_transformers import SentenceTransformer
@@ -46,6 +54,58 @@ EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL","sentence-transformers/paraphrase-
 #     EMBEDDING_MODEL = str(model_path)
 
 MAX_LENGTH_CHUNK_SIZE = int(os.getenv("MAX_LENGTH_CHUNK_SIZE", "128"))
+MODEL_REGISTRY_MAX_MODELS = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", "2"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_CHUNKS_PER_CALL = int(os.getenv("EMBEDDING_CHUNKS_PER_CALL", "0"))
+# padded (blocos de palavras, como na versao original) | windows (janelas de token ids, sem nova
+# tokenizacao); windows altera os vetores e exige reindexar (ver README)
+LONG_TEXT_MODE = os.getenv("LONG_TEXT_MODE", "padded")
+LONG_TEXT_WINDOW_OVERLAP = int(os.getenv("LONG_TEXT_WINDOW_OVERLAP", "32"))
+# chars (chunks com mais de MAX_LENGTH_CHUNK_SIZE caracteres sao textos longos, como na versao original)
+# | tokens (apenas os que nao cabem em MAX_LENGTH_CHUNK_SIZE tokens); mudar altera os vetores (ver README)
+LONG_TEXT_ROUTING = os.getenv("LONG_TEXT_ROUTING", "chars")
+# reenfileira os documentos gravados com outra identidade de modelo (IndexedVersionsTable.model)
+REINDEX_ON_MODEL_CHANGE = os.getenv("REINDEX_ON_MODEL_CHANGE", "false").lower() == "true"
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PERSISTENT = os.getenv("EMBEDDING_CACHE_PERSISTENT", "true").lower() == "true"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+# desligado por padrao; util quando o mesmo conteudo e convertido varias vezes (ex.: reindexacao)
+CONVERSION_CACHE_ENABLED = os.getenv("CONVERSION_CACHE_ENABLED", "false").lower() == "true"
+CONVERSION_CACHE_PERSISTENT = os.getenv("CONVERSION_CACHE_PERSISTENT", "false").lower() == "true"
+CONVERSION_CACHE_MAX_ENTRIES = int(os.getenv("CONVERSION_CACHE_MAX_ENTRIES", "1000"))
+# conteudos maiores nao sao guardados, para limitar a memoria da camada LRU
+CONVERSION_CACHE_MAX_CHARS = int(os.getenv("CONVERSION_CACHE_MAX_CHARS", "2000000"))
+# soma maxima dos caracteres dos textos convertidos na camada LRU
+CONVERSION_CACHE_MAX_TOTAL_CHARS = int(os.getenv("CONVERSION_CACHE_MAX_TOTAL_CHARS", "50000000"))
+# contagens de tokens (cl100k) de secoes e linhas memorizadas por `split_chunks_old`
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "65536"))
+INDEXING_INCREMENTAL = os.getenv("INDEXING_INCREMENTAL", "false").lower() == "true"
+INDEXING_WORKERS = int(os.getenv("INDEXING_WORKERS", "1"))
+# 0 divide os nucleos da maquina igualmente entre os workers
+INDEXING_THREADS_PER_WORKER = int(os.getenv("INDEXING_THREADS_PER_WORKER", "0"))
+INDEXING_DAEMON_BATCH_SIZE = int(os.getenv("INDEXING_DAEMON_BATCH_SIZE", "100"))
+INDEXING_DAEMON_POLL_INTERVAL_S = float(os.getenv("INDEXING_DAEMON_POLL_INTERVAL_S", "30"))
+# 0 desativa a reciclagem do processo por quantidade de documentos ou por memoria
+INDEXING_DAEMON_MAX_DOCUMENTS = int(os.getenv("INDEXING_DAEMON_MAX_DOCUMENTS", "50000"))
+INDEXING_DAEMON_MAX_RSS_MB = int(os.getenv("INDEXING_DAEMON_MAX_RSS_MB", "4096"))
+# html.parser | lxml | html5lib (usado apenas com HTML_SINGLE_PARSE)
+HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")
+HTML_SINGLE_PARSE = os.getenv("HTML_SINGLE_PARSE", "false").lower() == "true"
+HTML_STREAM_READ_SIZE = int(os.getenv("HTML_STREAM_READ_SIZE", "65536"))
+# converte o HTML dos documentos indexados bloco a bloco (html_stream), sem a arvore do documento inteiro;
+# o HTML e o markdown completos continuam na memoria. O markdown e o de HTML_SINGLE_PARSE com html.parser
+HTML_STREAMING = os.getenv("HTML_STREAMING", "false").lower() == "true"
+# processos de process_html_to_markdown_parallel (0 usa todos os nucleos, 1 converte em serie)
+HTML_TO_MARKDOWN_WORKERS = int(os.getenv("HTML_TO_MARKDOWN_WORKERS", "0"))
+HTML_TO_MARKDOWN_CHUNK_SIZE = int(os.getenv("HTML_TO_MARKDOWN_CHUNK_SIZE", "32"))
+HTML_TO_MARKDOWN_PARALLEL_MIN_ROWS = int(os.getenv("HTML_TO_MARKDOWN_PARALLEL_MIN_ROWS", "200"))
+# caracteres de markdown acumulados antes de cada divisao em chunks de iter_token_chunks
+CHUNK_STREAM_SEGMENT_CHARS = int(os.getenv("CHUNK_STREAM_SEGMENT_CHARS", "20000"))
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "false").lower() == "true"
+INSTRUMENTATION_PERSIST = os.getenv("INSTRUMENTATION_PERSIST", "false").lower() == "true"
+MICRO_BATCH_SIZE = int(os.getenv("MICRO_BATCH_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_S = float(os.getenv("MICRO_BATCH_MAX_WAIT_S", "2.0"))
+MICRO_BATCH_BUCKET_EDGES = tuple(int(edge) for edge in os.getenv("MICRO_BATCH_BUCKET_EDGES", "32,64,96,128").split(","))
 
 ############ airflow
 AIRFLOW_API_BASE_URL = os.getenv("AIRFLOW_API_BASE_URL","http://localhost:8080/api/v1")
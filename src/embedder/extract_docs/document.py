@@ -0,0 +1,64 @@
+"""Módulo do documento extraido, com o tipo do conteudo e o estado da normalizacao."""
+from enum import Enum
+
+from pydantic import BaseModel
+
+from embedder.envs import CONVERSION_CACHE_ENABLED
+from embedder.html_stream import html_to_markdown_stream
+from embedder.text_preprocess import html_to_markdown, pre_processamento_pdf
+
+
+class ContentKind(str, Enum):
+    """Tipo do conteudo de um documento extraido."""
+
+    HTML = "html"  # HTML do editor do SEI (documento interno)
+    MARKDOWN = "markdown"  # saida de html_to_markdown
+    PDF_TEXT = "pdf_text"  # texto extraido pelo Solr ou do PDF
+
+
+class ExtractedDocument(BaseModel):
+    """Documento extraido do SEI.
+
+    `normalize` aplica a conversao do tipo do conteudo uma unica vez:
+    html_to_markdown para HTML e pre_processamento_pdf para texto de PDF. Um
+    documento normalizado (markdown ou texto ja pre-processado) volta sem
+    alteracao, entao o texto nunca e convertido duas vezes.
+
+    Attributes:
+        id_documento (str): ID do documento.
+        content (str): Conteudo do documento.
+        kind (ContentKind): Tipo do conteudo.
+        normalized (bool): Se o conteudo ja passou pela conversao do seu tipo.
+        num_doc_formatado (str | None): Numero do documento formatado.
+    """
+
+    id_documento: str
+    content: str
+    kind: ContentKind
+    normalized: bool = False
+    num_doc_formatado: str | None = None
+
+    def normalize(
+        self, *, use_cache: bool = CONVERSION_CACHE_ENABLED, streaming: bool = False
+    ) -> "ExtractedDocument":
+        """Retorna o documento com o conteudo normalizado (o proprio documento, se ja estiver).
+
+        Args:
+            use_cache (bool): Se a conversao deve consultar o cache de conversao.
+            streaming (bool): Se o HTML deve ser convertido por `html_to_markdown_stream`
+                (mesmo markdown de `html_to_markdown_single_parse` com o html.parser). O
+                markdown e devolvido inteiro.
+
+        Returns:
+            ExtractedDocument: Documento normalizado.
+        """
+        if self.normalized:
+            return self
+        if self.kind == ContentKind.HTML:
+            convert = html_to_markdown_stream if streaming else html_to_markdown
+            markdown = convert(self.content, use_cache=use_cache)
+            return self.model_copy(update={"content": markdown, "kind": ContentKind.MARKDOWN, "normalized": True})
+        if self.kind == ContentKind.PDF_TEXT:
+            text = pre_processamento_pdf(self.content, use_cache=use_cache)
+            return self.model_copy(update={"content": text, "normalized": True})
+        return self.model_copy(update={"normalized": True})
@@ -2,6 +2,7 @@
 
 import logging
 import uuid
+from collections.abc import Iterable
 from pathlib import Path
 from xml.etree import ElementTree
 
@@ -11,7 +12,8 @@ from fastapi import HTTPException
 
 from embedder.db_connection.instances import sei_db_instance
 from embedder.db_connection.solr_handlers import SolrException, SolrRequests
-from embedder.envs import ANATEL_IAWS_KEY, ANATEL_IAWS_URL, ANATEL_SOLR_ADDRESS, ANATEL_SOLR_CORE
+from embedder.envs import ANATEL_IAWS_KEY, ANATEL_IAWS_URL, ANATEL_SOLR_ADDRESS, ANATEL_SOLR_CORE, SOLR_ID_BATCH_SIZE
+from embedder.extract_docs.type_doc_sei import id_batches
 from embedder.http_exceptions import (
     HTTPException204,
     HTTPException404,
@@ -21,7 +23,8 @@ from embedder.http_exceptions import (
     HTTPException500,
     HTTPException503,
 )
-from embedder.query_templates.solr_template import PROD_SEI_SOLR
+from embedder.instrumentation import timed
+from embedder.query_templates.solr_template import PROD_SEI_SOLR, PROD_SEI_SOLR_HAS_CONTENT
 from embedder.query_templates.sql_templates import GET_NOME_DOCUMENTO_FROM_ID
 from embedder.text_preprocess import pre_processamento_pdf
 
@@ -52,6 +55,7 @@ def raise_http_exception(exc_class: Exception, message: str) -> Exception:
     raise exc_class
 
 
+@timed("solr_fetch")
 def get_doc_ext_from_id(
     id_documento: str, pag_ini: int | None = None, pag_fim: int | None = None
 ) -> str:
@@ -371,4 +375,40 @@ def check_exist_content_doc_ext_from_id(id_documento: str) -> bool:
         return True
     if l_df == 0:
         return False
-    
\ No newline at end of file
+
+
+def check_exist_content_docs_ext_from_ids(
+        ids_documentos: Iterable[str],
+        batch_size: int = SOLR_ID_BATCH_SIZE,
+        ) -> set[str]:
+    """Versao em lote de `check_exist_content_doc_ext_from_id`, com uma consulta ao Solr por lote.
+
+    Cada consulta junta os ids com OR em `id_prot:(...)` e filtra por
+    `content:[* TO *]`, entao so voltam os ids (sem o texto nem o destaque)
+    dos documentos com conteudo.
+
+    Args:
+        ids_documentos (Iterable[str]): IDs de documentos externos.
+        batch_size (int): Ids por consulta.
+
+    Returns:
+        set[str]: Ids com conteudo.
+    """
+    with_content = set()
+    for batch in id_batches(ids_documentos, batch_size):
+        rows = len(batch)
+        while True:
+            url = PROD_SEI_SOLR_HAS_CONTENT.format(
+                ANATEL_SOLR_ADDRESS=ANATEL_SOLR_ADDRESS,
+                ANATEL_SOLR_CORE=ANATEL_SOLR_CORE,
+                ids_documentos=" ".join(batch),
+                rows=rows,
+            )
+            response = SolrRequests.select(url, nested_fields=["response"])
+            if response["numFound"] <= rows:
+                break
+            rows = response["numFound"]  # mais de um documento por id: busca de novo com todos
+        for doc in response["docs"]:
+            id_prot = doc["id_prot"]
+            with_content.update(str(value) for value in (id_prot if isinstance(id_prot, list) else [id_prot]))
+    return with_content
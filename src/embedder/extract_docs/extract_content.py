@@ -1,11 +1,23 @@
 """Módulo de extracao de documentos internos e externos."""
 
 import logging
+from collections.abc import Iterable
 
-from embedder.extract_docs.external_sei import get_doc_ext_from_id, raise_http_exception, check_exist_content_doc_ext_from_id
-from embedder.extract_docs.internal_sei import get_doc_int_from_id, check_exist_content_doc_int_from_id
-from embedder.extract_docs.type_doc_sei import get_type_doc_from_id
+from embedder.extract_docs.document import ContentKind, ExtractedDocument
+from embedder.extract_docs.external_sei import (
+    check_exist_content_doc_ext_from_id,
+    check_exist_content_docs_ext_from_ids,
+    get_doc_ext_from_id,
+    raise_http_exception,
+)
+from embedder.extract_docs.internal_sei import (
+    check_exist_content_doc_int_from_id,
+    check_exist_content_docs_int_from_ids,
+    get_document_int_from_id,
+)
+from embedder.extract_docs.type_doc_sei import get_type_doc_from_id, get_type_doc_from_ids
 from embedder.http_exceptions import HTTPException204, HTTPException406
+from embedder.instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +43,28 @@ def get_doc_from_id(
         str: O conteúdo do documento recuperado.
     """
     logger.debug("entrou no get_doc_from_id")
+    document = get_document_from_id(id_documento, pag_ini, pag_fim).normalize()
+    return (document.content, document.num_doc_formatado)
+
+
+@timed("get_doc")
+def get_document_from_id(
+        id_documento: str,
+        pag_ini: int | None = None,
+        pag_fim: int | None = None) -> ExtractedDocument:
+    """Recupera um documento interno ou externo sem normalizar o conteudo.
+
+    Documentos internos vem com o HTML (a conversao para markdown fica para
+    `ExtractedDocument.normalize`); externos vem com o texto ja pre-processado.
+
+    Args:
+        id_documento (str): O identificador único do documento.
+        pag_ini (int, optional): Número da página inicial (apenas documentos externos).
+        pag_fim (int, optional): Número da página final (apenas documentos externos).
+
+    Returns:
+        ExtractedDocument: Documento com o tipo do conteudo e o numero formatado.
+    """
     (
         internal,
         _,  # type doc
@@ -43,13 +77,22 @@ def get_doc_from_id(
             msg = "Não posso definir um intervalo de páginas para esse documento"
             raise_http_exception(HTTPException406(detail=msg), msg)
         try:
-            return (get_doc_int_from_id(id_documento), num_doc_formatado)
+            document = get_document_int_from_id(id_documento)
         except HTTPException204:
-            return (get_doc_ext_from_id(id_documento), num_doc_formatado)
-    return (get_doc_ext_from_id(
-                id_documento,
-                pag_ini,
-                pag_fim), num_doc_formatado)
+            document = external_document(id_documento)
+    else:
+        document = external_document(id_documento, pag_ini, pag_fim)
+    return document.model_copy(update={"num_doc_formatado": num_doc_formatado})
+
+
+def external_document(id_documento: str, pag_ini: int | None = None, pag_fim: int | None = None) -> ExtractedDocument:
+    """Documento externo: o texto de `get_doc_ext_from_id`, ja pre-processado."""
+    return ExtractedDocument(
+        id_documento=str(id_documento),
+        content=get_doc_ext_from_id(id_documento, pag_ini, pag_fim),
+        kind=ContentKind.PDF_TEXT,
+        normalized=True,
+    )
 
 def check_exist_content(id_documento: str) -> bool:
     """Verifica se um documento com o ID fornecido existe e possui conteúdo.
@@ -70,3 +113,29 @@ def check_exist_content(id_documento: str) -> bool:
     if internal:
         return check_exist_content_doc_int_from_id(id_documento)
     return check_exist_content_doc_ext_from_id(id_documento)
+
+
+def check_exist_content_batch(ids_documentos: Iterable[str]) -> set[str]:
+    """Versao em lote de `check_exist_content`: quais dos documentos existem e possuem conteúdo.
+
+    O tipo de todos os documentos vem de `get_type_doc_from_ids`; os internos
+    sao checados com uma consulta ao SEI por lote e os externos com uma
+    consulta ao Solr por lote. Documentos nao encontrados ou em conflito (404
+    e 409 em `check_exist_content`) ficam de fora.
+
+    Args:
+        ids_documentos (Iterable[str]): Os identificadores dos documentos.
+
+    Returns:
+        set[str]: Ids (como str) dos documentos com conteúdo.
+    """
+    types = get_type_doc_from_ids(ids_documentos)
+    internal_ids = [id_documento for id_documento, (internal, *_) in types.items() if internal]
+    external_ids = [id_documento for id_documento, (internal, *_) in types.items() if not internal]
+    with_content = check_exist_content_docs_int_from_ids(internal_ids)
+    with_content |= check_exist_content_docs_ext_from_ids(external_ids)
+    logger.info(
+        f"{len(with_content)} de {len(types)} documentos com conteudo "
+        f"({len(internal_ids)} internos, {len(external_ids)} externos)"
+    )
+    return with_content
@@ -1,16 +1,23 @@
 """Módulo de extração de documentos internos."""
 
 import logging
+from collections.abc import Iterable
 
 from embedder.db_connection.instances import sei_db_instance
+from embedder.extract_docs.document import ContentKind, ExtractedDocument
+from embedder.extract_docs.type_doc_sei import id_batches
 from embedder.http_exceptions import (
     HTTPException204,
     HTTPException404,
     HTTPException409,
 )
-from embedder.query_templates.sql_templates import CHECK_IF_HAS_CONTENT_TEMPLATE, INTERNAL_DOCS_FROM_PROCESS_TEMPLATE
-from embedder.text_preprocess import html_to_markdown
-from embedder.envs import DB_SEI_SCHEMA
+from embedder.instrumentation import timed
+from embedder.query_templates.sql_templates import (
+    CHECK_IF_HAS_CONTENT_BATCH_TEMPLATE,
+    CHECK_IF_HAS_CONTENT_TEMPLATE,
+    INTERNAL_DOCS_FROM_PROCESS_TEMPLATE,
+)
+from embedder.envs import DB_SEI_SCHEMA, SEI_ID_BATCH_SIZE
 
 
 logger = logging.getLogger(__name__)
@@ -25,6 +32,19 @@ def get_doc_int_from_id(id_documento: str) -> str:
     Returns:
         str: Retorna o conteudo do documento
     """
+    return get_document_int_from_id(id_documento).normalize().content
+
+
+@timed("sei_db_fetch")
+def get_document_int_from_id(id_documento: str) -> ExtractedDocument:
+    """Busca o HTML de um documento interno, sem converte-lo.
+
+    Args:
+        id_documento (str): ID_DOCUMENTO
+
+    Returns:
+        ExtractedDocument: Documento com o HTML (kind HTML, nao normalizado).
+    """
     sql = INTERNAL_DOCS_FROM_PROCESS_TEMPLATE.format(id_documento)
     df_docs = sei_db_instance.select(sql=sql)
     l_df = len(df_docs)
@@ -33,7 +53,9 @@ def get_doc_int_from_id(id_documento: str) -> str:
         raise HTTPException404
     if l_df == 1:
         if isinstance(df_docs["content_doc"][0], str):
-            return html_to_markdown(df_docs["content_doc"][0])
+            return ExtractedDocument(
+                id_documento=str(id_documento), content=df_docs["content_doc"][0], kind=ContentKind.HTML
+            )
         if df_docs["content_doc"][0] is None:
             logger.error(f"Documento {id_documento}: sem conteudo")
             raise HTTPException204
@@ -41,6 +63,28 @@ def get_doc_int_from_id(id_documento: str) -> str:
     logger.error(f"Documento {id_documento}: mais de um documento encontrado")
     raise HTTPException409
 
+
+def check_exist_content_docs_int_from_ids(
+        ids_documentos: Iterable[str],
+        batch_size: int = SEI_ID_BATCH_SIZE,
+        ) -> set[str]:
+    """Versao em lote de `check_exist_content_doc_int_from_id`, com uma consulta IN (...) por lote.
+
+    Args:
+        ids_documentos (Iterable[str]): IDs de documentos internos.
+        batch_size (int): Ids por consulta.
+
+    Returns:
+        set[str]: Ids com conteudo. Ids nao encontrados ou com mais de uma
+            linha (404 e 409 na versao unitaria) ficam de fora.
+    """
+    status: dict[str, list] = {}
+    for batch in id_batches(ids_documentos, batch_size):
+        sql = CHECK_IF_HAS_CONTENT_BATCH_TEMPLATE.format(",".join(batch))
+        for row in sei_db_instance.select(sql, return_dataframe=False):
+            status.setdefault(str(row["id_documento"]), []).append(row["status_content_doc"])
+    return {id_documento for id_documento, values in status.items() if values == [1]}
+
 def check_exist_content_doc_int_from_id(id_documento: str) -> str:
     """Funcao para checar se existe conteudo do documento interno.
 
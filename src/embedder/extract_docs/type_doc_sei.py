@@ -1,15 +1,28 @@
 """Módulo de extracao do tipo e extensao do documento."""
 import logging
+from collections.abc import Iterable, Iterator
 
 from embedder.db_connection.instances import sei_db_instance
+from embedder.envs import SEI_ID_BATCH_SIZE
 from embedder.http_exceptions import HTTPException404, HTTPException409
-from embedder.query_templates.sql_templates import TYPE_DOC_TEMPLATE
+from embedder.instrumentation import timed
+from embedder.query_templates.sql_templates import TYPE_DOC_BATCH_TEMPLATE, TYPE_DOC_TEMPLATE
 from embedder.text_preprocess import get_file_extension
 
 logger = logging.getLogger(__name__)
 
+# o Oracle recusa listas IN com mais de 1000 itens (ORA-01795)
+MAX_IN_LIST_SIZE = 1000
 
 
+def type_doc_from_row(row: dict) -> tuple[bool, str, str, str]:
+    """Tupla (interno, formato, num_doc, num_proc) de uma linha de `TYPE_DOC_TEMPLATE`."""
+    if row["type_doc"].lower() == "x":
+        return False, get_file_extension(row["formato_arquivo"]), str(row["num_doc"]), str(row["num_proc"])
+    return True, "html", str(row["num_doc"]), str(row["num_proc"])
+
+
+@timed("type_doc")
 def get_type_doc_from_id(id_documento: str) -> tuple[bool, str]:
     """Funcao de obtencao do tipo e extencao dos documentos.
 
@@ -21,26 +34,58 @@ def get_type_doc_from_id(id_documento: str) -> tuple[bool, str]:
     """
     logger.debug("Buscando o tipo do documento")
     sql = TYPE_DOC_TEMPLATE.format(id_documento)
-    df_types = sei_db_instance.select(sql)
+    rows = sei_db_instance.select(sql, return_dataframe=False)
 
-    l_df = len(df_types)
-    if l_df == 0:
+    if len(rows) == 0:
         raise HTTPException404
-    if l_df == 1 and isinstance(df_types["type_doc"][0], str):
-        if df_types["type_doc"][0].lower() == "x":
-            logger.debug("o documento e externo")
-            formato_arquivo = get_file_extension(df_types["formato_arquivo"][0])
-            return (
-                False,
-                formato_arquivo,
-                str(df_types["num_doc"][0]),
-                str(df_types["num_proc"][0])
-                )
-        logger.debug("o documento e interno")
-        return (
-            True,
-            "html",
-            str(df_types["num_doc"][0]),
-            str(df_types["num_proc"][0])
-            )
+    if len(rows) == 1 and isinstance(rows[0]["type_doc"], str):
+        internal, *rest = type_doc_from_row(rows[0])
+        logger.debug("o documento e interno" if internal else "o documento e externo")
+        return (internal, *rest)
     raise HTTPException409
+
+
+def id_batches(ids_documentos: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    """Ids numericos distintos em lotes de ate `batch_size` (limitado a `MAX_IN_LIST_SIZE`)."""
+    batch_size = max(1, min(batch_size, MAX_IN_LIST_SIZE))
+    ids = list(dict.fromkeys(str(id_documento).strip() for id_documento in ids_documentos))
+    invalid = [id_documento for id_documento in ids if not id_documento.isdigit()]
+    if invalid:
+        logger.warning(f"{len(invalid)} ids nao numericos ignorados na busca em lote: {invalid[:10]}")
+    ids = [id_documento for id_documento in ids if id_documento.isdigit()]
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def get_type_doc_from_ids(
+        ids_documentos: Iterable[str],
+        batch_size: int = SEI_ID_BATCH_SIZE,
+        ) -> dict[str, tuple[bool, str, str, str]]:
+    """Versao em lote de `get_type_doc_from_id`, com uma consulta IN (...) por lote de ids.
+
+    A consulta e a mesma de `get_type_doc_from_id`, com o id na saida, e vale
+    para MySQL, Oracle e MSSQL. Ids nao encontrados, com mais de uma linha ou
+    sem tipo (404 e 409 em `get_type_doc_from_id`) ficam fora do resultado,
+    assim como ids nao numericos, que nao entram no SQL.
+
+    Args:
+        ids_documentos (Iterable[str]): IDs dos documentos.
+        batch_size (int): Ids por consulta (no maximo `MAX_IN_LIST_SIZE`).
+
+    Returns:
+        dict: Tupla (interno, formato, num_doc, num_proc) de cada id encontrado.
+    """
+    types = {}
+    conflicts = set()
+    for batch in id_batches(ids_documentos, batch_size):
+        rows = sei_db_instance.select(TYPE_DOC_BATCH_TEMPLATE.format(",".join(batch)), return_dataframe=False)
+        for row in rows:
+            id_documento = str(row["id_documento"])
+            if id_documento in types or not isinstance(row["type_doc"], str):
+                conflicts.add(id_documento)
+            else:
+                types[id_documento] = type_doc_from_row(row)
+    for id_documento in conflicts:
+        types.pop(id_documento, None)
+    logger.debug(f"Tipo de {len(types)} documentos obtido em lote ({len(conflicts)} com conflito)")
+    return types
@@ -0,0 +1,211 @@
+"""Modulo de conversao de HTML em markdown por streaming, com memoria limitada pelo tamanho dos blocos.
+
+O HTML e lido em pedacos por um parser de eventos (`html.parser.HTMLParser`),
+sem montar a arvore do documento. Cada filho do <body> (paragrafo, tabela,
+lista, ...) e guardado ate fechar, analisado sozinho com o BeautifulSoup e
+convertido por `element_to_markdown`, com os contadores da numeracao mantidos
+entre os blocos. O resultado e o mesmo de `html_to_markdown_single_parse` com
+o `html.parser`, exceto em documentos sem <body>, em que os blocos de nivel
+mais alto sao convertidos em vez de apenas extrair o texto.
+
+A memoria so fica limitada pelos blocos quando a entrada e um arquivo ou um
+iteravel e os blocos sao consumidos sem serem juntados, como em
+`embeddings.iter_token_chunks`. `html_to_markdown_stream`, usado na indexacao,
+devolve o markdown inteiro e evita apenas a arvore do documento.
+"""
+import logging
+from collections.abc import Iterable, Iterator
+from html.parser import HTMLParser
+from typing import TextIO
+
+from bs4 import BeautifulSoup
+
+from embedder.conversion_cache import conversion_cache
+from embedder.envs import CONVERSION_CACHE_ENABLED, HTML_STREAM_READ_SIZE
+from embedder.instrumentation import timed
+from embedder.text_preprocess import CONVERTER_VERSION, element_to_markdown
+
+logger = logging.getLogger(__name__)
+
+# Tags que `remove_specific_elements` remove mantendo o conteudo
+UNWRAPPED_TAGS = frozenset({"span", "div", "main", "section", "blockquote", "center", "nav"})
+# Tags que apenas envolvem o corpo
+TRANSPARENT_TAGS = frozenset({"html", "body"})
+VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+)
+# Entidades trocadas por `replace_html_special_characters`
+ENTITY_REPLACEMENTS = {"nbsp": " ", "shy": ""}
+CHARREF_REPLACEMENTS = {"8239": " ", "8203": "", "64257": "fi"}
+
+
+def is_hidden(attrs: list[tuple[str, str | None]]) -> bool:
+    """Indica se a tag tem 'display: none' no estilo, como em `remove_specific_elements`."""
+    return any(name == "style" and value and "display: none" in value for name, value in attrs)
+
+
+class MarkdownBlockParser(HTMLParser):
+    """Parser de eventos que converte cada bloco do corpo do documento em markdown.
+
+    Os blocos prontos ficam em `blocks` ate serem consumidos. Alem do bloco em
+    andamento, o parser guarda so as tags abertas e o trecho ainda nao
+    analisado do ultimo pedaco recebido.
+    """
+
+    def __init__(self) -> None:
+        """Inicializa o parser fora de qualquer bloco."""
+        super().__init__(convert_charrefs=False)
+        self.blocks: list[str] = []
+        self.counters = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        self._fragment: list[str] = []
+        self._open: list[str] = []  # tags abertas do bloco em andamento
+        self._skipped: list[str] = []  # tags abertas do trecho descartado (head, display: none)
+        self._finished = False  # depois do </body>
+
+    def _write(self, text: str) -> None:
+        if self._open:
+            self._fragment.append(text)
+
+    def _close_block(self) -> None:
+        fragment, self._fragment = "".join(self._fragment), []
+        element = next(iter(BeautifulSoup(fragment, "html.parser").contents), None)
+        if element is None:
+            return
+        markdown, self.counters = element_to_markdown(element, self.counters, single_parse=True)
+        if markdown:
+            self.blocks.append(markdown)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Abre um bloco, uma tag dentro do bloco ou um trecho descartado."""
+        if self._skipped:
+            if tag not in VOID_TAGS:
+                self._skipped.append(tag)
+            return
+        if self._finished or tag in TRANSPARENT_TAGS:
+            return
+        if tag == "head" or is_hidden(attrs):
+            if tag not in VOID_TAGS:
+                self._skipped.append(tag)
+            return
+        if tag in UNWRAPPED_TAGS:
+            return
+        if not self._open:
+            self._open.append(tag)
+            self._fragment.append(self.get_starttag_text())
+            if tag in VOID_TAGS:
+                self._open.clear()
+                self._close_block()
+            return
+        self._fragment.append(self.get_starttag_text())
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Tag vazia (<br/>): tratada como uma tag sem conteudo."""
+        if tag in VOID_TAGS:
+            self.handle_starttag(tag, attrs)
+            return
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Fecha a tag e, se for a do bloco, converte o bloco."""
+        if self._skipped:
+            if tag in self._skipped:
+                while self._skipped.pop() != tag:
+                    pass
+            return
+        if tag == "body":
+            self._finished = True
+        if tag not in self._open:
+            return
+        self._fragment.append(f"</{tag}>")
+        while self._open.pop() != tag:
+            pass
+        if not self._open:
+            self._close_block()
+
+    def handle_data(self, data: str) -> None:
+        """Texto: guardado so dentro de um bloco (textos soltos no corpo sao ignorados)."""
+        if not self._skipped:
+            self._write(data)
+
+    def handle_entityref(self, name: str) -> None:
+        """Entidade nomeada, com as trocas de `replace_html_special_characters`."""
+        if not self._skipped:
+            self._write(ENTITY_REPLACEMENTS.get(name, f"&{name};"))
+
+    def handle_charref(self, name: str) -> None:
+        """Referencia numerica, com as trocas de `replace_html_special_characters`."""
+        if not self._skipped:
+            self._write(CHARREF_REPLACEMENTS.get(name, f"&#{name};"))
+
+    def close(self) -> None:
+        """Processa o restante e converte o bloco que ficou aberto (tags sem fechamento)."""
+        super().close()
+        if self._open:
+            self._open.clear()
+            self._close_block()
+
+
+def read_pieces(source: str | TextIO | Iterable[str], read_size: int) -> Iterator[str]:
+    """Pedacos de texto de uma string, de um arquivo aberto ou de um iteravel de strings."""
+    if isinstance(source, str):
+        for start in range(0, len(source), read_size):
+            yield source[start:start + read_size]
+    elif hasattr(source, "read"):
+        while piece := source.read(read_size):
+            yield piece
+    else:
+        yield from source
+
+
+def iter_markdown_blocks(source: str | TextIO | Iterable[str], read_size: int = HTML_STREAM_READ_SIZE) -> Iterator[str]:
+    """Converte o HTML em markdown bloco a bloco, lendo a entrada em pedacos.
+
+    Juntos, os blocos formam o markdown do documento. A memoria usada depende
+    do tamanho do maior bloco e de `read_size`, nao do tamanho do documento,
+    desde que a entrada seja um arquivo ou um iteravel (uma string ja esta
+    inteira na memoria).
+
+    Args:
+        source: HTML como string, arquivo aberto em modo texto ou iteravel de pedacos.
+        read_size (int): Caracteres lidos por vez de uma string ou arquivo.
+
+    Yields:
+        str: Markdown de cada bloco, na ordem do documento.
+    """
+    parser = MarkdownBlockParser()
+    for piece in read_pieces(source, read_size):
+        parser.feed(piece)
+        yield from parser.blocks
+        parser.blocks.clear()
+    parser.close()
+    yield from parser.blocks
+
+
+@timed("html_to_markdown")
+def html_to_markdown_stream(
+        source: str | TextIO | Iterable[str],
+        read_size: int = HTML_STREAM_READ_SIZE,
+        *,
+        use_cache: bool = CONVERSION_CACHE_ENABLED,
+        ) -> str:
+    """Markdown do documento inteiro a partir de `iter_markdown_blocks`.
+
+    Args:
+        source: HTML como string, arquivo aberto em modo texto ou iteravel de pedacos.
+        read_size (int): Caracteres lidos por vez de uma string ou arquivo.
+        use_cache (bool): Se um HTML em string deve consultar o cache de conversao
+            (ver `conversion_cache`).
+
+    Returns:
+        str: Markdown do documento.
+    """
+    if use_cache and isinstance(source, str):
+        return conversion_cache.get_or_convert(
+            source,
+            f"html_to_markdown_stream|{CONVERTER_VERSION}",
+            lambda raw: "".join(iter_markdown_blocks(raw, read_size)),
+        )
+    return "".join(iter_markdown_blocks(source, read_size))
@@ -0,0 +1,221 @@
+"""Modulo de backends de inferencia (PyTorch e ONNX Runtime) do modelo de embedding."""
+import argparse
+import inspect
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from embedder.envs import EMBEDDING_MODEL, ONNX_EXPORT_DIR, ONNX_INTRA_OP_THREADS
+from embedder.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+BACKENDS = (TORCH, ONNX, ONNX_INT8)
+
+
+class TorchBackend:
+    """Executa o AutoModel do registro em PyTorch (modo eager).
+
+    Args:
+        model_path (str): Nome ou caminho do modelo.
+    """
+
+    name = TORCH
+
+    def __init__(self, model_path: str) -> None:
+        """Inicializa o backend com o modelo compartilhado do registro."""
+        self.model_path = model_path
+        self.model = model_registry.get_auto_model(model_path)
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Retorna o last_hidden_state (batch, seq, dim) para o lote."""
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.from_numpy(np.asarray(input_ids, dtype=np.int64)),
+                attention_mask=torch.from_numpy(np.asarray(attention_mask, dtype=np.int64)),
+            )
+        return outputs.last_hidden_state.numpy()
+
+
+class OnnxBackend:
+    """Executa o modelo exportado para ONNX com ONNX Runtime na CPU.
+
+    O modelo e exportado uma unica vez para `export_dir` e reaproveitado nas
+    execucoes seguintes. Com `quantize=True` e usada a versao com quantizacao
+    dinamica int8 dos pesos.
+
+    Args:
+        model_path (str): Nome ou caminho do modelo.
+        quantize (bool): Se deve usar o modelo quantizado em int8.
+        export_dir (str): Diretorio dos modelos exportados.
+        intra_op_threads (int): Threads intra-op do ONNX Runtime (0 usa o mesmo
+            numero de threads do torch, que respeita o orcamento de cada worker).
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        *,
+        quantize: bool = False,
+        export_dir: str = ONNX_EXPORT_DIR,
+        intra_op_threads: int = ONNX_INTRA_OP_THREADS,
+    ) -> None:
+        """Exporta o modelo, se necessario, e abre a sessao do ONNX Runtime."""
+        import onnxruntime as ort  # dependencia opcional
+
+        self.model_path = model_path
+        self.name = ONNX_INT8 if quantize else ONNX
+        onnx_path = export_onnx(model_path, export_dir)
+        if quantize:
+            onnx_path = quantize_onnx(onnx_path)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Retorna o last_hidden_state (batch, seq, dim) para o lote."""
+        feeds = {
+            "input_ids": np.asarray(input_ids, dtype=np.int64),
+            "attention_mask": np.asarray(attention_mask, dtype=np.int64),
+        }
+        return self.session.run(["last_hidden_state"], {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+
+def export_onnx(model_path: str, export_dir: str = ONNX_EXPORT_DIR) -> Path:
+    """Exporta o AutoModel para ONNX com eixos de batch e sequencia dinamicos.
+
+    Args:
+        model_path (str): Nome ou caminho do modelo.
+        export_dir (str): Diretorio de destino.
+
+    Returns:
+        Path: Caminho do arquivo .onnx (reaproveitado se ja existir).
+    """
+    onnx_path = Path(export_dir) / f"{model_path.strip('/').replace('/', '__')}.onnx"
+    if onnx_path.exists():
+        return onnx_path
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    tokenizer = model_registry.get_tokenizer(model_path)
+    model = model_registry.get_auto_model(model_path)
+    sample = tokenizer(["exportacao do modelo"], return_tensors="pt")
+    # versoes recentes do torch usam o exportador dynamo por padrao, que depende do onnxscript
+    legacy_exporter = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    logger.info(f"Exportando {model_path} para {onnx_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(onnx_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+            **legacy_exporter,
+        )
+    return onnx_path
+
+
+def quantize_onnx(onnx_path: Path) -> Path:
+    """Gera (uma unica vez) a versao com quantizacao dinamica int8 do modelo ONNX.
+
+    Args:
+        onnx_path (Path): Caminho do modelo ONNX em float32.
+
+    Returns:
+        Path: Caminho do modelo quantizado.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # dependencia opcional
+
+    quantized_path = onnx_path.with_name(f"{onnx_path.stem}.int8.onnx")
+    if not quantized_path.exists():
+        logger.info(f"Quantizando {onnx_path} para {quantized_path}")
+        quantize_dynamic(str(onnx_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def load_backend(model_path: str, backend: str = TORCH) -> TorchBackend | OnnxBackend:
+    """Instancia o backend de inferencia pelo nome.
+
+    Args:
+        model_path (str): Nome ou caminho do modelo.
+        backend (str): "torch", "onnx" ou "onnx-int8".
+
+    Returns:
+        TorchBackend | OnnxBackend: Backend carregado.
+    """
+    if backend == TORCH:
+        return TorchBackend(model_path)
+    if backend in (ONNX, ONNX_INT8):
+        return OnnxBackend(model_path, quantize=backend == ONNX_INT8)
+    msg = f"Backend de inferencia desconhecido: {backend}. Opcoes: {BACKENDS}"
+    raise ValueError(msg)
+
+
+def compare_backends(
+    texts: list[str],
+    model_path: str = EMBEDDING_MODEL,
+    backends: tuple = BACKENDS,
+    batch_size: int = 32,
+) -> dict:
+    """Compara os backends com o PyTorch em similaridade de cosseno e throughput.
+
+    Args:
+        texts (list[str]): Corpus de amostra.
+        model_path (str): Nome ou caminho do modelo.
+        backends (tuple): Backends avaliados.
+        batch_size (int): Tamanho do lote.
+
+    Returns:
+        dict: Para cada backend, cosseno minimo e medio contra o PyTorch, textos/s
+            e speedup em relacao ao PyTorch.
+    """
+    from embedder.embeddings import create_embeddings_batch  # embeddings importa as conexoes de BD
+
+    results = {}
+    reference = None
+    for backend in (TORCH, *[b for b in backends if b != TORCH]):
+        create_embeddings_batch(texts[:batch_size], model_path, batch_size=batch_size, backend=backend)  # aquecimento
+        start = time.perf_counter()
+        embeddings = create_embeddings_batch(texts, model_path, batch_size=batch_size, backend=backend)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = embeddings
+        cosine = np.sum(reference * embeddings, axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(embeddings, axis=1)
+        )
+        results[backend] = {
+            "cosine_min": float(cosine.min()),
+            "cosine_mean": float(cosine.mean()),
+            "texts_per_s": len(texts) / elapsed,
+        }
+    for result in results.values():
+        result["speedup"] = result["texts_per_s"] / results[TORCH]["texts_per_s"]
+    return results
+
+
+def main() -> None:
+    """Exporta o modelo e compara os backends em um corpus de amostra (um texto por linha)."""
+    parser = argparse.ArgumentParser(description="Paridade e throughput dos backends de inferencia")
+    parser.add_argument("--corpus", type=str, required=True, help="arquivo texto com um documento por linha")
+    parser.add_argument("--model", type=str, default=EMBEDDING_MODEL, help="modelo de embedding")
+    parser.add_argument("--batch_size", type=int, default=32, help="tamanho do lote")
+    args = parser.parse_args()
+    with Path(args.corpus).open(encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    print(json.dumps(compare_backends(texts, args.model, batch_size=args.batch_size), indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
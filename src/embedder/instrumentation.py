@@ -0,0 +1,200 @@
+"""Modulo de instrumentacao do tempo de cada etapa da indexacao de um documento.
+
+As etapas sao medidas por `timed` (decorador) ou `Span` (bloco `with`) e
+acumuladas no registro do documento ativo, guardado em uma ContextVar. Sem
+registro ativo (instrumentacao desligada ou fora da indexacao), o custo de
+uma etapa e uma leitura da ContextVar. As duracoes sao inclusivas: uma etapa
+chamada dentro de outra (ex.: html_to_markdown dentro de sei_db_fetch) conta
+nas duas.
+"""
+import functools
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import ParamSpec, TypeVar
+
+from embedder.envs import INSTRUMENTATION_ENABLED
+from embedder.resource_usage import current_rss_mb
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_current_record: ContextVar["DocumentTimings | None"] = ContextVar("current_record", default=None)
+
+
+class DocumentTimings:
+    """Duracao das etapas e contadores (caracteres, chunks, tokens) de um documento.
+
+    Args:
+        id_documento (int): ID do documento.
+    """
+
+    __slots__ = ("calls", "counters", "id_documento", "stages", "started")
+
+    def __init__(self, id_documento: int) -> None:
+        """Inicia o relogio do documento."""
+        self.id_documento = id_documento
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        """Acumula a duracao de uma chamada da etapa."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def count(self, **counters: int) -> None:
+        """Acumula contadores do documento (ex.: caracteres, chunks e tokens)."""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def finish(self) -> dict:
+        """Encerra o relogio e retorna o registro do documento."""
+        return {
+            "id_documento": self.id_documento,
+            "total_s": time.perf_counter() - self.started,
+            "stages": dict(self.stages),
+            "calls": dict(self.calls),
+            **self.counters,
+        }
+
+
+def start_document(id_documento: int, *, enabled: bool = INSTRUMENTATION_ENABLED) -> DocumentTimings | None:
+    """Cria o registro de um documento, ou None com a instrumentacao desligada."""
+    return DocumentTimings(id_documento) if enabled else None
+
+
+@contextmanager
+def active(record: DocumentTimings | None) -> Iterator[DocumentTimings | None]:
+    """Torna `record` o registro ativo dentro do bloco (sem efeito se for None)."""
+    if record is None:
+        yield None
+        return
+    token = _current_record.set(record)
+    try:
+        yield record
+    finally:
+        _current_record.reset(token)
+
+
+def current_record() -> DocumentTimings | None:
+    """Registro ativo no contexto atual."""
+    return _current_record.get()
+
+
+def timed(stage: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorador que soma a duracao da funcao a etapa `stage` do registro ativo.
+
+    Args:
+        stage (str): Nome da etapa.
+
+    Returns:
+        Callable: Decorador.
+    """
+
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            record = _current_record.get()
+            if record is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record.add_time(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class Span:
+    """Bloco `with` que soma sua duracao a etapa `stage` do registro ativo.
+
+    Args:
+        stage (str): Nome da etapa.
+    """
+
+    __slots__ = ("record", "stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        """Guarda o nome da etapa."""
+        self.stage = stage
+        self.record = None
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        """Inicia a medicao se houver registro ativo."""
+        self.record = _current_record.get()
+        if self.record is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Soma a duracao ao registro ativo."""
+        if self.record is not None:
+            self.record.add_time(self.stage, time.perf_counter() - self.start)
+
+
+def attribute_time(records: list[DocumentTimings | None], stage: str, seconds: float) -> None:
+    """Divide a duracao de uma etapa compartilhada (ex.: um lote do encoder) entre os registros.
+
+    Cada ocorrencia de um registro na lista recebe uma fracao igual, entao um
+    documento com mais chunks no lote recebe uma parte maior.
+
+    Args:
+        records (list): Registro do documento de cada item do lote (None e ignorado).
+        stage (str): Nome da etapa.
+        seconds (float): Duracao total da etapa.
+    """
+    if not records:
+        return
+    share = seconds / len(records)
+    for record in records:
+        if record is not None:
+            record.stages[stage] = record.stages.get(stage, 0.0) + share
+    for record in {id(record): record for record in records if record is not None}.values():
+        record.calls[stage] = record.calls.get(stage, 0) + 1
+
+
+class BatchSummary:
+    """Acumula os registros dos documentos de um lote e resume o lote."""
+
+    def __init__(self) -> None:
+        """Inicia o relogio do lote."""
+        self.started = time.perf_counter()
+        self.records: list[dict] = []
+
+    def add(self, record: dict) -> None:
+        """Acrescenta o registro de um documento finalizado."""
+        self.records.append(record)
+        logger.debug(f"Instrumentacao do documento {record['id_documento']}: {record}")
+
+    def summary(self) -> dict:
+        """Totais do lote: documentos, contadores, tempo por etapa e participacao no tempo dos documentos."""
+        elapsed = time.perf_counter() - self.started
+        stages: dict[str, float] = {}
+        counters = {"chars": 0, "chunks": 0, "tokens": 0}
+        for record in self.records:
+            for stage, seconds in record["stages"].items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            for name in counters:
+                counters[name] += record.get(name, 0)
+        documents_s = sum(record["total_s"] for record in self.records)
+        return {
+            "documents": len(self.records),
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_s": round(len(self.records) / elapsed, 2) if elapsed else 0.0,
+            **counters,
+            "stages_s": {stage: round(seconds, 3) for stage, seconds in sorted(stages.items())},
+            "stages_share": {
+                stage: round(seconds / documents_s, 3) for stage, seconds in sorted(stages.items()) if documents_s
+            },
+            "rss_mb": round(current_rss_mb(), 1),
+        }
@@ -0,0 +1,64 @@
+"""Modulo do cache LRU em memoria usado pelos caches de embeddings e de conversao."""
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class LRUCache:
+    """Dicionario thread-safe limitado a `max_entries`, descartando o item usado menos recentemente.
+
+    Com `max_size`, a soma dos tamanhos dos valores (`sizeof`) tambem e
+    limitada; um valor maior que `max_size` nao e guardado.
+
+    Args:
+        max_entries (int): Quantidade maxima de itens.
+        max_size (int): Soma maxima dos tamanhos dos valores (0 nao limita).
+        sizeof (Callable | None): Tamanho de um valor (padrao `len`).
+    """
+
+    def __init__(self, max_entries: int, max_size: int = 0, sizeof: Callable[[object], int] | None = None) -> None:
+        """Inicializa o cache vazio."""
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof or len
+        self.size = 0
+        self._items: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> object | None:
+        """Retorna o valor de `key` (ou None) e o marca como usado recentemente."""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: object) -> None:
+        """Insere ou atualiza `key`, descartando os itens mais antigos se necessario."""
+        size = self.sizeof(value) if self.max_size else 0
+        with self._lock:
+            self._remove(key)
+            if size > self.max_size > 0:
+                return
+            self._items[key] = value
+            self._sizes[key] = size
+            self.size += size
+            while len(self._items) > self.max_entries or self.size > self.max_size > 0:
+                self._remove(next(iter(self._items)))
+
+    def _remove(self, key: Hashable) -> None:
+        if key in self._items:
+            del self._items[key]
+            self.size -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        """Remove todos os itens."""
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        """Quantidade de itens no cache."""
+        return len(self._items)
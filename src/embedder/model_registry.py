@@ -0,0 +1,163 @@
+"""Modulo de registro dos modelos e tokenizers de embedding carregados no processo."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModel, AutoTokenizer
+
+from embedder.envs import MODEL_REGISTRY_MAX_MODELS
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_TRANSFORMER = "sentence_transformer"
+TOKENIZER = "tokenizer"
+INFERENCE_BACKEND = "inference_backend"
+
+
+def _load_inference_backend(model_path: str, **options: dict) -> object:
+    from embedder.inference_backends import load_backend  # evita import circular
+
+    return load_backend(model_path, **options)
+
+
+LOADERS: dict[str, Callable] = {
+    SENTENCE_TRANSFORMER: lambda model_path, **options: SentenceTransformer(model_path, **options),
+    TOKENIZER: lambda model_path, **options: AutoTokenizer.from_pretrained(model_path, **options),
+    INFERENCE_BACKEND: _load_inference_backend,
+}
+
+
+class ModelRegistry:
+    """Registro thread-safe de modelos e tokenizers compartilhados pelo processo.
+
+    Cada combinacao de tipo, caminho do modelo e opcoes de carga e carregada uma
+    unica vez por processo. Quando mais de `max_models` caminhos de modelo estao
+    carregados, o caminho usado menos recentemente e descarregado (LRU).
+
+    Args:
+        max_models (int): Quantidade maxima de caminhos de modelo mantidos em memoria.
+        loaders (dict, optional): Funcoes de carga por tipo de objeto. Defaults to LOADERS.
+    """
+
+    def __init__(self, max_models: int = 2, loaders: dict[str, Callable] | None = None) -> None:
+        """Inicializa o registro vazio."""
+        self.max_models = max_models
+        self.loaders = loaders or LOADERS
+        self._models: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: dict[tuple, threading.Lock] = {}
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_time_s": 0.0}
+
+    @staticmethod
+    def _key(kind: str, options: dict) -> tuple:
+        return (kind, tuple(sorted(options.items())))
+
+    def _lookup(self, model_path: str, key: tuple) -> object | None:
+        with self._lock:
+            entries = self._models.get(model_path)
+            if entries is None or key not in entries:
+                return None
+            self._models.move_to_end(model_path)
+            self._counters["hits"] += 1
+            return entries[key]
+
+    def get(self, kind: str, model_path: str, **options: dict) -> object:
+        """Retorna a instancia compartilhada, carregando-a na primeira chamada.
+
+        Args:
+            kind (str): Tipo do objeto (SENTENCE_TRANSFORMER, TOKENIZER ou INFERENCE_BACKEND).
+            model_path (str): Nome ou caminho do modelo.
+            **options: Opcoes repassadas ao carregador e que fazem parte da chave.
+
+        Returns:
+            object: Modelo ou tokenizer carregado.
+        """
+        key = self._key(kind, options)
+        instance = self._lookup(model_path, key)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault((model_path, key), threading.Lock())
+        with key_lock:
+            # outra thread pode ter carregado enquanto esperavamos o lock
+            instance = self._lookup(model_path, key)
+            if instance is not None:
+                return instance
+            start = time.perf_counter()
+            instance = self.loaders[kind](model_path, **options)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Modelo {model_path} ({kind}) carregado em {elapsed:.2f}s")
+            with self._lock:
+                self._counters["misses"] += 1
+                self._counters["loads"] += 1
+                self._counters["load_time_s"] += elapsed
+                self._models.setdefault(model_path, {})[key] = instance
+                self._models.move_to_end(model_path)
+                self._evict()
+        return instance
+
+    def _evict(self) -> None:
+        while len(self._models) > self.max_models:
+            model_path, _ = self._models.popitem(last=False)
+            self._counters["evictions"] += 1
+            logger.info(f"Modelo {model_path} removido do registro (LRU)")
+
+    def get_sentence_transformer(self, model_path: str, **options: dict) -> SentenceTransformer:
+        """Retorna o SentenceTransformer compartilhado para `model_path`."""
+        return self.get(SENTENCE_TRANSFORMER, model_path, **options)
+
+    def get_tokenizer(self, model_path: str, **options: dict) -> AutoTokenizer:
+        """Retorna o tokenizer compartilhado para `model_path`."""
+        return self.get(TOKENIZER, model_path, **options)
+
+    def get_auto_model(self, model_path: str, **options: dict) -> AutoModel:
+        """Retorna o AutoModel (em modo eval) do SentenceTransformer compartilhado para `model_path`.
+
+        E o modulo Transformer do proprio SentenceTransformer, entao os pesos
+        ficam uma unica vez na memoria do processo.
+        """
+        return self.get_sentence_transformer(model_path, **options)[0].auto_model.eval()
+
+    def get_backend(self, model_path: str, backend: str) -> object:
+        """Retorna o backend de inferencia compartilhado ("torch", "onnx" ou "onnx-int8")."""
+        return self.get(INFERENCE_BACKEND, model_path, backend=backend)
+
+    def warm_up(self, model_path: str, kinds: tuple = (SENTENCE_TRANSFORMER, TOKENIZER)) -> None:
+        """Carrega antecipadamente os objetos de `model_path`.
+
+        Args:
+            model_path (str): Nome ou caminho do modelo.
+            kinds (tuple): Tipos de objeto a carregar.
+        """
+        for kind in kinds:
+            self.get(kind, model_path)
+
+    def unload(self, model_path: str | None = None) -> None:
+        """Descarrega um modelo do registro, ou todos quando `model_path` e None."""
+        with self._lock:
+            if model_path is None:
+                self._models.clear()
+                self._key_locks.clear()
+            else:
+                self._models.pop(model_path, None)
+                self._key_locks = {k: v for k, v in self._key_locks.items() if k[0] != model_path}
+
+    def loaded_models(self) -> list[str]:
+        """Lista os caminhos de modelo carregados, do menos para o mais recente."""
+        with self._lock:
+            return list(self._models)
+
+    def stats(self) -> dict:
+        """Retorna os contadores de carga e a taxa de acerto do registro."""
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / requests if requests else 0.0
+        return counters
+
+
+model_registry = ModelRegistry(max_models=MODEL_REGISTRY_MAX_MODELS)
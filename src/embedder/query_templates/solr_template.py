@@ -2,6 +2,10 @@
 PROD_SEI_SOLR = ("{ANATEL_SOLR_ADDRESS}/solr/{ANATEL_SOLR_CORE}/"
                  "select?q=id_prot:({id_documento})&q.op=OR&fl="
                  "id_prot,content,content_type&wt=json")
+# documentos com conteudo entre os ids: so id_prot volta, o filtro descarta os sem texto indexado
+PROD_SEI_SOLR_HAS_CONTENT = ("{ANATEL_SOLR_ADDRESS}/solr/{ANATEL_SOLR_CORE}/"
+                             "select?q=id_prot:({ids_documentos})&q.op=OR&fq=content:[* TO *]"
+                             "&fl=id_prot&rows={rows}&wt=json")
 INTERNAL_SEI_SOLR = (
     "{ANATEL_SOLR_ADDRESS}/solr/{ANATEL_SOLR_CORE}/select?"
     "q=id_document:({id_documento})&q.op=OR&fl=id_document,content,"
@@ -55,6 +55,29 @@ WHERE
     AND da.id_documento = {{}}
 """
 
+CHECK_IF_HAS_CONTENT_BATCH_TEMPLATE = f"""
+SELECT
+    da.id_documento id_documento,
+    CASE
+        WHEN dc.conteudo IS NULL THEN 0
+        ELSE 1
+    END AS status_content_doc
+FROM
+    {DB_SEI_SCHEMA}.protocolo p
+INNER JOIN
+    {DB_SEI_SCHEMA}.documento da ON da.id_procedimento = p.id_protocolo
+INNER JOIN
+    {DB_SEI_SCHEMA}.protocolo pd ON da.id_documento = pd.id_protocolo
+LEFT JOIN
+    {DB_SEI_SCHEMA}.documento_conteudo dc ON dc.id_documento = da.id_documento
+INNER JOIN
+    {DB_SEI_SCHEMA}.serie s ON da.id_serie = s.id_serie
+WHERE
+    pd.sta_estado = '0'
+    AND da.sta_documento <> 'x'
+    AND da.id_documento IN ({{}})
+"""
+
 GET_NOME_DOCUMENTO_FROM_ID = f"""
 SELECT
     nome as nome_doc
@@ -80,6 +103,23 @@ LEFT JOIN {DB_SEI_SCHEMA}.protocolo pd
 WHERE da.id_documento = {{}}
 """
 
+TYPE_DOC_BATCH_TEMPLATE = f"""
+SELECT
+    da.id_documento id_documento,
+    da.sta_documento type_doc,
+    COALESCE(an.nome,'') formato_arquivo,
+    p.protocolo_formatado num_proc,
+    pd.protocolo_formatado num_doc
+FROM    {DB_SEI_SCHEMA}.documento da
+LEFT JOIN {DB_SEI_SCHEMA}.anexo an
+    ON (da.id_documento = an.id_protocolo)
+LEFT JOIN {DB_SEI_SCHEMA}.protocolo p
+    ON da.id_procedimento = p.id_protocolo
+LEFT JOIN {DB_SEI_SCHEMA}.protocolo pd
+    ON (da.id_documento = pd.id_protocolo)
+WHERE da.id_documento IN ({{}})
+"""
+
 METADATA_DOCUMENTO_TEMPLATE = f"""
 SELECT
     p.protocolo_formatado  id_protocolo_formatado,
@@ -0,0 +1,55 @@
+"""Modulo de medicao do uso de memoria do processo."""
+import os
+import resource
+import threading
+
+
+def current_rss_mb() -> float:
+    """Memoria residente atual do processo em MB (pico do processo se /proc nao existir)."""
+    try:
+        with open("/proc/self/statm") as f:  # noqa: PTH123
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente do processo desde o inicio, em MB (Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Amostra a memoria residente em uma thread para obter o pico de um trecho do codigo.
+
+    O pico do processo (`peak_rss_mb`) so cresce, entao nao separa as etapas;
+    o amostrador registra o maior valor observado enquanto esta ativo.
+
+    Args:
+        interval_s (float): Intervalo entre amostras.
+    """
+
+    def __init__(self, interval_s: float = 0.01) -> None:
+        """Inicializa o amostrador parado."""
+        self.interval_s = interval_s
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self) -> "RssSampler":
+        """Inicia a amostragem."""
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Encerra a amostragem e registra a ultima leitura."""
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
@@ -0,0 +1,268 @@
+"""Modulo de divisao em chunks guiada pela estrutura dos documentos do SEI.
+
+O markdown de `html_to_markdown` marca as secoes (`# **N. TITULO**`, de
+Item_Nivel1) e as clausulas numeradas (`N.M.`, `N.M.K.`, ...). O texto vira
+uma arvore de secoes e clausulas e os chunks sao montados com secoes e
+clausulas inteiras ate o limite de tokens. So um paragrafo que sozinho passa
+do limite e dividido por tokens, como em `split_token_chunks`.
+
+Usado apenas na comparacao de `benchmarks.chunking`; a indexacao divide por
+tokens (`split_chunk_records`).
+"""
+import logging
+import re
+from bisect import bisect_left
+
+from embedder.chunk_records import ChunkRecords
+from embedder.embeddings import SEPARATORS, boundary_ranks, token_chunk_bounds
+from embedder.instrumentation import timed
+from embedder.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+PARAGRAPH_BREAK_PATTERN = re.compile(r"\n[ \t]*\n\s*")
+SECTION_TITLE_PATTERN = re.compile(r"# \*\*(.*?)\*\*")
+CLAUSE_NUMBER_PATTERN = re.compile(r"(\d+(?:\.\d+)*\.)\s")
+
+
+class SectionNode:
+    """Secao ou clausula: o paragrafo do titulo seguido dos paragrafos e subsecoes.
+
+    Args:
+        title (str): Titulo da secao ou numero da clausula.
+        depth (int): Profundidade (0 e o documento, 1 uma secao, 2 ou mais uma clausula).
+        path (tuple): Titulos desde a secao de nivel mais alto ate esta.
+    """
+
+    __slots__ = ("depth", "items", "path", "title")
+
+    def __init__(self, title: str, depth: int, path: tuple[str, ...]) -> None:
+        """Inicializa a secao sem conteudo."""
+        self.title = title
+        self.depth = depth
+        self.path = path
+        self.items: list = []  # paragrafos (inicio, fim, caminho) e subsecoes, na ordem do texto
+
+    def bounds(self) -> tuple[int, int]:
+        """Posicao (inicio, fim) da secao no texto."""
+        first, last = self.items[0], self.items[-1]
+        start = first.bounds()[0] if isinstance(first, SectionNode) else first[0]
+        end = last.bounds()[1] if isinstance(last, SectionNode) else last[1]
+        return start, end
+
+
+def paragraph_spans(doc: str) -> list[tuple[int, int]]:
+    """Posicoes (inicio, fim) dos paragrafos do texto, separados por linhas em branco e sem espacos nas bordas."""
+    spans = []
+    start = 0
+    for match in [*PARAGRAPH_BREAK_PATTERN.finditer(doc), None]:
+        end = match.start() if match else len(doc)
+        text = doc[start:end]
+        stripped = text.strip()
+        if stripped:
+            left = start + len(text) - len(text.lstrip())
+            spans.append((left, left + len(stripped)))
+        if match:
+            start = match.end()
+    return spans
+
+
+def heading(text: str) -> tuple[str, int] | None:
+    """Titulo e profundidade do paragrafo se ele abrir uma secao ou clausula numerada."""
+    if text.startswith("# **"):
+        match = SECTION_TITLE_PATTERN.match(text)
+        return (match.group(1).strip() if match else text[4:].strip()), 1
+    match = CLAUSE_NUMBER_PATTERN.match(text)
+    if match:
+        return match.group(1), match.group(1).count(".") + 1
+    return None
+
+
+def section_tree(doc: str) -> SectionNode:
+    """Monta a arvore de secoes e clausulas do markdown.
+
+    Args:
+        doc (str): Markdown do documento.
+
+    Returns:
+        SectionNode: Raiz (o documento), com profundidade 0.
+    """
+    root = SectionNode("", 0, ())
+    stack = [root]
+    for start, end in paragraph_spans(doc):
+        opened = heading(doc[start:end])
+        if opened is not None:
+            title, depth = opened
+            while stack[-1].depth >= depth:
+                stack.pop()
+            node = SectionNode(title, depth, (*stack[-1].path, title))
+            stack[-1].items.append(node)
+            stack.append(node)
+        stack[-1].items.append((start, end, stack[-1].path))
+    return root
+
+
+class SectionPacker:
+    """Junta paragrafos, clausulas e secoes consecutivos em chunks de ate `chunk_size` tokens.
+
+    As contagens vem de uma unica tokenizacao do documento: os tokens de um
+    trecho sao os que comecam dentro dele.
+
+    Args:
+        doc (str): Texto do documento.
+        input_ids (list): Token ids do documento (sem tokens especiais).
+        offsets (list): Offsets (inicio, fim) de cada token.
+        chunk_size (int): Maximo de tokens por chunk.
+        chunk_overlap (int): Sobreposicao usada apenas ao dividir um paragrafo grande.
+        separators (list): Separadores em ordem de preferencia (divisao de paragrafos grandes).
+    """
+
+    def __init__(
+        self,
+        doc: str,
+        input_ids: list,
+        offsets: list,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: list,
+    ) -> None:
+        """Prepara a busca de tokens por posicao."""
+        self.doc = doc
+        self.input_ids = input_ids
+        self.offsets = offsets
+        self.token_starts = [start for start, _ in offsets]
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators
+        self.positions: list[tuple[int, int]] = []
+        self.token_ids: list = []
+        self.sections: list[tuple[str, ...]] = []
+        self._current: list | None = None  # [inicio, fim, caminho]
+        self._ranks = None
+
+    def tokens(self, start: int, end: int) -> tuple[int, int]:
+        """Faixa de indices dos tokens que comecam em [start, end)."""
+        return bisect_left(self.token_starts, start), bisect_left(self.token_starts, end)
+
+    def count(self, start: int, end: int) -> int:
+        """Quantidade de tokens do trecho [start, end)."""
+        first, last = self.tokens(start, end)
+        return last - first
+
+    def flush(self) -> None:
+        """Fecha o chunk em andamento."""
+        if self._current is None:
+            return
+        start, end, path = self._current
+        first, last = self.tokens(start, end)
+        self.positions.append((start, end))
+        self.token_ids.append(self.input_ids[first:last])
+        self.sections.append(path)
+        self._current = None
+
+    def split_paragraph(self, start: int, end: int, path: tuple[str, ...]) -> None:
+        """Divide por tokens um paragrafo maior que o limite (ver `token_chunk_bounds`).
+
+        O chunk em andamento entra na divisao junto com o paragrafo e a ultima
+        parte fica em andamento, para que os itens seguintes possam completa-la.
+        """
+        first_path = path
+        if self._current is not None:
+            start, first_path = self._current[0], self._current[2]
+            self._current = None
+        if self._ranks is None:
+            self._ranks = boundary_ranks(self.doc, self.offsets, self.separators)
+        first, last = self.tokens(start, end)
+        ranks = self._ranks[first:last + 1]
+        pieces = []
+        for token_start, token_end in token_chunk_bounds(ranks, self.chunk_size, self.chunk_overlap):
+            char_start = self.offsets[first + token_start][0]
+            char_end = self.offsets[first + token_end - 1][1]
+            text = self.doc[char_start:char_end]
+            char_start += len(text) - len(text.lstrip())
+            char_end -= len(text) - len(text.rstrip())
+            if char_start < char_end:
+                pieces.append((char_start, char_end, first + token_start, first + token_end))
+        for idx, (char_start, char_end, token_start, token_end) in enumerate(pieces[:-1]):
+            self.positions.append((char_start, char_end))
+            self.token_ids.append(self.input_ids[token_start:token_end])
+            self.sections.append(first_path if idx == 0 else path)
+        if pieces:
+            self._current = [pieces[-1][0], pieces[-1][1], first_path if len(pieces) == 1 else path]
+
+    def pack(self, items: list) -> None:
+        """Acrescenta os itens (paragrafos e secoes) aos chunks, descendo nas secoes que nao cabem inteiras."""
+        for item in items:
+            is_node = isinstance(item, SectionNode)
+            start, end = item.bounds() if is_node else item[:2]
+            path = item.path if is_node else item[2]
+            if self._current is not None and self.count(self._current[0], end) <= self.chunk_size:
+                self._current[1] = end
+            elif self.count(start, end) <= self.chunk_size:
+                self.flush()
+                self._current = [start, end, path]
+            elif is_node:
+                self.pack(item.items)
+            else:
+                self.split_paragraph(start, end, path)
+
+
+@timed("split_chunks")
+def split_section_chunks(
+            doc: str,
+            tokenizer: object,
+            chunk_size: int = 400,
+            chunk_overlap: int = 50,
+            separators: list = SEPARATORS,
+            ) -> tuple[list[tuple[int, int]], list[list[int]], list[tuple[str, ...]]]:
+    """Divide o texto em chunks de secoes e clausulas inteiras.
+
+    Cada chunk junta paragrafos, clausulas ou secoes consecutivos enquanto
+    couberem em `chunk_size` tokens; uma secao que nao cabe inteira e dividida
+    nas suas clausulas, e assim por diante. Os chunks nao se sobrepoem, exceto
+    os de um paragrafo maior que o limite, dividido por tokens com
+    `chunk_overlap` junto com o chunk em andamento. O caminho de secao de um
+    chunk e o da secao onde ele comeca (vazio antes da primeira secao).
+
+    Args:
+        doc (str): Markdown do documento.
+        tokenizer (object): Tokenizer rapido (PreTrainedTokenizerFast).
+        chunk_size (int): Maximo de tokens (sem tokens especiais) por chunk.
+        chunk_overlap (int): Sobreposicao ao dividir paragrafos grandes.
+        separators (list): Separadores em ordem de preferencia.
+
+    Returns:
+        tuple: Posicoes (inicio, fim) de cada chunk em `doc`, token ids de cada
+            chunk e caminho de secao de cada chunk.
+    """
+    encoded = tokenizer(doc, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    packer = SectionPacker(
+        doc, encoded["input_ids"], encoded["offset_mapping"], chunk_size, chunk_overlap, separators
+    )
+    packer.pack(section_tree(doc).items)
+    packer.flush()
+    return packer.positions, packer.token_ids, packer.sections
+
+
+def split_section_chunk_records(
+            doc: str,
+            model_path: str,
+            chunk_size: int = 400,
+            chunk_overlap: int = 50,
+            separators: list = SEPARATORS,
+            ) -> ChunkRecords:
+    """Divide o texto com `split_section_chunks` e devolve o registro compacto, com o caminho de secao de cada chunk.
+
+    Args:
+        doc (str): Markdown do documento.
+        model_path (str): Nome ou caminho do modelo.
+        chunk_size (int): Maximo de tokens por chunk.
+        chunk_overlap (int): Sobreposicao ao dividir paragrafos grandes.
+        separators (list): Separadores em ordem de preferencia.
+
+    Returns:
+        ChunkRecords: Chunks do documento, com `sections` preenchido.
+    """
+    tokenizer = model_registry.get_tokenizer(model_path)
+    positions, token_ids, sections = split_section_chunks(doc, tokenizer, chunk_size, chunk_overlap, separators)
+    return ChunkRecords.from_lists(doc, positions, token_ids, sections=sections)
@@ -1,14 +1,30 @@
 """Processamento de textos."""
 import logging
+import multiprocessing
+import os
 import re  # Para trabalhar com expressões regulares
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 import pandas as pd
 import tiktoken
 from bs4 import BeautifulSoup  # Para processar dados HTML
 
-logger = logging.getLogger(__name__)
+from embedder.conversion_cache import conversion_cache
+from embedder.envs import (
+    CONVERSION_CACHE_ENABLED,
+    HTML_PARSER,
+    HTML_SINGLE_PARSE,
+    HTML_TO_MARKDOWN_CHUNK_SIZE,
+    HTML_TO_MARKDOWN_PARALLEL_MIN_ROWS,
+    HTML_TO_MARKDOWN_WORKERS,
+    TOKEN_COUNT_CACHE_SIZE,
+)
+from embedder.instrumentation import Span, timed
 
-encoder = tiktoken.get_encoding("cl100k_base")
+logger = logging.getLogger(__name__)
 
 # Listas de Números Romanos e de Letras fora das funções
 ROMAN_NUMERALS = [
@@ -61,297 +77,152 @@ def process_children(tag: str) -> str:
     Returns:
         _type_: _description_
     """
-    content = ""
+    content = []
     for child in tag.children:
         # Verificando se o filho é uma tag <br /> e substituindo por uma
         # quebra de linha no Markdown
         if child.name == "br":
-            content += "\n"
+            content.append("\n")
         # Se o filho for uma string, simplesmente adicione ao conteúdo
         elif child.name is None:
-            content += child.string
+            content.append(child.string)
         # Para outras tags, obtenha seu texto
         else:
-            content += child.get_text()
-    return content
+            content.append(child.get_text())
+    return "".join(content)
+
+
+# Posicoes da lista de contadores usada por process_paragraph
+(
+    LEVEL1,
+    LEVEL2,
+    LEVEL3,
+    LEVEL4,
+    PARAGRAFO_NUM1,
+    PARAGRAFO_NUM2,
+    PARAGRAFO_NUM3,
+    PARAGRAFO_NUM4,
+    ROMAN,
+    LETTER,
+) = range(10)
+
 
+def numbered_handler(index: int, first: int, *, title: bool = False) -> Callable:
+    """Cria o tratador de uma classe de item ou paragrafo numerado.
 
-def process_item_nivel(
-        markdown: str,
-        element: str,
-        counters: tuple | list
-        ) -> tuple:
-    """Funcao de processamento de item nivel.
+    O contador `index` e incrementado, os contadores dos niveis abaixo, o romano
+    e o de letras sao zerados e o numero e formado pelos contadores de `first`
+    ate `index` (ex.: "1.2.").
 
     Args:
-        markdown (str): conteudo markdown ja formatado
-        element (str): Elemento css
-        counters (tuple|list): contadores
+        index (int): Posicao do contador do nivel.
+        first (int): Posicao do contador do primeiro nivel da numeracao.
+        title (bool): Se o paragrafo e um titulo (# **N. TEXTO**).
 
     Returns:
-        tuple: markdown, counters
+        Callable: Tratador `(element, counters, roman_numerals, letters) -> str`.
     """
-    (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ) = counters
-    if "Item_Nivel1" in element.get("class"):
-        level1_counter += 1
-        (level2_counter, level3_counter, level4_counter, roman_counter) = (
-            0, 0, 0, 0,
-        )
-        markdown += (
-            f"# **{level1_counter}. {process_children(element).upper()}"
-            "**\n\n"
-        )
-    elif "Item_Nivel2" in element.get("class"):
-        level2_counter += 1
-        (level3_counter, level4_counter, roman_counter) = (0, 0, 0)
-        markdown += (
-            f"{level1_counter}.{level2_counter}."
-            f" {process_children(element)}\n\n"
-        )
-    elif "Item_Nivel3" in element.get("class"):
-        level3_counter += 1
-        (level4_counter, roman_counter) = (0, 0)
-        markdown += (f"{level1_counter}.{level2_counter}.{level3_counter}."
-                     f" {process_children(element)}\n\n")
-    elif "Item_Nivel4" in element.get("class"):
-        level4_counter += 1
-        (roman_counter) = 0
-        markdown += (f"{level1_counter}.{level2_counter}."
-                     f"{level3_counter}.{level4_counter}. "
-                     f"{process_children(element)}\n\n")
-    counters = (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    )
-    return markdown, counters
+    last = first + 3
 
+    def handler(element: any, counters: list, *_: list) -> str:
+        counters[index] += 1
+        for position in range(index + 1, last + 1):
+            counters[position] = 0
+        counters[ROMAN] = counters[LETTER] = 0
+        number = "".join(f"{counters[position]}." for position in range(first, index + 1))
+        if title:
+            return f"# **{number} {process_children(element).upper()}**\n\n"
+        return f"{number} {process_children(element)}\n\n"
 
-def process_pagragrafo_numerado(
-        markdown: str,
-        element: str,
-        counters: tuple | list
-        ) -> tuple:
-    """Funcao de processamento de paragrafo numerado.
+    return handler
 
-    Args:
-        markdown (str): conteudo markdown ja formatado
-        element (str): Elemento css
-        counters (tuple): contadores
 
-    Returns:
-        tuple: markdown, counters
-    """
-    (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ) = counters
-    if "Paragrafo_Numerado_Nivel1" in element.get("class"):
-        paragrafo_num1_counter += 1
-        (
-            paragrafo_num2_counter,
-            paragrafo_num3_counter,
-            paragrafo_num4_counter,
-            roman_counter,
-        ) = (0, 0, 0, 0)
-        markdown += (f"{paragrafo_num1_counter}."
-                     f" {process_children(element)}\n\n")
-    elif "Paragrafo_Numerado_Nivel2" in element.get("class"):
-        paragrafo_num2_counter += 1
-        (paragrafo_num3_counter, paragrafo_num4_counter, roman_counter) = (
-            0, 0, 0)
-        markdown += (f"{paragrafo_num1_counter}.{paragrafo_num2_counter}."
-                     f" {process_children(element)}\n\n")
-    elif "Paragrafo_Numerado_Nivel3" in element.get("class"):
-        paragrafo_num3_counter += 1
-        (paragrafo_num4_counter, roman_counter) = (0, 0)
-        markdown += (f"{paragrafo_num1_counter}.{paragrafo_num2_counter}."
-                     f"{paragrafo_num3_counter}."
-                     f" {process_children(element)}\n\n")
-    elif "Paragrafo_Numerado_Nivel4" in element.get("class"):
-        paragrafo_num4_counter += 1
-        (roman_counter) = 0
-        markdown += (f"{paragrafo_num1_counter}.{paragrafo_num2_counter}."
-                     f"{paragrafo_num3_counter}.{paragrafo_num4_counter}."
-                     f" {process_children(element)}\n\n")
-    counters = (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter)
-    return markdown, counters
+def roman_handler(element: any, counters: list, roman_numerals: list, _: list) -> str:
+    """Tratador de Item_Inciso_Romano."""
+    counters[LETTER] = 0
+    counters[ROMAN] += 1
+    roman_counter = counters[ROMAN]
+    roman_numeral = roman_numerals[roman_counter - 1] if roman_counter <= len(roman_numerals) else str(roman_counter)
+    return f"{roman_numeral} - {process_children(element)}\n\n"
 
 
-def process_romanos(
-        markdown: str,
-        element: str,
-        counters: tuple | list,
-        roman_numerals: list,
-        ) -> tuple:
-    """Funcao de processamento de paragrafo numerado.
+def letter_handler(element: any, counters: list, _: list, letters: list) -> str:
+    """Tratador de Item_Alinea_Letra."""
+    counters[LETTER] += 1
+    letter_counter = counters[LETTER]
+    letter = letters[letter_counter - 1] if letter_counter <= len(letters) else chr(96 + letter_counter)
+    return f"{letter}) {process_children(element)}\n\n"
+
+
+def text_handler(template: str, *, upper: bool = False) -> Callable:
+    """Cria o tratador de uma classe que apenas formata o texto do paragrafo.
 
     Args:
-        markdown (str): conteudo markdown ja formatado
-        element (str): Elemento css
-        counters (tuple): contadores
-        roman_numerals (list): lista de algarismos romanos
+        template (str): Formato com `{}` no lugar do texto.
+        upper (bool): Se o texto vai em maiusculas.
 
     Returns:
-        tuple: markdown, counters
+        Callable: Tratador `(element, counters, roman_numerals, letters) -> str`.
     """
-    (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ) = counters
-    if "Item_Inciso_Romano" in element.get("class"):
-        roman_counter += 1
-        roman_numeral = (
-            roman_numerals[roman_counter - 1]
-            if roman_counter <= len(roman_numerals)
-            else str(roman_counter)
-        )
-        markdown += f"{roman_numeral} - {process_children(element)}\n\n"
-    counters = (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter)
-    return markdown, counters
 
+    def handler(element: any, *_: list) -> str:
+        text = process_children(element)
+        return template.format(text.upper() if upper else text)
 
-def process_others(
-        markdown: str,
-        element: str,
-        counters: tuple | list,
-        letters: list
-        ) -> tuple:
-    """Funcao de processamento de paragrafo numerado.
+    return handler
 
-    Args:
-        markdown (str): conteudo markdown ja formatado
-        element (str): Elemento css
-        counters (tuple): contadores
-        letters (list): lista de letras
 
-    Returns:
-        tuple: markdown, counters
-    """
+def default_paragraph_handler(element: any, *_: list) -> str:
+    """Tratador de paragrafos sem classe conhecida."""
+    return process_children(element) + "\n\n"
+
+
+# Classes CSS do editor do SEI em ordem de precedencia: quando um paragrafo tem
+# mais de uma classe conhecida, vale a que aparece primeiro
+PARAGRAPH_CLASS_HANDLERS = (
+    (("Item_Nivel1",), numbered_handler(LEVEL1, LEVEL1, title=True)),
+    (("Item_Nivel2",), numbered_handler(LEVEL2, LEVEL1)),
+    (("Item_Nivel3",), numbered_handler(LEVEL3, LEVEL1)),
+    (("Item_Nivel4",), numbered_handler(LEVEL4, LEVEL1)),
+    (("Paragrafo_Numerado_Nivel1",), numbered_handler(PARAGRAFO_NUM1, PARAGRAFO_NUM1)),
+    (("Paragrafo_Numerado_Nivel2",), numbered_handler(PARAGRAFO_NUM2, PARAGRAFO_NUM1)),
+    (("Paragrafo_Numerado_Nivel3",), numbered_handler(PARAGRAFO_NUM3, PARAGRAFO_NUM1)),
+    (("Paragrafo_Numerado_Nivel4",), numbered_handler(PARAGRAFO_NUM4, PARAGRAFO_NUM1)),
+    (("Item_Inciso_Romano",), roman_handler),
+    (("Item_Alinea_Letra",), letter_handler),
+    (("Citacao",), text_handler("```markdown\n{}\n```\n\n")),
     (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ) = counters
-    if "Item_Alinea_Letra" in element.get("class"):
-        letter_counter += 1
-        letter = (
-            letters[letter_counter - 1]
-            if letter_counter <= len(letters)
-            else chr(96 + letter_counter)
-        )
-        markdown += f"{letter}) {process_children(element)}\n\n"
-    # Tratando parágrafos com classe de Citação
-    elif "Citacao" in element.get("class"):
-        markdown += f"```markdown\n{process_children(element)}\n```\n\n"
-    # Tratando parágrafos com classes que força o texto em maiúsculo com
-    # negrito
-    elif any(
-        cls in element.get("class")
-        for cls in [
-            "Texto_Centralizado_Maiusculas_Negrito",
-            "Texto_Fundo_Cinza_Maiusculas_Negrito",
-        ]
-    ):
-        markdown += f"**{process_children(element).upper()}**\n\n"
-    # Tratando parágrafos com classes que força o texto em maiúsculo
-    elif any(
-        cls in element.get("class")
-        for cls in [
+        ("Texto_Centralizado_Maiusculas_Negrito", "Texto_Fundo_Cinza_Maiusculas_Negrito"),
+        text_handler("**{}**\n\n", upper=True),
+    ),
+    (
+        (
             "Texto_Alinhado_Esquerda_Espacamento_Simples_Maiusc",
             "Texto_Centralizado_Maiusculas",
             "Texto_Justificado_Maiusculas",
-        ]
-    ):
-        markdown += f"{process_children(element).upper()}\n\n"
-    # Tratando parágrafos com classes que força o texto em negrito
-    elif "Texto_Fundo_Cinza_Negrito" in element.get("class"):
-        markdown += f"**{process_children(element)}**\n\n"
-    else:
-        markdown += process_children(element) + "\n\n"
-    counters = (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter)
-    return markdown, counters
+        ),
+        text_handler("{}\n\n", upper=True),
+    ),
+    (("Texto_Fundo_Cinza_Negrito",), text_handler("**{}**\n\n")),
+)
+
+# Classe CSS -> (precedencia, tratador)
+PARAGRAPH_DISPATCH = {
+    css_class: (rank, handler)
+    for rank, (css_classes, handler) in enumerate(PARAGRAPH_CLASS_HANDLERS)
+    for css_class in css_classes
+}
 
 
-def process_paragraph(  # noqa: C901, PLR0912, PLR0915
+def process_paragraph(
         element: any,
-        counters: tuple,
+        counters: tuple | list,
         roman_numerals: list,
-        letters: list) -> str:
+        letters: list) -> tuple:
     """Função para processar parágrafos HTML e convertê-los em Markdown.
 
-    aplicando formatações específicas com base nas classes CSS.
+    aplicando formatações específicas com base nas classes CSS. O tratador de
+    cada classe vem da tabela PARAGRAPH_DISPATCH.
 
     Args:
         element (_type_): elementos
@@ -360,191 +231,126 @@ def process_paragraph(  # noqa: C901, PLR0912, PLR0915
         letters (list): lista com letras
 
     Returns:
-        str: String markdown
+        tuple: String markdown e a lista de contadores atualizada
     """
-    # Inicializando a string Markdown e contadores para formatação estruturada
-    markdown = ""
-    (
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ) = counters
-
-    # Processamento para diferentes tipos de parágrafos com base nas
-    # classes CSS
+    counters = list(counters)
+    handler = default_paragraph_handler
     paragraph_class = element.get("class")
     if paragraph_class:
-        # Resetando o contador de 'Item_Alinea_Letra' conforme necessário
-        if any(
-            cls in paragraph_class
-            for cls in [
-                "Item_Nivel1",
-                "Item_Nivel2",
-                "Item_Nivel3",
-                "Item_Nivel4",
-                "Paragrafo_Numerado_Nivel1",
-                "Paragrafo_Numerado_Nivel2",
-                "Paragrafo_Numerado_Nivel3",
-                "Paragrafo_Numerado_Nivel4",
-                "Item_Inciso_Romano",
-            ]
-        ):
-            letter_counter = 0
-
-        # Tratando parágrafos com classes Item_Nivel1 a Item_Nivel4
-        if "Item_Nivel1" in paragraph_class:
-            level1_counter += 1
-            (level2_counter, level3_counter, level4_counter, roman_counter) = (
-                0,
-                0,
-                0,
-                0,
-            )
-            markdown += (
-                f"# **{level1_counter}. {process_children(element).upper()}**\n\n"
-            )
-        elif "Item_Nivel2" in paragraph_class:
-            level2_counter += 1
-            (level3_counter, level4_counter, roman_counter) = (0, 0, 0)
-            markdown += (
-                f"{level1_counter}.{level2_counter}. {process_children(element)}\n\n"
-            )
-        elif "Item_Nivel3" in paragraph_class:
-            level3_counter += 1
-            (level4_counter, roman_counter) = (0, 0)
-            markdown += f"{level1_counter}.{level2_counter}.{level3_counter}. {process_children(element)}\n\n"
-        elif "Item_Nivel4" in paragraph_class:
-            level4_counter += 1
-            (roman_counter) = 0
-            markdown += (f"{level1_counter}.{level2_counter}.{level3_counter}"
-                         f".{level4_counter}. {process_children(element)}\n\n")
-        # Tratando parágrafos com classes Paragrafo_Numerado_Nivel1 a
-        # Paragrafo_Numerado_Nivel4
-        elif "Paragrafo_Numerado_Nivel1" in paragraph_class:
-            paragrafo_num1_counter += 1
-            (
-                paragrafo_num2_counter,
-                paragrafo_num3_counter,
-                paragrafo_num4_counter,
-                roman_counter,
-            ) = (0, 0, 0, 0)
-            markdown += f"{paragrafo_num1_counter}. {process_children(element)}\n\n"
-        elif "Paragrafo_Numerado_Nivel2" in paragraph_class:
-            paragrafo_num2_counter += 1
-            (paragrafo_num3_counter, paragrafo_num4_counter, roman_counter) = (0, 0, 0)
-            markdown += f"{paragrafo_num1_counter}.{paragrafo_num2_counter}. {process_children(element)}\n\n"
-        elif "Paragrafo_Numerado_Nivel3" in paragraph_class:
-            paragrafo_num3_counter += 1
-            (paragrafo_num4_counter, roman_counter) = (0, 0)
-            markdown += (f"{paragrafo_num1_counter}.{paragrafo_num2_counter}."
-                         f"{paragrafo_num3_counter}. {process_children(element)}\n\n")
-        elif "Paragrafo_Numerado_Nivel4" in paragraph_class:
-            paragrafo_num4_counter += 1
-            (roman_counter) = 0
-            markdown += (f"{paragrafo_num1_counter}.{paragrafo_num2_counter}."
-                         f"{paragrafo_num3_counter}.{paragrafo_num4_counter}. {process_children(element)}\n\n")
-        # Tratamento de listas romano
-        elif "Item_Inciso_Romano" in paragraph_class:
-            roman_counter += 1
-            roman_numeral = (
-                roman_numerals[roman_counter - 1]
-                if roman_counter <= len(roman_numerals)
-                else str(roman_counter)
-            )
-            markdown += f"{roman_numeral} - {process_children(element)}\n\n"
-        # Tratamento de listas alfabéticas
-        elif "Item_Alinea_Letra" in paragraph_class:
-            letter_counter += 1
-            letter = (
-                letters[letter_counter - 1]
-                if letter_counter <= len(letters)
-                else chr(96 + letter_counter)
-            )
-            markdown += f"{letter}) {process_children(element)}\n\n"
-        # Tratando parágrafos com classe de Citação
-        elif "Citacao" in paragraph_class:
-            markdown += f"```markdown\n{process_children(element)}\n```\n\n"
-        # Tratando parágrafos com classes que força o texto em maiúsculo com
-        # negrito
-        elif any(
-            cls in paragraph_class
-            for cls in [
-                "Texto_Centralizado_Maiusculas_Negrito",
-                "Texto_Fundo_Cinza_Maiusculas_Negrito",
-            ]
-        ):
-            markdown += f"**{process_children(element).upper()}**\n\n"
-        # Tratando parágrafos com classes que força o texto em maiúsculo
-        elif any(
-            cls in paragraph_class
-            for cls in [
-                "Texto_Alinhado_Esquerda_Espacamento_Simples_Maiusc",
-                "Texto_Centralizado_Maiusculas",
-                "Texto_Justificado_Maiusculas",
-            ]
-        ):
-            markdown += f"{process_children(element).upper()}\n\n"
-        # Tratando parágrafos com classes que força o texto em negrito
-        elif "Texto_Fundo_Cinza_Negrito" in paragraph_class:
-            markdown += f"**{process_children(element)}**\n\n"
-        else:
-            markdown += process_children(element) + "\n\n"
-    else:
-        markdown += process_children(element) + "\n\n"
-
-    # Atualizando os contadores
-    counters = [
-        level1_counter,
-        level2_counter,
-        level3_counter,
-        level4_counter,
-        paragrafo_num1_counter,
-        paragrafo_num2_counter,
-        paragrafo_num3_counter,
-        paragrafo_num4_counter,
-        roman_counter,
-        letter_counter,
-    ]
-    return markdown, counters
+        best_rank = len(PARAGRAPH_CLASS_HANDLERS)
+        for cls in paragraph_class:
+            rank, class_handler = PARAGRAPH_DISPATCH.get(cls, (best_rank, handler))
+            if rank < best_rank:
+                best_rank, handler = rank, class_handler
+    return handler(element, counters, roman_numerals, letters), counters
+
+
+# Limites do HTML para colspan e rowspan, que tambem limitam a memoria da expansao
+MAX_COLSPAN = 1000
+MAX_ROWSPAN = 65534
+
+
+SPAN_VALUE_PATTERN = re.compile(r"\s*(\d+)")
+
+
+def span_value(cell: any, name: str, limit: int) -> int:
+    """Valor de colspan/rowspan da celula; ausente, invalido ou zero vale 1."""
+    match = SPAN_VALUE_PATTERN.match(cell.get(name) or "")
+    return min(max(int(match.group(1)), 1), limit) if match else 1
+
+
+def take_spanned_cell(column: int, row: list, current: dict, pending: dict) -> None:
+    """Copia para a linha a celula com rowspan que ocupa `column`, repassando-a a proxima linha se preciso."""
+    text, remaining = current.pop(column)
+    row.append(text)
+    if remaining > 1:
+        pending[column] = (text, remaining - 1)
+
+
+def iter_table_rows(element: any) -> Iterator[list[str]]:
+    """Percorre as linhas da tabela expandindo rowspan e colspan.
+
+    O texto de uma celula mesclada e repetido em cada posicao que ela ocupa.
+    As linhas sao geradas uma a uma e so as celulas com rowspan ainda
+    pendentes ficam guardadas, entao a memoria depende da largura da tabela
+    e nao da quantidade de linhas.
+
+    Args:
+        element (Tag): Elemento <table>.
+
+    Yields:
+        list[str]: Texto de cada coluna da linha.
+    """
+    pending: dict[int, tuple[str, int]] = {}  # coluna -> (texto, linhas restantes)
+    # percorre os descendentes direto: o find_all e bem mais lento em tabelas grandes
+    for tr in (node for node in element.descendants if node.name == "tr"):
+        current, pending = pending, {}
+        row, column = [], 0
+        for cell in [node for node in tr.descendants if node.name in ("th", "td")]:
+            while column in current:
+                take_spanned_cell(column, row, current, pending)
+                column += 1
+            text = process_children(cell).strip()
+            rowspan = span_value(cell, "rowspan", MAX_ROWSPAN)
+            for _ in range(span_value(cell, "colspan", MAX_COLSPAN)):
+                row.append(text)
+                if rowspan > 1:
+                    pending[column] = (text, rowspan - 1)
+                column += 1
+        for spanned in sorted(current):
+            row.extend([""] * (spanned - column))
+            column = spanned
+            take_spanned_cell(column, row, current, pending)
+            column += 1
+        yield row
 
 
 def process_table(element: str) -> str:
-    """Definindo uma função para processar tabelas HTML para  Markdown."""
-    # Verificando a existência de células mescladas
-    if any(
-        cell.has_attr("rowspan") or cell.has_attr("colspan")
-        for cell in element.find_all(["th", "td"])
-    ):
-        return str(element)  # Retorna o HTML original da tabela
-    markdown = ""
-    rows = element.find_all("tr")
-    for i, row in enumerate(rows):
-        row_markdown = "|"
-        for cell in row.find_all(["th", "td"]):
-            cell_content = process_children(cell).strip()  # Processa
-            # o conteúdo da célula
-            if not cell_content:  # Substitui conteúdo vazio por espaço simples
-                cell_content = " "
-            row_markdown += f" {cell_content} |"
-        markdown += row_markdown + "\n"
+    """Definindo uma função para processar tabelas HTML para  Markdown.
+
+    Celulas com rowspan/colspan sao repetidas em cada posicao que ocupam
+    (ver `iter_table_rows`).
+    """
+    lines = []
+    for i, cells in enumerate(iter_table_rows(element)):
+        # Substitui conteúdo vazio por espaço simples
+        lines.append("|" + "".join(f" {cell or ' '} |" for cell in cells) + "\n")
         # Adicionando a linha de separação após a primeira linha (cabeçalho)
         if i == 0:  # A primeira linha é tratada como cabeçalho
-            markdown += "|---" * len(row.find_all(["th", "td"])) + "|\n"
+            lines.append("|---" * len(cells) + "|\n")
+    lines.append("\n")
+    return "".join(lines)
 
-    return markdown + "\n"
+
+def replace_tables(soup: BeautifulSoup) -> None:
+    """Troca cada <table> da arvore pelo markdown de `process_table`, comecando em uma nova linha."""
+    for table in soup.find_all("table"):
+        table.replace_with("\n" + process_table(table))
+
+
+# Entidades trocadas por `replace_html_special_characters`
+HTML_SPECIAL_CHARACTERS = {
+    "&nbsp;": " ",  # Espaço não quebrável
+    "&#8239;": " ",  # Espaço estreito não quebrável
+    "&#8203;": "",  # Zero width space
+    "&#64257;": "fi",  # Ligadura fi
+    "&shy;": "",  # Soft hyphen
+}
+HTML_SPECIAL_CHARACTERS_PATTERN = re.compile("|".join(map(re.escape, HTML_SPECIAL_CHARACTERS)))
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", flags=re.DOTALL)
+HTML_TAG_PATTERN = re.compile(r"<.*?>")
+MULTIPLE_SPACES_PATTERN = re.compile(r"[^\S\r\n]{2,}")
+BLANK_LINES_PATTERN = re.compile(r"(\r?\n\s*)+\r?\n")
 
 
 def replace_html_special_characters(html: str) -> str:
     """Substituições de caracteres especiais HTML por caracteres.
 
-    apropriados ou strings vazias.
+    apropriados ou strings vazias, em uma unica passada (ver
+    `HTML_SPECIAL_CHARACTERS`). O texto de uma troca nao e analisado de novo,
+    entao uma entidade formada pela remocao de outra (ex.: "&sh&#8203;y;")
+    fica no texto; com as trocas encadeadas da versao anterior ela era trocada
+    quando vinha depois na ordem ("&shy;" e "&#64257;").
 
     Args:
         html (_type_): _description_
@@ -552,13 +358,7 @@ def replace_html_special_characters(html: str) -> str:
     Returns:
         _type_: _description_
     """
-    return (
-        html.replace("&nbsp;", " ")  # Espaço não quebrável
-        .replace("&#8239;", " ")  # Espaço estreito não quebrável
-        .replace("&#8203;", "")  # Zero width space
-        .replace("&#64257;", "fi")  # Ligadura fi
-        .replace("&shy;", "")
-    )  # Soft hyphen
+    return HTML_SPECIAL_CHARACTERS_PATTERN.sub(lambda match: HTML_SPECIAL_CHARACTERS[match.group()], html)
 
 
 def remove_html_comments(html: str) -> str:
@@ -570,19 +370,26 @@ def remove_html_comments(html: str) -> str:
     Returns:
         _type_: _description_
     """
-    return re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+    return HTML_COMMENT_PATTERN.sub("", html)
 
 
-def remove_specific_elements(html: str) -> str:
+def parse_html(html: str, parser: str = "html.parser") -> BeautifulSoup:
+    """Analisa o HTML com o BeautifulSoup, contando a analise na etapa html_parse da instrumentacao."""
+    with Span("html_parse"):
+        return BeautifulSoup(html, parser)
+
+
+def remove_specific_elements(html: str, parser: str = "html.parser") -> str:
     """Função para remover diversos elementos HTML sem perder o conteúd.
 
     Args:
         html (_type_): _description_
+        parser (str): Parser do BeautifulSoup.
 
     Returns:
         _type_: _description_
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = parse_html(html, parser)
     # Lista de tags para remover, mantendo o conteúdo interno
     tags_to_remove = ["span", "div", "main", "section",
                       "blockquote", "center", "nav"]
@@ -593,64 +400,122 @@ def remove_specific_elements(html: str) -> str:
     ):
         element.decompose()
 
-    for tag in tags_to_remove:
-        [match.unwrap() for match in soup.find_all(tag)]
+    # equivale a match.unwrap(), mas replace_with move os filhos do primeiro ao ultimo,
+    # sem procurar cada um na lista da tag removida (quadratico com milhares de filhos)
+    for match in soup.find_all(tags_to_remove):
+        match.replace_with(*match.contents)
 
     return soup
 
 
-def html_to_markdown(html: str) -> str:  # noqa: C901, PLR0912
+HEADER_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6", "h7", "h8", "h9"})
+
+
+def body_to_markdown(body: any, *, single_parse: bool = False) -> str:
+    """Converte os filhos do <body> em markdown.
+
+    O markdown e montado em uma lista de partes unida no final, para que o
+    tempo cresca linearmente com o tamanho do documento.
+
+    Args:
+        body (Tag): Elemento <body> da arvore.
+        single_parse (bool): Se a arvore nao sera analisada de novo. Nesse caso
+            <code>/<pre> viram texto, em vez de seguirem como HTML.
+
+    Returns:
+        str: Markdown do corpo.
+    """
+    parts = []
+    counters = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    for element in body:
+        markdown, counters = element_to_markdown(element, counters, single_parse=single_parse)
+        parts.append(markdown)
+    return "".join(parts)
+
+
+def element_to_markdown(element: any, counters: list, *, single_parse: bool = False) -> tuple[str, list]:
+    """Converte um filho do <body> em markdown.
+
+    Args:
+        element (Tag): Elemento a converter (textos e tags nao tratadas viram "").
+        counters (list): Contadores da numeracao dos paragrafos anteriores.
+        single_parse (bool): Se <code>/<pre> viram texto (ver `body_to_markdown`).
+
+    Returns:
+        tuple: Markdown do elemento e os contadores atualizados.
+    """
+    markdown = ""
+    # Convertendo cabeçalhos HTML (h1-h9) para Markdown
+    if element.name in HEADER_TAGS:
+        header_level = int(element.name[1])
+        markdown = "#" * header_level + f" {element.get_text().strip()}\n\n"
+    # Mantendo o HTML original para os elementos listados
+    elif element.name in ["code", "pre"]:
+        markdown = element.get_text() if single_parse else str(element)
+    elif element.name == "p":
+        markdown, counters = process_paragraph(element, counters, ROMAN_NUMERALS, LETTERS)
+    elif element.name == "table":
+        markdown = process_table(element)
+    elif element.name == "hr":
+        markdown = "---\n"
+    elif element.name == "ul":
+        markdown = "\n".join([f"- {li.get_text().strip()}" for li in element.find_all("li")]) + "\n\n"
+    elif element.name == "ol":
+        markdown = "\n".join([f"1. {li.get_text().strip()}" for li in element.find_all("li")]) + "\n\n"
+    return markdown, counters
+
+
+# Versao da saida de html_to_markdown e pre_processamento_pdf, parte da chave do
+# cache de conversao: incremente ao mudar o resultado de algum dos conversores
+CONVERTER_VERSION = "2"
+
+
+@timed("html_to_markdown")
+def html_to_markdown(
+        html: str,
+        *,
+        single_parse: bool = HTML_SINGLE_PARSE,
+        parser: str = HTML_PARSER,
+        use_cache: bool = CONVERSION_CACHE_ENABLED,
+        ) -> str:
     """Função para converter conteúdo HTML em Markdown.
 
     Args:
         html (_type_): _description_
+        single_parse (bool): Se deve usar `html_to_markdown_single_parse`.
+        parser (str): Parser do BeautifulSoup no modo de analise unica.
+        use_cache (bool): Se deve consultar o cache de conversao (ver `conversion_cache`).
 
     Returns:
         _type_: _description_
     """
+    if use_cache and isinstance(html, str):
+        return conversion_cache.get_or_convert(
+            html,
+            f"html_to_markdown|{CONVERTER_VERSION}|{single_parse}|{parser}",
+            lambda raw: convert_html_to_markdown(raw, single_parse=single_parse, parser=parser),
+        )
+    return convert_html_to_markdown(html, single_parse=single_parse, parser=parser)
+
+
+def convert_html_to_markdown(html: str, *, single_parse: bool = HTML_SINGLE_PARSE, parser: str = HTML_PARSER) -> str:
+    """Conversao de `html_to_markdown`, sem o cache.
+
+    Args:
+        html (str): HTML do documento.
+        single_parse (bool): Se deve usar `html_to_markdown_single_parse`.
+        parser (str): Parser do BeautifulSoup no modo de analise unica.
+
+    Returns:
+        str: Markdown do documento.
+    """
+    if single_parse:
+        return html_to_markdown_single_parse(html, parser)
     try:
         html = replace_html_special_characters(html)
         html = remove_html_comments(html)
         soup = remove_specific_elements(html)
-        markdown = ""
-        counters = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-
-        for element in soup.body:
-            # Convertendo cabeçalhos HTML (h1-h9) para Markdown
-            if element.name in ["h1", "h2", "h3", "h4",
-                                "h5", "h6", "h7", "h8", "h9"]:
-                header_level = int(element.name[1])
-                markdown += ("#" * header_level +
-                             f" {element.get_text().strip()}\n\n")
-            # Mantendo o HTML original para os elementos listados
-            elif element.name in ["code", "pre"]:
-                markdown += str(element)
-            elif element.name == "p":
-                paragraph_markdown, counters = process_paragraph(
-                    element, counters, ROMAN_NUMERALS, LETTERS
-                )
-                markdown += paragraph_markdown
-            elif element.name == "table":
-                table_markdown = process_table(element)
-                markdown += table_markdown
-            elif element.name == "hr":
-                markdown += "---\n"
-            elif element.name == "ul":
-                markdown += (
-                    "\n".join(
-                        [f"- {li.get_text().strip()}"
-                            for li in element.find_all("li")]
-                    )
-                    + "\n\n"
-                )
-            elif element.name == "ol":
-                markdown += (
-                    "\n".join(
-                        [f"1. {li.get_text().strip()}"
-                            for li in element.find_all("li")]
-                    )
-                    + "\n\n"
-                )
+        markdown = body_to_markdown(soup.body)
     except Exception as exc: # noqa: BLE001
         logger.debug(f"Erro na conversao markdown: {exc!s}")
         try:
@@ -666,6 +531,38 @@ def html_to_markdown(html: str) -> str:  # noqa: C901, PLR0912
             return remove_html_tags(markdown)
 
 
+def html_to_markdown_single_parse(html: str, parser: str = HTML_PARSER) -> str:
+    """Converte HTML em Markdown analisando o documento uma unica vez.
+
+    No modo padrao o markdown volta a ser analisado como HTML em
+    `remove_html_and_format_table`. Aqui o markdown nao e analisado de novo.
+    O resultado e o mesmo, exceto que:
+
+    - entidades e trechos como `<x>` no texto sao decodificados uma vez so (no
+      modo padrao, um `&lt;b&gt;` no texto vira `<b>` e some na segunda analise);
+    - com `parser="lxml"`, espacos entre tags e HTML mal formado (ex.: <p>
+      dentro de <p>) podem ser tratados de forma diferente do `html.parser`.
+
+    Args:
+        html (str): HTML do documento.
+        parser (str): Parser do BeautifulSoup ("html.parser", "lxml" ou "html5lib").
+
+    Returns:
+        str: Markdown do documento.
+    """
+    try:
+        html = replace_html_special_characters(html)
+        html = remove_html_comments(html)
+        soup = remove_specific_elements(html, parser)
+        if soup.body is None:
+            replace_tables(soup)
+            return soup.get_text()
+        return body_to_markdown(soup.body, single_parse=True)
+    except Exception as exc: # noqa: BLE001
+        logger.debug(f"Erro na conversao markdown: {exc!s}")
+        return remove_html_tags(html)
+
+
 def remove_multiple_spaces(row: str) -> str:
     """Remover espacos multiplos.
 
@@ -680,8 +577,8 @@ def remove_multiple_spaces(row: str) -> str:
         _type_: _description_
     """
     text = row["TEXTO_LIMPO"]
-    text = re.sub(r"[^\S\r\n]{2,}", " ", text)
-    text = re.sub(r"(\r?\n\s*)+\r?\n", "\n\n", text)
+    text = MULTIPLE_SPACES_PATTERN.sub(" ", text)
+    text = BLANK_LINES_PATTERN.sub("\n\n", text)
     text = text.strip()
     row["TEXTO_LIMPO"] = text
     return row
@@ -703,6 +600,51 @@ def process_html_to_markdown(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop(columns=["HTML"])
 
 
+def convert_html_batch(htmls: list) -> list[str]:
+    """Converte uma fatia da coluna HTML como `process_html_to_markdown` (executada nos processos do pool)."""
+    return [html_to_markdown(x) if isinstance(x, str) and x.strip() else "" for x in htmls]
+
+
+def process_html_to_markdown_parallel(
+        df: pd.DataFrame,
+        workers: int = HTML_TO_MARKDOWN_WORKERS,
+        chunk_size: int = HTML_TO_MARKDOWN_CHUNK_SIZE,
+        min_rows: int = HTML_TO_MARKDOWN_PARALLEL_MIN_ROWS,
+        ) -> pd.DataFrame:
+    """Versao de `process_html_to_markdown` que converte a coluna HTML em um pool de processos.
+
+    A coluna e dividida em fatias de `chunk_size` linhas, convertidas pelos
+    processos (criados com fork) e remontadas na ordem original, entao o
+    resultado e o mesmo do modo serial. Com um unico worker ou menos de
+    `min_rows` linhas, o custo de criar o pool nao compensa e a conversao e
+    serial.
+
+    Args:
+        df (pd.DataFrame): DataFrame com a coluna HTML.
+        workers (int): Quantidade de processos (0 usa todos os nucleos).
+        chunk_size (int): Linhas enviadas a um processo por vez.
+        min_rows (int): Minimo de linhas para usar o pool.
+
+    Returns:
+        pd.DataFrame: DataFrame com a coluna TEXTO_LIMPO no lugar da coluna HTML.
+    """
+    workers = workers if workers > 0 else os.cpu_count() or 1
+    if workers == 1 or len(df) < min_rows:
+        return process_html_to_markdown(df)
+    start = time.perf_counter()
+    htmls = df["HTML"].tolist()
+    batches = [htmls[i:i + chunk_size] for i in range(0, len(htmls), chunk_size)]
+    workers = min(workers, len(batches))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+        df["TEXTO_LIMPO"] = [text for batch in executor.map(convert_html_batch, batches) for text in batch]
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"html_to_markdown de {len(htmls)} linhas com {workers} processos em {elapsed:.2f}s "
+        f"({len(htmls) / elapsed if elapsed else 0.0:.1f} linhas/s)"
+    )
+    return df.drop(columns=["HTML"])
+
+
 def split_by_sections(text: str) -> dict:
     """Slit text por secoes.
 
@@ -725,6 +667,26 @@ def split_by_sections(text: str) -> dict:
     return dicionario_secoes
 
 
+@lru_cache(maxsize=1)
+def get_encoder() -> tiktoken.Encoding:
+    """Retorna o encoder cl100k do tiktoken, carregado no primeiro uso.
+
+    O carregamento pode baixar o vocabulario, entao nao acontece na importacao
+    do modulo.
+    """
+    return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def encoded_length(text: str) -> int:
+    """Quantidade de tokens de `text` no encoder cl100k, memorizada em um cache LRU limitado.
+
+    Secoes e linhas repetidas entre documentos (cabecalhos, fechos, assinaturas)
+    sao tokenizadas uma unica vez enquanto estiverem no cache.
+    """
+    return len(get_encoder().encode(text))
+
+
 def split_chunks_old(
         splited: dict, max_tokens: int = 2048, overlap: int = 2) -> dict:
     """spliter.
@@ -732,6 +694,13 @@ def split_chunks_old(
     Divide um dicionário de textos em chunks com base no número máximo
     de tokens permitidos.
 
+    Cada secao e cada linha sao tokenizadas uma unica vez (ver
+    `encoded_length`). Os chunks sao os mesmos da versao que tokenizava a
+    secao a cada comparacao: as secoes sao juntadas sem separador, uma secao
+    que nao cabe sozinha e dividida por linhas, linhas com `max_tokens` ou
+    mais tokens sao descartadas e o chunk aberto no meio de uma secao repete
+    o titulo e as `overlap` linhas anteriores (fora da contagem de tokens).
+
     Args:
         splited (dict): Um dicionário contendo textos divididos por chave.
         max_tokens (int, opcional): O número máximo de tokens permitidos
@@ -742,84 +711,74 @@ def split_chunks_old(
     Returns:
         dict: Um dicionário contendo o resumo dos textos e os chunks divididos.
     """
-    summarize_chunk = [""]
+    chunks = [[]]
     resumo_esp = []
-    actual_chunk = 0
     actual_tokens = 0
     for key, value in splited.items():
+        title = f"{key}\n"
+        section = title + "\n".join(value)
         if "EMENTA" in key or "CONCLUSÃO" in key:
-            resumo_esp.append(f"{key}\n" + "\n".join(value))
-        elif (
-            len(encoder.encode(f"{key}\n" + "\n".join(value))) + actual_tokens
-            <= max_tokens
-        ):
-            summarize_chunk[actual_chunk] = (
-                summarize_chunk[actual_chunk] + f"{key}\n" + "\n".join(value)
-            )
-            actual_tokens += len(encoder.encode(f"{key}\n" + "\n".join(value)))
-        else:
-            actual_chunk += 1
-            actual_tokens = 0
-            summarize_chunk.append("")
-            if (
-                len(encoder.encode(f"{key}\n" + "\n".join(value))) +
-                actual_tokens
-                <= max_tokens
-            ):
-                summarize_chunk[actual_chunk] = (
-                    summarize_chunk[actual_chunk] +
-                    f"{key}\n" + "\n".join(value)
-                )
-                actual_tokens += len(encoder.encode(f"{key}\n" +
-                                                    "\n".join(value)))
+            resumo_esp.append(section)
+            continue
+        section_tokens = encoded_length(section)
+        if section_tokens + actual_tokens <= max_tokens:
+            chunks[-1].append(section)
+            actual_tokens += section_tokens
+            continue
+        if section_tokens <= max_tokens:
+            chunks.append([section])
+            actual_tokens = section_tokens
+            continue
+        chunks.append([title])
+        actual_tokens = encoded_length(title)
+        for line_n, line in enumerate(value):
+            line_tokens = encoded_length(line + "\n")
+            if line_tokens >= max_tokens:
+                continue
+            if line_tokens + actual_tokens <= max_tokens:
+                actual_tokens += line_tokens
             else:
-                summarize_chunk[actual_chunk] = (
-                    summarize_chunk[actual_chunk] + f"{key}\n"
-                )
-                actual_tokens += len(encoder.encode(f"{key}\n"))
-                for line_n in range(len(value)):
-                    if len(encoder.encode(value[line_n] + "\n")) >= max_tokens:
-                        pass
-                    elif (
-                        len(encoder.encode(value[line_n] + "\n")) +
-                        actual_tokens
-                        <= max_tokens
-                    ):
-                        summarize_chunk[actual_chunk] = (
-                            summarize_chunk[actual_chunk] + value[line_n] +
-                            "\n"
-                        )
-                        actual_tokens += len(encoder.encode(value[line_n] +
-                                                            "\n"))
-                    else:
-                        actual_chunk += 1
-                        actual_tokens = 0
-                        summarize_chunk.append(
-                            f"{key}\n" + "\n".join(
-                                value[line_n - overlap: line_n])
-                        )
-                        summarize_chunk[actual_chunk] = (
-                            summarize_chunk[actual_chunk] + value[line_n] +
-                            "\n"
-                        )
-                        actual_tokens += len(encoder.encode(value[line_n] +
-                                                            "\n"))
-    return {"Resumo": resumo_esp, "chunks": summarize_chunk}
-
-
-def pre_processamento_pdf(text: str) -> str:
+                # mesmo fatiamento da versao anterior, inclusive com `line_n - overlap` negativo
+                chunks.append([title + "\n".join(value[line_n - overlap:line_n])])
+                actual_tokens = line_tokens
+            chunks[-1].append(line + "\n")
+    return {"Resumo": resumo_esp, "chunks": ["".join(parts) for parts in chunks]}
+
+
+@timed("pre_processamento_pdf")
+def pre_processamento_pdf(text: str, *, use_cache: bool = CONVERSION_CACHE_ENABLED) -> str:
     """Funcao para preprocessamento de dados.
 
     remove espacos duplos e qubras de linha desnecessarios.
 
     Args:
         text (str): texto de entrada
+        use_cache (bool): Se deve consultar o cache de conversao (ver `conversion_cache`).
 
     Returns:
         str: texto pre processado
     """
-    text = re.sub(r"[ ]{2,}", " ", text.strip())
-    return re.sub(r"[ \n]{2,}", "\n", text)
+    if use_cache and isinstance(text, str):
+        return conversion_cache.get_or_convert(text, f"pre_processamento_pdf|{CONVERTER_VERSION}", clean_pdf_text)
+    return clean_pdf_text(text)
+
+
+def clean_pdf_text(text: str) -> str:
+    """Preprocessamento de `pre_processamento_pdf`, sem o cache.
+
+    Equivale a trocar espacos repetidos por um espaco e depois qualquer
+    sequencia de dois ou mais espacos e quebras de linha por uma quebra: toda
+    sequencia com uma quebra vira uma quebra, entao basta tirar os espacos das
+    bordas de cada linha, descartar as linhas vazias e juntar as palavras das
+    linhas com espacos repetidos. So os metodos de str percorrem o texto, o
+    que e mais rapido que as expressoes regulares.
+    """
+    lines = []
+    for raw_line in text.strip().split("\n"):
+        line = " ".join([word for word in raw_line.split(" ") if word]) if "  " in raw_line else raw_line.strip(" ")
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
 
 
 def remove_html_tags(text: str) -> str:
@@ -831,15 +790,15 @@ def remove_html_tags(text: str) -> str:
     Returns:
         str: The text without HTML tags.
     """
-    return re.sub(r"<.*?>", "", text)
+    return HTML_TAG_PATTERN.sub("", text)
 
 
 def remove_html_and_format_table(html_content: str) -> str:
     """Remove HTML tags from the content and format any tables found in the HTML.
 
     This function parses the given HTML content, converts any tables found into
-    pandas DataFrames, and replaces the tables in the HTML with their string
-    representation. It then returns the cleaned text without HTML tags.
+    markdown with `process_table`, and replaces the tables in the HTML with that
+    text. It then returns the cleaned text without HTML tags.
 
     Args:
         html_content (str): The input HTML content.
@@ -847,10 +806,8 @@ def remove_html_and_format_table(html_content: str) -> str:
     Returns:
         str: The cleaned text with tables formatted as plain text.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
-    for table in soup.find_all("table"):
-        data = pd.read_html(str(table))[0]
-        table.replace_with(data.to_markdown(index=False))
+    soup = parse_html(html_content)
+    replace_tables(soup)
 
     return soup.get_text()
 
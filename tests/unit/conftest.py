@@ -0,0 +1,95 @@
+"""Configuracao dos testes unitarios: bancos de dados e tokenizer falsos e um modelo pequeno."""
+import random
+import re
+import sys
+import types
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from sqlalchemy.orm import declarative_base
+
+# `embedder.db_connection.instances` conecta aos bancos na importacao; os
+# testes usam no lugar um modulo com os mesmos nomes e conexoes falsas
+instances = types.ModuleType("embedder.db_connection.instances")
+instances.BasePgvector = declarative_base()
+instances.app_db_instance = mock.MagicMock()
+instances.sei_db_instance = mock.MagicMock()
+sys.modules["embedder.db_connection.instances"] = instances
+
+
+class FakeTokenizer:
+    """Tokenizer rapido falso: cada palavra ou sinal de pontuacao e um token.
+
+    Devolve `input_ids` e `offset_mapping` como o PreTrainedTokenizerFast; o id
+    de cada token e a ordem em que ele apareceu pela primeira vez.
+    """
+
+    pattern = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self) -> None:
+        """Comeca com o vocabulario vazio."""
+        self.vocab: dict[str, int] = {}
+
+    def __call__(self, text: str, **_: object) -> dict:
+        """Tokeniza `text` (sem tokens especiais)."""
+        matches = list(self.pattern.finditer(text))
+        return {
+            "input_ids": [self.vocab.setdefault(match.group(), len(self.vocab)) for match in matches],
+            "offset_mapping": [match.span() for match in matches],
+        }
+
+
+@pytest.fixture()
+def tokenizer() -> FakeTokenizer:
+    """Tokenizer falso (ver `FakeTokenizer`)."""
+    return FakeTokenizer()
+
+
+@pytest.fixture()
+def sei_db() -> mock.MagicMock:
+    """Conexao falsa com o banco do SEI, limpa a cada teste."""
+    instances.sei_db_instance.reset_mock(return_value=True, side_effect=True)
+    return instances.sei_db_instance
+
+
+@pytest.fixture(scope="session")
+def model_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """SentenceTransformer BERT pequeno (pesos aleatorios), salvo em um diretorio temporario.
+
+    Tem a mesma estrutura do modelo padrao (Transformer com max_seq_length 128 e
+    mean pooling), sem depender de download.
+    """
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers import models as st_models
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors, trainers
+    from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+
+    rng = random.Random(0)  # noqa: S311
+    words = "o a de que para processo documento contrato clausula objeto item prazo valor multa servico".split()
+    corpus = [" ".join(rng.choices(words, k=30)) + ". 1.2 (a) III - ," for _ in range(500)]
+    special_tokens = {
+        "unk_token": "[UNK]", "pad_token": "[PAD]", "cls_token": "[CLS]", "sep_token": "[SEP]", "mask_token": "[MASK]",
+    }
+    tokenizer = Tokenizer(models.WordPiece(unk_token=special_tokens["unk_token"]))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    trainer = trainers.WordPieceTrainer(vocab_size=200, special_tokens=sorted(special_tokens.values()))
+    tokenizer.train_from_iterator(corpus, trainer)
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        special_tokens=[("[CLS]", tokenizer.token_to_id("[CLS]")), ("[SEP]", tokenizer.token_to_id("[SEP]"))],
+    )
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, model_max_length=128, **special_tokens)
+    config = BertConfig(
+        vocab_size=fast.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=512,
+    )
+    hf_path = tmp_path_factory.mktemp("bert")
+    BertModel(config).save_pretrained(hf_path)
+    fast.save_pretrained(hf_path)
+    transformer = st_models.Transformer(str(hf_path), max_seq_length=128)
+    pooling = st_models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    path = Path(tmp_path_factory.mktemp("sentence_transformer"))
+    SentenceTransformer(modules=[transformer, pooling]).save(str(path))
+    return str(path)
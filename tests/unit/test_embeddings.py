@@ -0,0 +1,183 @@
+"""Testes da divisao em chunks por tokens e da codificacao em lote dos chunks."""
+from itertools import pairwise
+
+import numpy as np
+import pytest
+import torch
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModel, AutoTokenizer
+
+from embedder.embeddings import (
+    SEPARATORS,
+    boundary_ranks,
+    encode_chunks,
+    split_into_chunks,
+    split_token_chunks,
+    token_chunk_bounds,
+)
+
+WORD_RANK = len([sep for sep in SEPARATORS if sep])
+
+PARAGRAPHS = "\n\n".join(
+    " ".join(f"palavra{paragraph}x{word}" for word in range(12)) + "." for paragraph in range(6)
+)
+
+
+def test_boundary_ranks(tokenizer: object) -> None:
+    doc = "Um. Dois\n\nTres,quatro cinco"
+    offsets = tokenizer(doc)["offset_mapping"]
+
+    ranks = boundary_ranks(doc, offsets)
+
+    # Um | . | Dois | Tres | , | quatro | cinco
+    assert ranks.tolist() == [
+        WORD_RANK + 1,  # antes do primeiro token
+        WORD_RANK + 1,  # "Um" e "." sem espaco
+        SEPARATORS.index("."),
+        SEPARATORS.index("\n\n"),
+        WORD_RANK + 1,  # "Tres" e "," sem espaco
+        SEPARATORS.index(","),
+        WORD_RANK,  # apenas espaco
+        WORD_RANK + 1,  # depois do ultimo token
+    ]
+
+
+def test_boundary_ranks_prefers_first_separator(tokenizer: object) -> None:
+    doc = "fim.\n\ninicio"
+    offsets = tokenizer(doc)["offset_mapping"]
+
+    assert boundary_ranks(doc, offsets)[2] == SEPARATORS.index("\n\n")
+
+
+def test_token_chunk_bounds_cuts_at_best_rank() -> None:
+    # 10 tokens; corte de paragrafo (rank 0) na fronteira 4 e de frase (rank 2) na 7
+    ranks = np.full(11, WORD_RANK, dtype=np.int32)
+    ranks[4], ranks[7] = 0, 2
+
+    assert token_chunk_bounds(ranks, chunk_size=8, chunk_overlap=0) == [(0, 4), (4, 10)]
+    ranks[4] = WORD_RANK
+    assert token_chunk_bounds(ranks, chunk_size=8, chunk_overlap=0) == [(0, 7), (7, 10)]
+
+
+def test_token_chunk_bounds_overlap_starts_at_boundary() -> None:
+    ranks = np.full(21, WORD_RANK, dtype=np.int32)
+    ranks[6] = ranks[8] = 2
+
+    bounds = token_chunk_bounds(ranks, chunk_size=8, chunk_overlap=3)
+
+    assert bounds[0] == (0, 8)
+    # a sobreposicao so comeca em fronteira de rank nao pior que o do corte
+    assert bounds[1][0] == 6
+    assert all(end - start <= 8 for start, end in bounds)
+    assert bounds[-1][1] == 20
+
+
+def test_token_chunk_bounds_cover_all_tokens() -> None:
+    rng = np.random.default_rng(0)
+    ranks = rng.integers(0, WORD_RANK + 2, size=501).astype(np.int32)
+
+    bounds = token_chunk_bounds(ranks, chunk_size=40, chunk_overlap=10)
+
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == 500
+    for (start, end), (next_start, next_end) in pairwise(bounds):
+        assert 0 < end - start <= 40
+        assert start < next_start <= end
+        assert end - next_start <= 10
+        assert next_end > end
+
+
+def test_token_chunk_bounds_rejects_overlap_not_smaller_than_size() -> None:
+    with pytest.raises(ValueError, match="chunk_overlap"):
+        token_chunk_bounds(np.zeros(11, dtype=np.int32), chunk_size=5, chunk_overlap=5)
+
+
+def test_split_token_chunks_positions_and_ids(tokenizer: object) -> None:
+    positions, token_ids = split_token_chunks(PARAGRAPHS, tokenizer, chunk_size=30, chunk_overlap=5)
+
+    assert len(positions) > 1
+    for (start, end), ids in zip(positions, token_ids, strict=True):
+        text = PARAGRAPHS[start:end]
+        assert text == text.strip()
+        assert list(ids) == tokenizer(text)["input_ids"]
+        assert len(ids) <= 30
+
+
+def test_split_token_chunks_keeps_whole_paragraphs(tokenizer: object) -> None:
+    # cada paragrafo tem 13 tokens: cabem dois por chunk e os cortes ficam entre paragrafos
+    positions, _ = split_token_chunks(PARAGRAPHS, tokenizer, chunk_size=30, chunk_overlap=0)
+
+    chunks = [PARAGRAPHS[start:end] for start, end in positions]
+    assert "\n\n".join(chunks) == PARAGRAPHS
+    assert all(chunk.count("\n\n") == 1 for chunk in chunks)
+
+
+def test_split_token_chunks_repeated_text(tokenizer: object) -> None:
+    doc = "\n\n".join(["mesmo texto repetido."] * 4)
+
+    positions, _ = split_token_chunks(doc, tokenizer, chunk_size=4, chunk_overlap=0)
+
+    assert [start for start, _ in positions] == [doc.index("mesmo", 23 * idx) for idx in range(4)]
+
+
+def test_split_token_chunks_empty(tokenizer: object) -> None:
+    assert split_token_chunks("", tokenizer) == ([], [])
+
+
+MAX_LENGTH = 128
+CHUNKS = [
+    "contrato de prestacao de servico",  # curto
+    "o objeto do contrato e a prestacao de servico de fiscalizacao, com prazo de vigencia e multa por atraso "
+    "no pagamento do valor mensal.",  # mais de MAX_LENGTH caracteres e menos de MAX_LENGTH tokens
+    " ".join(["clausula item prazo valor multa"] * 60),  # mais de MAX_LENGTH tokens
+    "item 1.2 (a)",
+]
+
+
+def baseline_embed_long_text(text: str, model_path: str, max_length: int) -> np.ndarray:
+    """`embed_long_text` da versao original: um forward por bloco de palavras completado com [PAD]."""
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path)
+    chunk_embeddings = []
+    for chunk in split_into_chunks(text, max_length):
+        inputs = tokenizer(chunk, return_tensors="pt", padding="max_length", max_length=max_length)
+        with torch.no_grad():
+            outputs = model(**inputs)
+        chunk_embeddings.append(outputs.last_hidden_state.mean(dim=1).squeeze().numpy())
+    return np.mean(chunk_embeddings, axis=0)
+
+
+def baseline_encode(chunks: list[str], model_path: str, max_length: int) -> list[np.ndarray]:
+    """Codificacao chunk a chunk da versao original de `indexing_embeddings`."""
+    model = SentenceTransformer(model_path)
+    return [
+        baseline_embed_long_text(chunk, model_path, max_length) if len(chunk) > max_length else model.encode([chunk])[0]
+        for chunk in chunks
+    ]
+
+
+@pytest.mark.parametrize("with_token_ids", [False, True])
+def test_encode_chunks_matches_per_chunk_baseline(model_path: str, with_token_ids: bool) -> None:  # noqa: FBT001
+    # os padroes de LONG_TEXT_MODE e LONG_TEXT_ROUTING reproduzem a versao original
+    token_ids = AutoTokenizer.from_pretrained(model_path)(CHUNKS, add_special_tokens=False)["input_ids"]
+
+    vectors = encode_chunks(
+        CHUNKS,
+        model_path=model_path,
+        max_length=MAX_LENGTH,
+        batch_size=2,
+        token_ids=token_ids if with_token_ids else None,
+    )
+
+    for vector, expected in zip(vectors, baseline_encode(CHUNKS, model_path, MAX_LENGTH), strict=True):
+        np.testing.assert_allclose(vector, expected, atol=1e-5)
+
+
+def test_encode_chunks_token_routing(model_path: str) -> None:
+    # no roteamento por tokens so o chunk com mais de MAX_LENGTH tokens e texto longo
+    vectors = encode_chunks(CHUNKS, model_path=model_path, max_length=MAX_LENGTH, mode="padded", routing="tokens")
+
+    expected = SentenceTransformer(model_path).encode(CHUNKS)
+    for idx in (0, 1, 3):
+        np.testing.assert_allclose(vectors[idx], expected[idx], atol=1e-5)
+    np.testing.assert_allclose(vectors[2], baseline_embed_long_text(CHUNKS[2], model_path, MAX_LENGTH), atol=1e-5)
@@ -0,0 +1,72 @@
+"""Testes da checagem em lote do conteudo dos documentos (SEI e Solr)."""
+import re
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("poppler")  # dependencia de external_sei
+
+from embedder.extract_docs import external_sei  # noqa: E402
+from embedder.extract_docs.external_sei import check_exist_content_docs_ext_from_ids  # noqa: E402
+from embedder.extract_docs.extract_content import check_exist_content_batch  # noqa: E402
+
+INTERNAL = {"type_doc": "I", "formato_arquivo": "", "num_doc": "0001", "num_proc": "P1"}
+EXTERNAL = {"type_doc": "X", "formato_arquivo": "anexo.pdf", "num_doc": "0002", "num_proc": "P2"}
+
+
+def solr_select(docs: dict[str, int]) -> mock.Mock:
+    """`SolrRequests.select` falso: `docs` e a quantidade de documentos com conteudo de cada id_prot."""
+
+    def select(url: str, **_: object) -> dict:
+        ids = re.search(r"id_prot:\(([^)]*)\)", url).group(1).split(" ")
+        rows = int(re.search(r"rows=(\d+)", url).group(1))
+        found = [{"id_prot": id_documento} for id_documento in ids for _ in range(docs.get(id_documento, 0))]
+        return {"numFound": len(found), "docs": found[:rows]}
+
+    return mock.Mock(side_effect=select)
+
+
+def sei_select(types: dict[str, list[dict]], status: dict[str, list[int]]) -> mock.Mock:
+    """`select` falso do SEI para as consultas em lote do tipo e do conteudo dos documentos."""
+
+    def select(sql: str, **_: object) -> list[dict]:
+        ids = re.search(r"IN \(([^)]*)\)", sql).group(1).split(",")
+        if "status_content_doc" in sql:
+            return [
+                {"id_documento": int(id_documento), "status_content_doc": value}
+                for id_documento in ids
+                for value in status.get(id_documento, [])
+            ]
+        return [
+            {"id_documento": int(id_documento), **row} for id_documento in ids for row in types.get(id_documento, [])
+        ]
+
+    return mock.Mock(side_effect=select)
+
+
+def test_check_exist_content_docs_ext_from_ids() -> None:
+    select = solr_select({"1": 1, "3": 1})
+    with mock.patch.object(external_sei.SolrRequests, "select", select):
+        assert check_exist_content_docs_ext_from_ids(["1", "2", "3"]) == {"1", "3"}
+    select.assert_called_once()
+
+
+def test_check_exist_content_docs_ext_from_ids_more_docs_than_ids() -> None:
+    # um id com varios documentos no Solr: a consulta e refeita com rows=numFound
+    select = solr_select({"1": 3, "2": 1})
+    with mock.patch.object(external_sei.SolrRequests, "select", select):
+        assert check_exist_content_docs_ext_from_ids(["1", "2"]) == {"1", "2"}
+    assert select.call_count == 2
+    assert "rows=4" in select.call_args.args[0]
+
+
+def test_check_exist_content_batch(sei_db: mock.MagicMock) -> None:
+    # 1 e 2: internos (2 sem conteudo); 3 e 4: externos (4 sem conteudo no Solr);
+    # 5: nao encontrado (404); 6: mais de uma linha de tipo (409)
+    sei_db.select = sei_select(
+        types={"1": [INTERNAL], "2": [INTERNAL], "3": [EXTERNAL], "4": [EXTERNAL], "6": [INTERNAL, EXTERNAL]},
+        status={"1": [1], "2": [0], "6": [1]},
+    )
+    select = solr_select({"3": 1, "6": 1})
+    with mock.patch.object(external_sei.SolrRequests, "select", select):
+        assert check_exist_content_batch(["1", "2", "3", "4", "5", "6"]) == {"1", "3"}
@@ -0,0 +1,40 @@
+"""Testes da checagem em lote do conteudo dos documentos internos."""
+import re
+from unittest import mock
+
+from embedder.extract_docs.internal_sei import check_exist_content_docs_int_from_ids
+
+
+def status_rows(status: dict[str, list[int]]) -> mock.Mock:
+    """`select` falso: devolve o status_content_doc dos ids presentes no IN (...) da consulta."""
+
+    def select(sql: str, **_: object) -> list[dict]:
+        ids = re.search(r"IN \(([^)]*)\)", sql).group(1).split(",")
+        return [
+            {"id_documento": int(id_documento), "status_content_doc": value}
+            for id_documento in ids
+            for value in status.get(id_documento, [])
+        ]
+
+    return mock.Mock(side_effect=select)
+
+
+def test_check_exist_content_docs_int_from_ids(sei_db: mock.MagicMock) -> None:
+    # 1: com conteudo; 2: sem conteudo; 3: nao encontrado (404); 4: mais de uma linha (409)
+    sei_db.select = status_rows({"1": [1], "2": [0], "4": [1, 1]})
+
+    assert check_exist_content_docs_int_from_ids(["1", "2", "3", "4"]) == {"1"}
+
+
+def test_check_exist_content_docs_int_from_ids_batches(sei_db: mock.MagicMock) -> None:
+    sei_db.select = status_rows({str(idx): [1] for idx in range(5)})
+
+    assert check_exist_content_docs_int_from_ids([str(idx) for idx in range(5)], batch_size=2) == set("01234")
+    assert sei_db.select.call_count == 3
+
+
+def test_check_exist_content_docs_int_from_ids_empty(sei_db: mock.MagicMock) -> None:
+    sei_db.select = mock.Mock()
+
+    assert check_exist_content_docs_int_from_ids([]) == set()
+    sei_db.select.assert_not_called()
@@ -0,0 +1,41 @@
+"""Testes do cache LRU limitado por quantidade de itens e pela soma dos tamanhos."""
+from embedder.conversion_cache import ConversionCache
+from embedder.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache = LRUCache(2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+
+def test_lru_cache_limits_total_size() -> None:
+    cache = LRUCache(10, max_size=10)
+    cache.put("a", "x" * 4)
+    cache.put("b", "x" * 4)
+    cache.put("c", "x" * 4)
+
+    assert cache.get("a") is None
+    assert len(cache) == 2
+    assert cache.size == 8
+
+    cache.put("b", "x")
+    assert cache.size == 5
+    cache.put("d", "x" * 11)
+    assert cache.get("d") is None
+    assert cache.size == 5
+
+
+def test_conversion_cache_total_chars() -> None:
+    cache = ConversionCache(max_entries=100, max_total_chars=25)
+
+    for idx in range(5):
+        cache.get_or_convert(f"doc {idx}", "conversor", lambda raw: raw * 2)
+
+    assert cache.memory.size <= 25
+    assert len(cache.memory) == 2
@@ -0,0 +1,171 @@
+"""Testes do pre-processamento de texto (tabelas HTML, entidades e texto de PDF)."""
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from embedder.text_preprocess import (
+    clean_pdf_text,
+    html_to_markdown,
+    iter_table_rows,
+    parse_html,
+    process_html_to_markdown,
+    process_html_to_markdown_parallel,
+    process_table,
+    replace_html_special_characters,
+)
+
+# pedacos dos textos aleatorios das comparacoes com as versoes anteriores
+FRAGMENTS = [" ", "  ", "\n", "\n\n", " \n ", "\t", "\r\n", "\f", "a", "bc", ".", "&nbsp;", "&#8239;", "&#8203;",
+             "&#64257;", "&shy;", "&amp;", "&", ";", "<!-- x -->", "<b>"]
+
+
+def table_rows(html: str) -> list[list[str]]:
+    return list(iter_table_rows(parse_html(html).find("table")))
+
+
+def test_iter_table_rows_plain() -> None:
+    html = "<table><tr><th>a</th><th>b</th></tr><tr><td>1</td><td>2</td></tr></table>"
+
+    assert table_rows(html) == [["a", "b"], ["1", "2"]]
+
+
+def test_iter_table_rows_colspan() -> None:
+    html = "<table><tr><td colspan='3'>titulo</td></tr><tr><td>1</td><td>2</td><td>3</td></tr></table>"
+
+    assert table_rows(html) == [["titulo"] * 3, ["1", "2", "3"]]
+
+
+def test_iter_table_rows_rowspan() -> None:
+    html = (
+        "<table>"
+        "<tr><td rowspan='3'>a</td><td>1</td></tr>"
+        "<tr><td>2</td></tr>"
+        "<tr><td>3</td></tr>"
+        "<tr><td>b</td><td>4</td></tr>"
+        "</table>"
+    )
+
+    assert table_rows(html) == [["a", "1"], ["a", "2"], ["a", "3"], ["b", "4"]]
+
+
+def test_iter_table_rows_rowspan_in_middle_and_last_column() -> None:
+    html = (
+        "<table>"
+        "<tr><td>1</td><td rowspan='2'>meio</td><td>x</td><td rowspan='2'>fim</td></tr>"
+        "<tr><td>2</td><td>y</td></tr>"
+        "</table>"
+    )
+
+    assert table_rows(html) == [["1", "meio", "x", "fim"], ["2", "meio", "y", "fim"]]
+
+
+def test_iter_table_rows_rowspan_and_colspan() -> None:
+    html = (
+        "<table>"
+        "<tr><td rowspan='2' colspan='2'>bloco</td><td>1</td></tr>"
+        "<tr><td>2</td></tr>"
+        "</table>"
+    )
+
+    assert table_rows(html) == [["bloco", "bloco", "1"], ["bloco", "bloco", "2"]]
+
+
+def test_iter_table_rows_rowspan_past_short_row() -> None:
+    # a segunda linha nao tem celulas ate a coluna do rowspan: as posicoes vazias viram ""
+    html = (
+        "<table>"
+        "<tr><td>1</td><td>2</td><td rowspan='2'>c</td></tr>"
+        "<tr><td>3</td></tr>"
+        "</table>"
+    )
+
+    assert table_rows(html) == [["1", "2", "c"], ["3", "", "c"]]
+
+
+@pytest.mark.parametrize(
+    ("span", "expected"),
+    [("0", 1), ("", 1), ("abc", 1), (" 2", 2), ("2px", 2), ("-3", 1)],
+)
+def test_iter_table_rows_invalid_span(span: str, expected: int) -> None:
+    html = f"<table><tr><td colspan='{span}'>a</td><td>b</td></tr></table>"
+
+    assert table_rows(html) == [["a"] * expected + ["b"]]
+
+
+def test_iter_table_rows_caps_span() -> None:
+    html = "<table><tr><td colspan='999999'>a</td></tr></table>"
+
+    assert len(table_rows(html)[0]) == 1000
+
+
+def test_process_table_markdown() -> None:
+    html = "<table><tr><td>a</td><td></td></tr><tr><td colspan='2'>1</td></tr></table>"
+
+    assert process_table(parse_html(html).find("table")) == "| a |   |\n|---|---|\n| 1 | 1 |\n\n"
+
+
+@pytest.mark.parametrize("single_parse", [False, True])
+def test_html_to_markdown_table_without_body(single_parse: bool) -> None:  # noqa: FBT001
+    html = "<p>sem body</p><table><tr><td>a</td><td>b</td></tr><tr><td>1</td><td>2</td></tr></table>"
+
+    markdown = html_to_markdown(html, use_cache=False, single_parse=single_parse)
+
+    assert markdown == "sem body\n| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_html_to_markdown_parallel_matches_serial(workers: int) -> None:
+    htmls = [f"<body><p>paragrafo {idx}</p><table><tr><td>{idx}</td></tr></table></body>" for idx in range(7)]
+    htmls += ["", "   ", None]
+
+    frame = pd.DataFrame({"HTML": htmls})
+    parallel = process_html_to_markdown_parallel(frame.copy(), workers=workers, chunk_size=2, min_rows=0)
+
+    assert parallel.equals(process_html_to_markdown(frame))
+
+
+def random_texts(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)  # noqa: S311
+    return ["".join(rng.choices(FRAGMENTS, k=rng.randint(0, 30))) for _ in range(count)]
+
+
+def clean_pdf_text_regex(text: str) -> str:
+    """`clean_pdf_text` anterior, com expressoes regulares."""
+    text = re.sub(r"[ ]{2,}", " ", text.strip())
+    return re.sub(r"[ \n]{2,}", "\n", text)
+
+
+def replace_html_special_characters_chained(html: str) -> str:
+    """`replace_html_special_characters` anterior, com trocas encadeadas."""
+    return (
+        html.replace("&nbsp;", " ")
+        .replace("&#8239;", " ")
+        .replace("&#8203;", "")
+        .replace("&#64257;", "fi")
+        .replace("&shy;", "")
+    )
+
+
+def test_clean_pdf_text_matches_regex_version() -> None:
+    for text in random_texts(20000):
+        assert clean_pdf_text(text) == clean_pdf_text_regex(text), repr(text)
+
+
+def test_clean_pdf_text() -> None:
+    text = "  Titulo   do  documento \n\n\n  primeira linha  \n \n segunda\tlinha  "
+
+    assert clean_pdf_text(text) == "Titulo do documento\nprimeira linha\nsegunda\tlinha"
+
+
+def test_replace_html_special_characters_matches_chained_version() -> None:
+    # os pedacos nao formam uma entidade nova quando outra e removida (ver o teste seguinte)
+    for text in random_texts(20000):
+        assert replace_html_special_characters(text) == replace_html_special_characters_chained(text), repr(text)
+
+
+def test_replace_html_special_characters_single_pass() -> None:
+    assert replace_html_special_characters("a&nbsp;b&#64257;m&shy;&amp;") == "a bfim&amp;"
+    # uma entidade formada pela remocao de outra fica no texto
+    assert replace_html_special_characters("&sh&#8203;y;") == "&shy;"
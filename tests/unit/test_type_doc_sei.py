@@ -0,0 +1,94 @@
+"""Testes da busca do tipo dos documentos no SEI, individual e em lote."""
+import re
+from unittest import mock
+
+import pytest
+
+from embedder.extract_docs.type_doc_sei import (
+    MAX_IN_LIST_SIZE,
+    get_type_doc_from_id,
+    get_type_doc_from_ids,
+    id_batches,
+)
+from embedder.http_exceptions import HTTPException404, HTTPException409
+
+INTERNAL = {"type_doc": "I", "formato_arquivo": "", "num_doc": "0001", "num_proc": "P1"}
+EXTERNAL = {"type_doc": "X", "formato_arquivo": "anexo.pdf", "num_doc": "0002", "num_proc": "P2"}
+
+
+def rows_by_id(rows: dict[str, list[dict]]) -> mock.Mock:
+    """`select` falso: devolve as linhas dos ids presentes no IN (...) da consulta."""
+
+    def select(sql: str, **_: object) -> list[dict]:
+        ids = re.search(r"IN \(([^)]*)\)", sql).group(1).split(",")
+        return [
+            {"id_documento": int(id_documento), **row} for id_documento in ids for row in rows.get(id_documento, [])
+        ]
+
+    return mock.Mock(side_effect=select)
+
+
+def test_id_batches() -> None:
+    ids = ["1", " 2", 3, "2", "abc", "4; DROP TABLE x", "5"]
+
+    assert list(id_batches(ids, 2)) == [["1", "2"], ["3", "5"]]
+
+
+def test_id_batches_limits_batch_size() -> None:
+    ids = [str(idx) for idx in range(2500)]
+
+    assert [len(batch) for batch in id_batches(ids, 5000)] == [MAX_IN_LIST_SIZE, MAX_IN_LIST_SIZE, 500]
+    assert [len(batch) for batch in id_batches(ids[:3], 0)] == [1, 1, 1]
+
+
+def test_get_type_doc_from_ids(sei_db: mock.MagicMock) -> None:
+    sei_db.select = rows_by_id({"1": [INTERNAL], "2": [EXTERNAL]})
+
+    types = get_type_doc_from_ids(["1", "2"])
+
+    assert types == {"1": (True, "html", "0001", "P1"), "2": (False, "pdf", "0002", "P2")}
+    sei_db.select.assert_called_once()
+
+
+def test_get_type_doc_from_ids_one_query_per_batch(sei_db: mock.MagicMock) -> None:
+    sei_db.select = rows_by_id({str(idx): [INTERNAL] for idx in range(5)})
+
+    types = get_type_doc_from_ids([str(idx) for idx in range(5)], batch_size=2)
+
+    assert sorted(types) == ["0", "1", "2", "3", "4"]
+    assert sei_db.select.call_count == 3
+
+
+def test_get_type_doc_from_ids_drops_not_found_and_conflicts(sei_db: mock.MagicMock) -> None:
+    # 2: nao encontrado (404); 3: mais de uma linha e 4: sem tipo (409)
+    sei_db.select = rows_by_id({
+        "1": [INTERNAL],
+        "3": [INTERNAL, EXTERNAL],
+        "4": [{**INTERNAL, "type_doc": None}],
+    })
+
+    assert get_type_doc_from_ids(["1", "2", "3", "4"]) == {"1": (True, "html", "0001", "P1")}
+
+
+@pytest.mark.parametrize(
+    ("rows", "expected"),
+    [
+        ([INTERNAL], (True, "html", "0001", "P1")),
+        ([EXTERNAL], (False, "pdf", "0002", "P2")),
+        ([], HTTPException404),
+        ([INTERNAL, EXTERNAL], HTTPException409),
+        ([{**INTERNAL, "type_doc": None}], HTTPException409),
+    ],
+)
+def test_batch_matches_single_lookup(sei_db: mock.MagicMock, rows: list[dict], expected: object) -> None:
+    sei_db.select = rows_by_id({"7": rows})
+    types = get_type_doc_from_ids(["7"])
+
+    sei_db.select = mock.Mock(return_value=rows)
+    if isinstance(expected, tuple):
+        assert get_type_doc_from_id("7") == expected
+        assert types == {"7": expected}
+    else:
+        with pytest.raises(expected):
+            get_type_doc_from_id("7")
+        assert types == {}